@@ -581,6 +581,11 @@ USER_POOL_ID=$(aws ssm get-parameter --name "$SSM_PATH_PREFIX/UserPoolId" --quer
 USER_POOL_CLIENT_ID=$(aws ssm get-parameter --name "$SSM_PATH_PREFIX/UserPoolClientId" --query "Parameter.Value" --output text)
 USER_POOL_DOMAIN=$(aws ssm get-parameter --name "$SSM_PATH_PREFIX/UserPoolDomain" --query "Parameter.Value" --output text)
 IDENTITY_POOL_ID=$(aws ssm get-parameter --name "$SSM_PATH_PREFIX/IdentityPoolId" --query "Parameter.Value" --output text)
+LLM_STREAM_URL=$(aws lambda get-function-url-config \
+  --function-name wga-llm-stream-$ENV \
+  --query "FunctionUrl" \
+  --output text 2>/dev/null || echo "")
+LLM_STREAM_URL=${LLM_STREAM_URL%/}
 ENV_FILE="frontend/.env.local"
 
 echo "환경 파일 생성 중: $ENV_FILE"
@@ -592,6 +597,7 @@ API_DEST=$API_URL
 
 VITE_API_URL=/api
 VITE_API_DEST=$API_URL
+VITE_LLM_STREAM_URL=$LLM_STREAM_URL
 
 COGNITO_DOMAIN=$(echo "$USER_POOL_DOMAIN" | sed -E 's#https://([^.]*)\..*#\1#')
 COGNITO_CLIENT_ID=$USER_POOL_CLIENT_ID
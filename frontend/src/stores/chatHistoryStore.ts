@@ -10,6 +10,40 @@ const generateId = () => {
     return Date.now().toString(36) + Math.random().toString(36).substring(2);
 };
 
+// 세션 메시지 목록은 가벼운 필드만 페이지 단위로 받고, inference/query_result는 메시지별로 필요할 때 조회
+const MESSAGE_PAGE_SIZE = 100;
+const MESSAGE_LIST_FIELDS = 'id,sender,text,timestamp,elapsed_time,query_string';
+const MESSAGE_DETAIL_FIELDS = 'inference,query_result';
+
+// 메시지 한 페이지(최신순)를 받아 시간순으로 뒤집어 반환, 봇 메시지의 상세 데이터는 아직 받지 않은 상태로 표시
+const fetchMessagePage = async (
+    apiUrl: string,
+    sessionId: string,
+    cursor: string | null,
+): Promise<{ messages: ChatMessageType[]; nextCursor: string | null }> => {
+    const response = await axios.get(`${apiUrl}/sessions/${sessionId}/messages`, {
+        params: {
+            limit: MESSAGE_PAGE_SIZE,
+            fields: MESSAGE_LIST_FIELDS,
+            ...(cursor && { cursor }),
+        },
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        withCredentials: true,
+    });
+
+    const messages: ChatMessageType[] = response.data.messages || [];
+    messages.reverse();
+    messages.forEach((message) => {
+        if (message.sender === 'assistant') {
+            message.detailsLoaded = false;
+        }
+    });
+
+    return { messages, nextCursor: response.data.nextCursor || null };
+};
+
 export const useChatHistoryStore = defineStore('chatHistory', {
     state: (): ChatHistoryState & { apiCancelToken: CancelTokenSource | null } => ({
         loading: false,
@@ -17,6 +51,8 @@ export const useChatHistoryStore = defineStore('chatHistory', {
         sessions: [],
         currentSession: null,
         waitingForResponse: false,
+        messagesCursor: null,
+        loadingOlderMessages: false,
         apiCancelToken: null,
     }),
 
@@ -26,6 +62,8 @@ export const useChatHistoryStore = defineStore('chatHistory', {
         currentMessages: (state) => {
             return state.currentSession?.messages || [];
         },
+
+        hasOlderMessages: (state) => !!state.currentSession && !!state.messagesCursor,
     },
 
     actions: {
@@ -98,6 +136,7 @@ export const useChatHistoryStore = defineStore('chatHistory', {
 
                 this.sessions.unshift(newSession);
                 this.currentSession = newSession;
+                this.messagesCursor = null;
 
                 return newSession;
             } catch (err: any) {
@@ -123,22 +162,16 @@ export const useChatHistoryStore = defineStore('chatHistory', {
                     withCredentials: true,
                 });
 
-                const messagesResponse = await axios.get(
-                    `${apiUrl}/sessions/${sessionId}/messages`,
-                    {
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        withCredentials: true,
-                    },
-                );
+                // 최신 페이지만 먼저 받아 바로 표시하고, 이전 메시지는 loadOlderMessages로 이어서 조회
+                const page = await fetchMessagePage(apiUrl, sessionId, null);
 
                 const session: ChatSession = {
                     ...sessionResponse.data,
-                    messages: messagesResponse.data.messages || [],
+                    messages: page.messages,
                 };
 
                 this.currentSession = session;
+                this.messagesCursor = page.nextCursor;
 
                 const index = this.sessions.findIndex((s) => s.sessionId === sessionId);
                 if (index !== -1) {
@@ -155,6 +188,62 @@ export const useChatHistoryStore = defineStore('chatHistory', {
             }
         },
 
+        async loadOlderMessages() {
+            if (!this.currentSession || !this.messagesCursor || this.loadingOlderMessages) return;
+
+            this.loadingOlderMessages = true;
+            const session = this.currentSession;
+
+            try {
+                const apiUrl = import.meta.env.VITE_API_DEST || 'http://localhost:8000';
+                const page = await fetchMessagePage(apiUrl, session.sessionId, this.messagesCursor);
+
+                // 조회 중 다른 세션으로 바뀌었으면 결과를 버림
+                if (this.currentSession !== session) return;
+
+                session.messages.unshift(...page.messages);
+                this.messagesCursor = page.nextCursor;
+            } catch (err: any) {
+                console.error('이전 메시지 가져오기 오류:', err);
+                this.error = err.message || '이전 메시지를 불러오는 중 오류가 발생했습니다.';
+            } finally {
+                this.loadingOlderMessages = false;
+            }
+        },
+
+        async loadMessageDetails(message: ChatMessageType) {
+            if (message.detailsLoaded !== false || !this.currentSession) return;
+
+            try {
+                const apiUrl = import.meta.env.VITE_API_DEST || 'http://localhost:8000';
+                const sessionId = this.currentSession.sessionId;
+
+                const response = await axios.get(
+                    `${apiUrl}/sessions/${sessionId}/messages/${message.id}`,
+                    {
+                        params: {
+                            timestamp: message.timestamp,
+                            fields: MESSAGE_DETAIL_FIELDS,
+                        },
+                        headers: {
+                            'Content-Type': 'application/json',
+                        },
+                        withCredentials: true,
+                    },
+                );
+
+                if (response.data.inference !== undefined) {
+                    message.inference = response.data.inference;
+                }
+                if (response.data.query_result !== undefined) {
+                    message.query_result = response.data.query_result;
+                }
+                message.detailsLoaded = true;
+            } catch (err: any) {
+                console.error('메시지 상세 정보 가져오기 오류:', err);
+            }
+        },
+
         async sendMessage(text: string, isCached: boolean = true) {
             if (!text.trim()) return;
 
@@ -215,7 +304,20 @@ export const useChatHistoryStore = defineStore('chatHistory', {
                 this.apiCancelToken = axios.CancelToken.source();
                 console.log('API 취소 토큰 생성 완료:', !!this.apiCancelToken);
 
-                const botResponseData = await this.generateBotResponse(text, cachedValue);
+                const useStreaming = settingsStore.getIsStreaming;
+                const botResponseData = useStreaming
+                    ? await this.streamBotResponse(text, cachedValue, (partialText) => {
+                          const loadingMessage = this.currentSession?.messages?.find(
+                              (msg) => msg.id === loadingMessageId,
+                          );
+                          if (loadingMessage) {
+                              loadingMessage.isTyping = false;
+                              loadingMessage.text = partialText;
+                              loadingMessage.displayText = partialText;
+                              loadingMessage.animationState = 'typing';
+                          }
+                      })
+                    : await this.generateBotResponse(text, cachedValue);
 
                 if (this.currentSession && Array.isArray(this.currentSession.messages)) {
                     this.currentSession.messages = this.currentSession.messages.filter(
@@ -272,10 +374,16 @@ export const useChatHistoryStore = defineStore('chatHistory', {
 
                     const addedMessage =
                         this.currentSession.messages[this.currentSession.messages.length - 1];
-                    addedMessage.displayText = '';
-                    addedMessage.animationState = 'typing';
+                    if (useStreaming) {
+                        // 스트리밍 중 이미 표시된 답변이므로 타이핑 애니메이션을 다시 하지 않음
+                        addedMessage.displayText = botResponseData.text || '';
+                        addedMessage.animationState = 'complete';
+                    } else {
+                        addedMessage.displayText = '';
+                        addedMessage.animationState = 'typing';
 
-                    this.simulateTypingAnimation(addedMessage.id, botResponseData.text || '');
+                        this.simulateTypingAnimation(addedMessage.id, botResponseData.text || '');
+                    }
                 }
 
                 const sessionIndex = this.sessions.findIndex((s) => s.sessionId === sessionId);
@@ -493,6 +601,109 @@ export const useChatHistoryStore = defineStore('chatHistory', {
             }
         },
 
+        async streamBotResponse(
+            userMessage: string,
+            isCached: boolean = true,
+            onDelta: (partialText: string) => void = () => {},
+        ): Promise<BotResponse> {
+            const streamUrl = useSettingsStore().getStreamUrl;
+
+            const { useModelsStore } = await import('@/stores/models');
+            const modelsStore = useModelsStore();
+
+            const abortController = new AbortController();
+            this.apiCancelToken?.token.promise.then(() => abortController.abort());
+
+            let response: Response;
+            try {
+                // API Gateway는 응답을 모아서 반환하므로 스트리밍 Function URL로 직접 요청
+                response = await fetch(`${streamUrl}/llm1`, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        Accept: 'text/event-stream',
+                    },
+                    credentials: 'include',
+                    signal: abortController.signal,
+                    body: JSON.stringify({
+                        text: userMessage,
+                        sessionId: this.currentSession?.sessionId,
+                        modelId: modelsStore.selectedModel.id,
+                        isCached: isCached,
+                    }),
+                });
+            } catch (error: any) {
+                if (error?.name === 'AbortError') {
+                    throw new axios.CanceledError('사용자가 요청을 취소했습니다.');
+                }
+                throw error;
+            }
+
+            if (!response.ok || !response.body) {
+                throw new Error(`스트리밍 응답 오류: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let partialText = '';
+            let result: BotResponse | null = null;
+
+            const handleEvent = (rawEvent: string) => {
+                let eventType = 'message';
+                let data = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) {
+                        eventType = line.slice('event:'.length).trim();
+                    } else if (line.startsWith('data:')) {
+                        data += line.slice('data:'.length).trim();
+                    }
+                }
+                if (!data) return;
+
+                const payload = JSON.parse(data);
+                if (eventType === 'delta') {
+                    partialText += payload.text || '';
+                    onDelta(partialText);
+                } else if (eventType === 'tool_start' || eventType === 'tool_finish') {
+                    console.log(`도구 ${eventType}:`, payload.tool_name);
+                } else if (eventType === 'done') {
+                    result = {
+                        text: payload.answer || partialText,
+                        elapsed_time: payload.elapsed_time,
+                        inference: payload.inference,
+                    };
+                } else if (eventType === 'error') {
+                    throw new Error(payload.answer || payload.error);
+                }
+            };
+
+            try {
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+
+                    buffer += decoder.decode(value, { stream: true });
+                    let boundary = buffer.indexOf('\n\n');
+                    while (boundary !== -1) {
+                        handleEvent(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                        boundary = buffer.indexOf('\n\n');
+                    }
+                }
+                if (buffer.trim()) {
+                    handleEvent(buffer);
+                }
+            } catch (error: any) {
+                if (error?.name === 'AbortError') {
+                    throw new axios.CanceledError('사용자가 요청을 취소했습니다.');
+                }
+                throw error;
+            }
+
+            return result || { text: partialText };
+        },
+
         async simulateTypingAnimation(messageId: string, fullText: string) {
             if (!this.currentSession || !Array.isArray(this.currentSession.messages)) return;
 
@@ -653,6 +864,8 @@ export const useChatHistoryStore = defineStore('chatHistory', {
             this.sessions = [];
             this.currentSession = null;
             this.waitingForResponse = false;
+            this.messagesCursor = null;
+            this.loadingOlderMessages = false;
 
             if (this.apiCancelToken) {
                 this.apiCancelToken.cancel('상태 초기화로 인한 취소');
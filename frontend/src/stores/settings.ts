@@ -1,17 +1,25 @@
 // src/stores/settings.ts
 import { defineStore } from 'pinia';
 
+// /llm1 스트리밍 Function URL (배포 시 설정되지 않으면 스트리밍 비활성)
+const LLM_STREAM_URL = import.meta.env.VITE_LLM_STREAM_URL || '';
+
 interface SettingsState {
     isCached: boolean;
+    isStreaming: boolean;
 }
 
 export const useSettingsStore = defineStore('settings', {
     state: (): SettingsState => ({
         isCached: true,
+        isStreaming: false,
     }),
 
     getters: {
         getIsCached: (state) => state.isCached,
+        streamingAvailable: () => !!LLM_STREAM_URL,
+        getIsStreaming: (state) => !!LLM_STREAM_URL && state.isStreaming,
+        getStreamUrl: () => LLM_STREAM_URL,
     },
 
     actions: {
@@ -20,16 +28,28 @@ export const useSettingsStore = defineStore('settings', {
             localStorage.setItem('isCached', JSON.stringify(value));
         },
 
+        setIsStreaming(value: boolean) {
+            this.isStreaming = value;
+            localStorage.setItem('isStreaming', JSON.stringify(value));
+        },
+
         loadFromStorage() {
             const saved = localStorage.getItem('isCached');
             if (saved !== null) {
                 this.isCached = JSON.parse(saved);
             }
+
+            const savedStreaming = localStorage.getItem('isStreaming');
+            if (savedStreaming !== null) {
+                this.isStreaming = JSON.parse(savedStreaming);
+            }
         },
 
         resetSettings() {
             this.isCached = true;
+            this.isStreaming = false;
             localStorage.removeItem('isCached');
+            localStorage.removeItem('isStreaming');
         },
     },
 });
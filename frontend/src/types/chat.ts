@@ -11,6 +11,7 @@ export interface ChatMessageType {
     query_result?: any[];
     elapsed_time?: string | number;
     inference?: any;
+    detailsLoaded?: boolean;
 }
 
 export interface ChatSession {
@@ -28,6 +29,8 @@ export interface ChatHistoryState {
     sessions: ChatSession[];
     currentSession: ChatSession | null;
     waitingForResponse: boolean;
+    messagesCursor: string | null;
+    loadingOlderMessages: boolean;
 }
 
 export interface BotResponse {
@@ -0,0 +1,174 @@
+# common/chat_messages.py
+import datetime
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+
+# 채팅 메시지는 세션 아이템의 messages 리스트가 아니라 메시지마다 하나의 아이템으로 저장합니다.
+#   메시지 테이블: PK sessionId, SK messageKey ("{timestamp}#{id}")
+#   세션 메타데이터(제목, 사용자, 생성/수정 시간)는 채팅 기록 테이블의 세션 아이템에 둡니다.
+# 이전 방식으로 저장된 세션은 세션 아이템의 messages 리스트를 함께 읽습니다(dual-read).
+
+# 메시지 아이템에만 있는 키 속성 (API 응답에서는 제외)
+MESSAGE_KEY_ATTRIBUTES = ('sessionId', 'messageKey')
+
+# API로 조회할 수 있는 메시지 필드
+MESSAGE_FIELDS = ('id', 'sender', 'text', 'elapsed_time', 'timestamp', 'inference', 'query_string', 'query_result')
+
+# 용량이 큰 필드 (목록 조회에서는 빼고 메시지별로 필요할 때 조회)
+HEAVY_MESSAGE_FIELDS = ('inference', 'query_result')
+
+def message_timestamp(value=None):
+    """메시지 정렬 키에 쓰는 고정 길이 타임스탬프 (마이크로초 포함 ISO 8601)
+
+    isoformat()은 마이크로초가 0이면 소수점 이하를 생략해 문자열 정렬 순서가 깨지므로
+    항상 timespec='microseconds'로 맞춥니다.
+    """
+    if value is None:
+        value = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=9)))
+    elif isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.isoformat(timespec='microseconds')
+
+
+def message_key(timestamp, message_id):
+    """메시지 정렬 키: 같은 시각의 메시지도 구분되도록 ID를 붙임"""
+    return f"{message_timestamp(timestamp)}#{message_id}"
+
+
+def to_message(item):
+    """메시지 아이템에서 키 속성을 제외한 API 응답용 메시지 반환"""
+    return {k: v for k, v in item.items() if k not in MESSAGE_KEY_ATTRIBUTES}
+
+
+def put_message(messages_table, session_id, message):
+    """메시지 하나를 아이템 하나로 저장 (세션 크기와 무관한 O(1) 쓰기)"""
+    messages_table.put_item(Item={
+        'sessionId': session_id,
+        'messageKey': message_key(message['timestamp'], message['id']),
+        **message
+    })
+
+
+def projection_kwargs(fields):
+    """필드 목록을 ProjectionExpression 인자로 변환 (예약어와 겹치지 않도록 이름 치환)"""
+    names = {f'#p{i}': name for i, name in enumerate(fields)}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+
+def query_messages(messages_table, session_id, newest_first=False, limit=None,
+                   start_key=None, projection=None):
+    """
+    세션 메시지 한 페이지 조회
+
+    Returns:
+        (메시지 아이템 리스트, 다음 페이지 시작 키 또는 None)
+    """
+    kwargs = {
+        'KeyConditionExpression': Key('sessionId').eq(session_id),
+        'ScanIndexForward': not newest_first
+    }
+    if limit:
+        kwargs['Limit'] = limit
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    if projection:
+        kwargs.update(projection_kwargs(projection))
+
+    response = messages_table.query(**kwargs)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def iter_messages(messages_table, session_id, projection=None):
+    """세션의 모든 메시지 아이템을 오래된 순으로 페이지 단위 조회하며 반환"""
+    start_key = None
+    while True:
+        items, start_key = query_messages(messages_table, session_id,
+                                          start_key=start_key, projection=projection)
+        yield from items
+        if not start_key:
+            break
+
+
+def get_message(messages_table, session_id, message_id, timestamp=None, projection=None):
+    """
+    메시지 하나 조회
+
+    timestamp가 있으면 정렬 키로 바로 GetItem 하고, 없으면 세션 메시지를 페이지 단위로
+    id 필터 조회합니다 (세션 메시지 수만큼 읽기 용량 사용).
+    """
+    extra = projection_kwargs(projection) if projection else {}
+    if timestamp:
+        response = messages_table.get_item(
+            Key={'sessionId': session_id, 'messageKey': message_key(timestamp, message_id)},
+            **extra
+        )
+        return response.get('Item')
+
+    start_key = None
+    while True:
+        kwargs = {
+            'KeyConditionExpression': Key('sessionId').eq(session_id),
+            'FilterExpression': Attr('id').eq(message_id),
+            **extra
+        }
+        if start_key:
+            kwargs['ExclusiveStartKey'] = start_key
+        response = messages_table.query(**kwargs)
+        if response.get('Items'):
+            return response['Items'][0]
+        start_key = response.get('LastEvaluatedKey')
+        if not start_key:
+            return None
+
+
+def load_session_messages(session_table, messages_table, session_id):
+    """
+    세션의 전체 메시지를 오래된 순으로 반환 (메시지 아이템 + 이전 방식의 messages 리스트)
+
+    Returns:
+        (세션 아이템, 메시지 리스트). 세션이 없으면 (None, None)
+    """
+    session = session_table.get_item(Key={'sessionId': session_id}).get('Item')
+    if not session:
+        return None, None
+
+    messages = [to_message(item) for item in iter_messages(messages_table, session_id)]
+    legacy = session.get('messages') or []
+    if legacy:
+        stored_ids = {message.get('id') for message in messages}
+        messages.extend(message for message in legacy if message.get('id') not in stored_ids)
+        messages.sort(key=lambda message: message_timestamp(message.get('timestamp', '')))
+
+    return session, messages
+
+
+def migrate_legacy_messages(session_table, messages_table, session_id, legacy_messages):
+    """
+    세션 아이템의 messages 리스트를 메시지 아이템으로 옮기고 리스트를 제거
+
+    메시지 키는 타임스탬프와 ID로 정해지므로 중간에 실패해도 다시 실행하면 같은 아이템을 덮어씁니다.
+    리스트 제거는 옮긴 뒤 리스트 길이가 그대로일 때만 수행합니다. 동시에 실행된 다른 이전 작업이
+    이미 리스트를 제거했다면 메시지 아이템도 모두 기록된 것이므로 성공으로 처리합니다.
+    """
+    with messages_table.batch_writer(overwrite_by_pkeys=['sessionId', 'messageKey']) as batch:
+        for message in legacy_messages:
+            batch.put_item(Item={
+                'sessionId': session_id,
+                'messageKey': message_key(message.get('timestamp', ''), message.get('id', '')),
+                **message
+            })
+
+    try:
+        session_table.update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression="REMOVE messages",
+            ConditionExpression="attribute_not_exists(messages) OR size(messages) = :count",
+            ExpressionAttributeValues={':count': len(legacy_messages)}
+        )
+    except ClientError as e:
+        # 그 사이 리스트에 메시지가 추가된 경우: 다음 조회에서 다시 이전
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
@@ -61,7 +61,8 @@ def load_config():
             'kb_id': ''
         },
         'db': {
-            'chat_history_table': os.environ.get('CHAT_HISTORY_TABLE', f'wga-chat-history-{ENV}')
+            'chat_history_table': os.environ.get('CHAT_HISTORY_TABLE', f'wga-chat-history-{ENV}'),
+            'chat_messages_table': os.environ.get('CHAT_MESSAGES_TABLE', f'wga-chat-messages-{ENV}')
         },
         'anthropic': {
             'api_key': ''
@@ -114,6 +115,7 @@ def load_config():
             'McpFunctionUrl': ('mcp', 'function_url'),
             'KnowledgeBaseId': ('kb', 'kb_id'),
             'ChatHistoryTable': ('db', 'chat_history_table'),  # 새로 추가된 SSM 파라미터
+            'ChatMessagesTable': ('db', 'chat_messages_table'),
             'ANTHROPIC_API_KEY': ('anthropic', 'api_key')
         }
 
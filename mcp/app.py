@@ -1,54 +1,96 @@
 import os
 import json
-import boto3
-import pandas as pd
-import httpx
 import re
 import requests
 import time
 from datetime import datetime, timedelta
 from collections import defaultdict
-from typing import Optional, Dict, List, Any, Union
-from tabulate import tabulate
-from pydantic import BaseModel, Field
-from lambda_mcp.lambda_mcp import LambdaMCPServer
+from typing import Optional, Dict, List, Any, Union, Iterable
+from lambda_mcp.lambda_mcp import LambdaMCPServer, current_lambda_context
+from lambda_mcp.aws_clients import AwsClientRegistry
 from lambda_mcp.document_utils import (
     extract_content_from_html,
     format_documentation_result,
     is_html_content,
     parse_recommendation_results,
 )
-from lambda_mcp.diagram_utils import (
-    generate_diagram,
-    get_diagram_examples,
-    list_diagram_icons
-)
 from lambda_mcp.mcp_types import DiagramType
 from lambda_mcp.chart_utils import generate_chart_url, validate_chart_data
-from lambda_mcp.logs_utils import generate_insights_query, analyze_insights_results, get_query_templates
+from lambda_mcp.logs_utils import (
+    generate_insights_query,
+    get_query_templates,
+    format_timestamp,
+    LogEventAnalyzer,
+    InsightsResultAnalyzer
+)
+from lambda_mcp.logs_fetch import fetch_recent_stream_events, fetch_stream_events, top_k_newest
+from lambda_mcp.insights_query import (
+    InsightsQueryManager,
+    plan_shards,
+    query_time_budget,
+    DEFAULT_SLICE_SECONDS as DEFAULT_INSIGHTS_SLICE_SECONDS,
+    MAX_LOG_GROUPS_PER_QUERY
+)
+from lambda_mcp.insights_merge import InsightsQueryPlan, merge_shard_rows, rows_to_dicts, iter_result_rows
+from lambda_mcp.insights_cache import InsightsResultCache, make_cache_key
+from lambda_mcp.insights_incremental import IncrementalInsightsEvaluator
+from lambda_mcp.insights_export import ResultExporter
 
 # API URL 상수 정의
 DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 ModelContextProtocol/1.0 (AWS Documentation Server)'
 SEARCH_API_URL = 'https://proxy.search.docs.aws.amazon.com/search'
 RECOMMENDATIONS_API_URL = 'https://contentrecs-api.docs.aws.amazon.com/v1/recommendations'
 
+# Upper bound on events analyze_log_group reads per call
+MAX_ANALYZE_EVENTS = 100_000
+
+# Logs Insights 결과 중 응답에 포함하는 샘플 행 수
+MAX_RESULT_SAMPLES = 50
+
 
 # Get session table name from environment variable
 session_table = os.environ.get('MCP_SESSION_TABLE', f'wga-mcp-sessions-{os.environ.get("ENV", "dev")}')
 aws_region = os.environ.get("AWS_REGION", "us-east-1")
 
-# Create AWS service clients
-cloudwatch_client = boto3.client('cloudwatch', region_name=aws_region)
-cloudtrail_client = boto3.client('cloudtrail', region_name=aws_region)
-logs_client = boto3.client('logs', region_name=aws_region)
-xray_client = boto3.client('xray', region_name=aws_region)
-autoscaling_client = boto3.client('autoscaling', region_name=aws_region)
-ec2_client = boto3.client('ec2', region_name=aws_region)
-health_client = boto3.client('health', region_name=aws_region)
-ce_client = boto3.client('ce', region_name=aws_region)
+# AWS service clients are created on first use; most requests only touch one or two
+aws_clients = AwsClientRegistry(region_name=aws_region)
+cloudwatch_client = aws_clients.lazy('cloudwatch')
+cloudtrail_client = aws_clients.lazy('cloudtrail')
+logs_client = aws_clients.lazy('logs')
+xray_client = aws_clients.lazy('xray')
+autoscaling_client = aws_clients.lazy('autoscaling')
+ec2_client = aws_clients.lazy('ec2')
+health_client = aws_clients.lazy('health')
+ce_client = aws_clients.lazy('ce')
+s3_client = aws_clients.lazy('s3')
+
+# Logs Insights 쿼리 시작/폴링/중단 관리 (적응형 폴링 간격)
+insights_queries = InsightsQueryManager(logs_client)
+
+# Logs Insights 결과 캐시 (컨테이너 LRU + 공유 DynamoDB 테이블)
+insights_cache = InsightsResultCache(table_name=os.environ.get('INSIGHTS_CACHE_TABLE'))
+
+# bin(5m) 집계 쿼리의 닫힌 구간 집계를 저장해 두고 새 구간만 조회하는 증분 평가기
+INCREMENTAL_ANALYSIS_TYPES = ("errors", "traffic", "performance")
+insights_incremental = IncrementalInsightsEvaluator(
+    insights_queries,
+    InsightsResultCache(
+        table_name=os.environ.get('INSIGHTS_CACHE_TABLE'),
+        max_entries=int(os.environ.get('INSIGHTS_BIN_CACHE_SIZE', '2048')),
+        ttl_seconds=int(os.environ.get('INSIGHTS_BIN_CACHE_TTL', str(8 * 24 * 3600)))
+    )
+)
 
 # Initialize the MCP server
-mcp_server = LambdaMCPServer(name="cloudguard", version="1.0.0", session_table=session_table)
+mcp_server = LambdaMCPServer(
+    name="cloudguard",
+    version="1.0.0",
+    session_table=session_table,
+    session_cache_size=int(os.environ.get('MCP_SESSION_CACHE_SIZE', '1024')),
+    session_cache_ttl=int(os.environ.get('MCP_SESSION_CACHE_TTL', '300')),
+    session_mode=os.environ.get('MCP_SESSION_MODE', 'dynamodb'),
+    session_secret=os.environ.get('MCP_SESSION_SECRET')
+)
 
 """
 This file contains the server information for enabling our application
@@ -63,7 +105,7 @@ by the other server to take further steps, such as diagnose the issue and then a
 to create tickets.
 """
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def fetch_cloudwatch_logs_for_service(
         service_name: str,
         days: int = 3,
@@ -119,71 +161,37 @@ def fetch_cloudwatch_logs_for_service(
 
         results = {}
 
-        # Iterate through log groups and fetch log events
-        for log_group in log_groups:
-            try:
-                # First get log streams
-                response = logs_client.describe_log_streams(
-                    logGroupName=log_group,
-                    orderBy='LastEventTime',
-                    descending=True,
-                    limit=5  # Get the 5 most recent streams
-                )
-                streams = response.get('logStreams', [])
-
-                if not streams:
-                    results[log_group] = {"status": "info", "message": "No log streams found"}
-                    continue
-
-                group_events = []
-
-                # For each stream, get recent log events
-                for stream in streams:
-                    stream_name = stream['logStreamName']
-
-                    # If filter pattern is provided, use filter_log_events
-                    if filter_pattern:
-                        filter_response = logs_client.filter_log_events(
-                            logGroupName=log_group,
-                            logStreamNames=[stream_name],
-                            startTime=start_time_ms,
-                            endTime=end_time_ms,
-                            filterPattern=filter_pattern,
-                            limit=100
-                        )
-                        events = filter_response.get('events', [])
-                    else:
-                        # Otherwise use get_log_events
-                        log_response = logs_client.get_log_events(
-                            logGroupName=log_group,
-                            logStreamName=stream_name,
-                            startTime=start_time_ms,
-                            endTime=end_time_ms,
-                            limit=100
-                        )
-                        events = log_response.get('events', [])
-
-                    # Process and add events
-                    for event in events:
-                        # Convert timestamp to readable format
-                        timestamp = datetime.fromtimestamp(event['timestamp'] / 1000)
-                        formatted_event = {
-                            'timestamp': timestamp.isoformat(),
-                            'message': event['message']
-                        }
-                        group_events.append(formatted_event)
-
-                # Sort all events by timestamp (newest first)
-                group_events.sort(key=lambda x: x['timestamp'], reverse=True)
-
-                results[log_group] = {
-                    "status": "success",
-                    "events_count": len(group_events),
-                    "events": group_events[:100]  # Limit to 100 most recent events
-                }
+        # Fan out describe_log_streams and per-stream reads across all groups
+        group_streams = fetch_recent_stream_events(
+            logs_client,
+            log_groups,
+            start_time_ms,
+            end_time_ms,
+            filter_pattern=filter_pattern,
+            streams_per_group=5,  # Get the 5 most recent streams
+            events_per_stream=100
+        )
+
+        for log_group, stream_events in group_streams.items():
+            if isinstance(stream_events, Exception):
+                results[log_group] = {"status": "error", "message": str(stream_events)}
+                continue
+
+            if not stream_events:
+                results[log_group] = {"status": "info", "message": "No log streams found"}
+                continue
 
-            except Exception as e:
-                results[log_group] = {"status": "error", "message": str(e)}
+            # Heap merge of the per-stream results; only the 100 most recent events are formatted
+            newest = top_k_newest(stream_events, 100)
+
+            results[log_group] = {
+                "status": "success",
+                "events_count": sum(len(events) for events in stream_events),
+                "events": [
+                    {'timestamp': format_timestamp(event['timestamp']), 'message': event['message']}
+                    for _, event in newest
+                ]
+            }
 
         return {
             "service": service_name,
@@ -197,7 +205,7 @@ def fetch_cloudwatch_logs_for_service(
         return {"status": "error", "message": str(e)}
 
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def list_cloudwatch_dashboards() -> Dict[str, Any]:
     """
     Lists all CloudWatch dashboards in the AWS account.
@@ -225,7 +233,7 @@ def list_cloudwatch_dashboards() -> Dict[str, Any]:
         return {'status': 'error', 'message': str(e)}
 
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def get_cloudwatch_alarms_for_service(service_name: str = None) -> Dict[str, Any]:
     """
     Fetches CloudWatch alarms, optionally filtering by service.
@@ -303,7 +311,7 @@ def get_dashboard_summary(dashboard_name: str) -> Dict[str, Any]:
         return {'status': 'error', 'message': str(e)}
 
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def list_log_groups(prefix: str = "") -> Dict[str, Any]:
     """
     Lists all CloudWatch log groups, optionally filtered by a prefix.
@@ -364,7 +372,7 @@ def analyze_log_group(
     Args:
         log_group_name: The name of the log group to analyze
         days: Number of days of logs to analyze (default: 1)
-        max_events: Maximum number of events to retrieve (default: 1000)
+        max_events: Maximum number of events to retrieve (default: 1000, at most 100,000)
         filter_pattern: Optional CloudWatch Logs filter pattern
 
     Returns:
@@ -397,93 +405,44 @@ def analyze_log_group(
                 "message": f"No log streams found in log group: {log_group_name}"
             }
 
-        # Collect events from all streams
-        all_events = []
-
-        # For each stream, get log events
-        for stream in streams:
-            stream_name = stream['logStreamName']
-
-            # If filter pattern is provided, use filter_log_events
-            if filter_pattern:
-                filter_response = logs_client.filter_log_events(
-                    logGroupName=log_group_name,
-                    logStreamNames=[stream_name],
-                    startTime=start_time_ms,
-                    endTime=end_time_ms,
-                    filterPattern=filter_pattern,
-                    limit=max_events // len(streams)  # Divide limit among streams
-                )
-                events = filter_response.get('events', [])
-            else:
-                # Otherwise use get_log_events
-                log_response = logs_client.get_log_events(
-                    logGroupName=log_group_name,
-                    logStreamName=stream_name,
-                    startTime=start_time_ms,
-                    endTime=end_time_ms,
-                    limit=max_events // len(streams)
-                )
-                events = log_response.get('events', [])
-
-            # Process and add events
-            for event in events:
-                # Convert timestamp to readable format
-                timestamp = datetime.fromtimestamp(event['timestamp'] / 1000)
-                formatted_event = {
-                    'timestamp': timestamp.isoformat(),
-                    'message': event['message'],
-                    'stream': stream_name
-                }
-                all_events.append(formatted_event)
+        # Read the streams concurrently, dividing the limit among them
+        stream_names = [stream['logStreamName'] for stream in streams]
+        stream_events = fetch_stream_events(
+            logs_client,
+            log_group_name,
+            stream_names,
+            start_time_ms,
+            end_time_ms,
+            filter_pattern=filter_pattern,
+            events_per_stream=max(1, min(max_events, MAX_ANALYZE_EVENTS) // len(streams))
+        )
 
-        # Sort all events by timestamp (newest first)
-        all_events.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Single pass over the raw events (epoch ms); only returned timestamps are formatted
+        analyzer = LogEventAnalyzer()
+        for events in stream_events:
+            analyzer.add_events(events)
 
         # Analyze the events
         insights = {
-            "event_count": len(all_events),
+            "event_count": analyzer.event_count,
             "time_range": f"{start_time.isoformat()} to {end_time.isoformat()}",
-            "unique_streams": len(set(event['stream'] for event in all_events)),
-            "most_recent_event": all_events[0]['timestamp'] if all_events else None,
-            "oldest_event": all_events[-1]['timestamp'] if all_events else None,
-        }
-
-        # Count error, warning, info level events
-        error_count = sum(1 for event in all_events if 'error' in event['message'].lower())
-        warning_count = sum(1 for event in all_events if 'warn' in event['message'].lower())
-        info_count = sum(1 for event in all_events if 'info' in event['message'].lower())
-
-        insights["event_levels"] = {
-            "error": error_count,
-            "warning": warning_count,
-            "info": info_count,
-            "other": len(all_events) - error_count - warning_count - info_count
-        }
-
-        # Group events by hour to see distribution
-        hour_distribution = {}
-        for event in all_events:
-            hour = event['timestamp'][:13]  # Format: YYYY-MM-DDTHH
-            hour_distribution[hour] = hour_distribution.get(hour, 0) + 1
-
-        insights["hourly_distribution"] = hour_distribution
-
-        # Find common patterns in log messages
-        # Extract first 5 words from each message as a pattern
-        patterns = {}
-        for event in all_events:
-            words = event['message'].split()
-            if len(words) >= 5:
-                pattern = ' '.join(words[:5])
-                patterns[pattern] = patterns.get(pattern, 0) + 1
-
-        # Get top 10 patterns
-        top_patterns = sorted(patterns.items(), key=lambda x: x[1], reverse=True)[:10]
-        insights["common_patterns"] = [{"pattern": p, "count": c} for p, c in top_patterns]
-
-        # Sample recent events
-        insights["sample_events"] = all_events[:20]  # First 20 events for reference
+            "unique_streams": sum(1 for events in stream_events if events),
+            "most_recent_event": format_timestamp(analyzer.newest_ms) if analyzer.event_count else None,
+            "oldest_event": format_timestamp(analyzer.oldest_ms) if analyzer.event_count else None,
+            "event_levels": analyzer.event_levels(),
+            "hourly_distribution": analyzer.hourly_distribution(),
+            "common_patterns": analyzer.top_patterns(10)
+        }
+
+        # Sample recent events: heap merge of the streams, 20 newest only
+        insights["sample_events"] = [
+            {
+                'timestamp': format_timestamp(event['timestamp']),
+                'message': event['message'],
+                'stream': stream_names[index]
+            }
+            for index, event in top_k_newest(stream_events, 20)
+        ]
 
         return {
             "status": "success",
@@ -496,13 +455,17 @@ def analyze_log_group(
         return {"status": "error", "message": str(e)}
 
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def analyze_log_groups_insights(
         log_groups: str,
         query: str = "",
         days: int = 1,
         max_results: int = 1000,
-        analysis_type: str = "custom"
+        analysis_type: str = "custom",
+        async_mode: bool = False,
+        use_cache: bool = True,
+        incremental: bool = True,
+        export_results: bool = False
 ) -> Dict[str, Any]:
     """
     CloudWatch Logs Insights를 사용하여 로그 그룹을 분석합니다.
@@ -598,12 +561,22 @@ def analyze_log_groups_insights(
     - `results`: 실제 쿼리 결과 (최대 50개 샘플)
     - `statistics`: 스캔된 레코드 수, 매칭된 레코드 수 등
     - `field_names`: 결과에 포함된 필드 목록
+    - 행 목록(`results`, `shards` 등)은 키 반복을 줄이기 위해 {"columns": [...], "rows": [[...]]} 형식으로 반환
+    - `shards`: 기간/로그 그룹이 많아 분할 실행된 경우 샤드별 상태와 스캔 바이트 (bytes_scanned)
+    - `cache`: 캐시된 결과인 경우 hit=True와 결과 생성 후 경과 시간 (age_seconds)
+    - `incremental`: 증분 평가된 경우 저장된 구간 수(chunks_cached)와 실제 조회한 구간(segments)
+    - `export`: export_results=True인 경우 전체 결과(gzip JSONL)의 S3 키와 24시간 유효한 다운로드 URL
 
     ## 팁:
     - 여러 로그 그룹을 쉼표로 구분하여 통합 분석 가능
-    - days를 길게 설정하면 더 많은 데이터 분석 (단, 시간 증가)
+    - days를 길게 설정하면 더 많은 데이터 분석 (긴 기간과 50개 초과 로그 그룹은 자동 분할되어 병렬 실행)
     - 복잡한 분석이 필요하면 custom 쿼리 직접 작성
     - 결과가 너무 많으면 max_results로 제한
+    - 응답에는 결과 샘플 50개만 포함되므로 전체 결과가 필요하면 export_results=True로 다운로드 URL을 받음
+    - 수 일 이상의 대용량 분석은 async_mode=True로 시작한 뒤 반환된 query_id로
+      getInsightsQueryStatus를 호출하여 결과를 조회
+    - 단일 쿼리가 응답 제한 시간 안에 끝나지 않아도 status="pending"과 query_id가 반환되므로
+      같은 방법으로 결과를 조회
 
     Args:
         log_groups: 분석할 로그 그룹 이름들 (쉼표로 구분, 예: "/aws/lambda/func1,/aws/apigateway/api1")
@@ -611,6 +584,10 @@ def analyze_log_groups_insights(
         days: 분석할 일수 (기본값: 1)
         max_results: 최대 결과 수 (기본값: 1000)
         analysis_type: 자동 쿼리 유형 ("errors", "performance", "security", "traffic", "login", "custom")
+        async_mode: True이면 쿼리 완료를 기다리지 않고 query_id를 즉시 반환 (기본값: False)
+        use_cache: 같은 쿼리/로그 그룹/시간 구간의 최근 결과가 있으면 재사용 (기본값: True, 최신 데이터가 꼭 필요하면 False)
+        incremental: errors/traffic/performance 자동 쿼리에서 이전에 집계한 5분 구간은 재사용하고 새 구간만 조회 (기본값: True)
+        export_results: True이면 전체 결과를 S3에 gzip JSONL로 저장하고 다운로드 URL을 반환 (기본값: False)
 
     Returns:
         Dictionary with analysis results and insights
@@ -629,106 +606,372 @@ def analyze_log_groups_insights(
         end_timestamp = int(end_time.timestamp())
 
         # 쿼리 자동 생성 또는 사용자 쿼리 사용
-        if not query:
+        generated_query = not query
+        if generated_query:
             query = generate_insights_query(analysis_type)
 
         print(f"Logs Insights 쿼리 실행: {query}")
         print(f"로그 그룹: {log_group_list}")
         print(f"시간 범위: {start_time.isoformat()} to {end_time.isoformat()}")
 
-        # Logs Insights 쿼리 실행
-        response = logs_client.start_query(
-            logGroupNames=log_group_list,
-            startTime=start_timestamp,
-            endTime=end_timestamp,
-            queryString=query,
-            limit=max_results
-        )
-
-        query_id = response['queryId']
-        print(f"쿼리 ID: {query_id}")
-
-        # 쿼리 완료 대기
-        max_wait_time = 300  # 5분 최대 대기
-        wait_time = 0
+        query_info = {
+            "analysis_type": analysis_type,
+            "log_groups": log_group_list,
+            "time_range": {
+                "start": start_time.isoformat(),
+                "end": end_time.isoformat(),
+                "days": days
+            },
+            "query": query
+        }
 
-        while wait_time < max_wait_time:
-            result_response = logs_client.get_query_results(queryId=query_id)
-            status = result_response['status']
+        # 최근 동일 쿼리 결과가 캐시에 있으면 재스캔하지 않고 반환
+        cache_key = make_cache_key(query, log_group_list, start_timestamp, end_timestamp,
+                                   analysis_type=analysis_type, max_results=max_results,
+                                   export_results=export_results)
+        if use_cache:
+            cached = insights_cache.get(cache_key)
+            if cached:
+                print(f"Logs Insights 캐시 적중 ({cached['tier']})")
+                return {
+                    **cached['value'],
+                    "cache": {
+                        "hit": True,
+                        "tier": cached['tier'],
+                        "cached_at": datetime.utcfromtimestamp(cached['stored_at']).isoformat(),
+                        "age_seconds": int(time.time() - cached['stored_at'])
+                    }
+                }
 
-            print(f"쿼리 상태: {status}")
+        plan = InsightsQueryPlan(query)
+
+        # 구간별(bin) 집계 쿼리: 저장된 닫힌 구간 + 새로 조회한 앞/뒤 구간을 이어 붙임
+        if (incremental and generated_query and not async_mode
+                and analysis_type in INCREMENTAL_ANALYSIS_TYPES
+                and len(log_group_list) <= MAX_LOG_GROUPS_PER_QUERY
+                and insights_incremental.supports(plan)):
+            result = run_incremental_insights_query(
+                plan, log_group_list, start_timestamp, end_timestamp, max_results, query_info,
+                export_results=export_results
+            )
+            if result["status"] == "success":
+                insights_cache.put(cache_key, result)
+            return {**result, "cache": {"hit": False}}
+
+        # 긴 기간/많은 로그 그룹은 시간 구간 x 로그 그룹 배치로 분할하여 병렬 실행
+        # (시간 구간 간 병합이 불가능한 집계(pct, stddev 등)는 시간 분할하지 않음)
+        shards = plan_shards(
+            log_group_list, start_timestamp, end_timestamp,
+            slice_seconds=None if async_mode or not plan.mergeable else DEFAULT_INSIGHTS_SLICE_SECONDS
+        )
 
-            if status == 'Complete':
-                break
-            elif status in ['Failed', 'Cancelled', 'Timeout']:
+        if len(shards) > 1:
+            # 병합할 수 없는 집계를 배치별로 실행하면 같은 그룹이 배치마다 따로 집계되어 중복됨
+            if plan.is_aggregation and not plan.mergeable:
+                return {
+                    "status": "error",
+                    "message": (f"이 쿼리의 집계(pct, stddev, count_distinct, 다단계 stats 등)는 로그 그룹 배치 간에 "
+                                f"병합할 수 없습니다. 로그 그룹을 {MAX_LOG_GROUPS_PER_QUERY}개 이하로 나누어 실행하세요.")
+                }
+            if async_mode:
                 return {
                     "status": "error",
-                    "message": f"쿼리 실행 실패: {status}",
-                    "query_id": query_id
+                    "message": f"async_mode는 로그 그룹 {MAX_LOG_GROUPS_PER_QUERY}개 이하에서만 지원됩니다."
                 }
+            result = run_sharded_insights_query(plan, shards, max_results, query_info,
+                                                export_results=export_results)
+            if result["status"] == "success":
+                insights_cache.put(cache_key, result)
+            return {**result, "cache": {"hit": False}}
 
-            time.sleep(2)
-            wait_time += 2
+        # Logs Insights 쿼리 실행
+        query_id = insights_queries.start(
+            log_group_list, start_timestamp, end_timestamp, query, limit=max_results
+        )
+        print(f"쿼리 ID: {query_id}")
+
+        # 비동기 모드: 쿼리 완료를 기다리지 않고 query_id 반환
+        if async_mode:
+            return insights_pending_response(query_id, query_info, export_results)
+
+        # 쿼리 완료 대기 (적응형 폴링). Lambda 남은 시간 안에 끝나지 않으면 쿼리를 중단하지 않고
+        # 비동기 모드와 같은 pending 응답으로 query_id를 넘겨 이어서 조회하게 함
+        result_response = insights_queries.wait(query_id, timeout=insights_query_timeout(), stop_on_timeout=False)
+        status = result_response['status']
+        print(f"쿼리 상태: {status}")
+
+        if status == 'Timeout':
+            return insights_pending_response(
+                query_id, query_info, export_results,
+                message="응답 제한 시간 안에 쿼리가 끝나지 않았습니다. getInsightsQueryStatus 도구에 "
+                        "query_id와 analysis_type을 전달하여 결과를 조회하세요."
+            )
 
-        if wait_time >= max_wait_time:
+        if status != 'Complete':
             return {
                 "status": "error",
-                "message": "쿼리 실행 시간 초과",
+                "message": f"쿼리 실행 실패: {status}",
                 "query_id": query_id
             }
 
-        # 결과 처리
-        results = result_response.get('results', [])
-        statistics = result_response.get('statistics', {})
-
-        # 결과를 구조화된 형태로 변환
-        structured_results = []
-        field_names = set()
-
-        for result_row in results:
-            row_data = {}
-            for field in result_row:
-                field_name = field.get('field', '')
-                field_value = field.get('value', '')
-                if field_name:
-                    row_data[field_name] = field_value
-                    field_names.add(field_name)
-            if row_data:
-                structured_results.append(row_data)
-
-        # 분석 결과 생성
-        analysis_summary = analyze_insights_results(
-            structured_results, analysis_type, field_names
-        )
+        result = {
+            "status": "success",
+            "query_id": query_id,
+            **query_info,
+            **build_insights_result(
+                iter_result_rows(result_response.get('results', [])),
+                result_response.get('statistics', {}),
+                analysis_type,
+                export_name=query_id if export_results else None,
+                export=export_results
+            )
+        }
+        insights_cache.put(cache_key, result)
+        return {**result, "cache": {"hit": False}}
+
+    except Exception as e:
+        print(f"Logs Insights 분석 오류: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"분석 실행 중 오류 발생: {str(e)}"
+        }
+
+
+@mcp_server.tool(output_format="columnar")
+def get_insights_query_status(
+        query_id: str,
+        analysis_type: str = "custom",
+        export_results: bool = False
+) -> Dict[str, Any]:
+    """
+    analyze_log_groups_insights를 async_mode=True로 실행했을 때 반환된 쿼리의 상태와 결과를 조회합니다.
+
+    쿼리가 아직 실행 중이면 status="pending"과 다음에 호출할 도구/인자(next_action)를 반환하므로
+    잠시 후 그대로 다시 호출하세요. 클라이언트가 자동으로 폴링하지 않으므로 결과가 필요하면
+    완료될 때까지 이 도구를 직접 호출해야 합니다.
+    완료되면 analyze_log_groups_insights와 같은 형식의 결과와 분석 요약을 반환합니다.
+
+    Args:
+        query_id: analyze_log_groups_insights가 반환한 query_id
+        analysis_type: 쿼리를 시작할 때 사용한 분석 유형 (결과 분석에 사용)
+        export_results: True이면 전체 결과를 S3에 gzip JSONL로 저장하고 다운로드 URL을 반환 (기본값: False)
+
+    Returns:
+        Dictionary with query status, or results and insights once complete
+    """
+    try:
+        result_response = insights_queries.poll(query_id)
+        status = result_response.get('status')
+
+        if status in ('Scheduled', 'Running'):
+            statistics = result_response.get('statistics', {})
+            return {
+                "status": "pending",
+                "query_id": query_id,
+                "query_status": status,
+                "records_scanned": statistics.get('recordsScanned', 0),
+                "message": "쿼리가 아직 실행 중입니다. 잠시 후 같은 인자로 다시 조회하세요.",
+                "next_action": insights_status_action(query_id, analysis_type, export_results)
+            }
+
+        if status != 'Complete':
+            return {
+                "status": "error",
+                "message": f"쿼리 실행 실패: {status}",
+                "query_id": query_id
+            }
 
         return {
             "status": "success",
             "query_id": query_id,
             "analysis_type": analysis_type,
-            "log_groups": log_group_list,
-            "time_range": {
-                "start": start_time.isoformat(),
-                "end": end_time.isoformat(),
-                "days": days
-            },
-            "query": query,
-            "statistics": {
-                "records_matched": statistics.get('recordsMatched', 0),
-                "records_scanned": statistics.get('recordsScanned', 0),
-                "bytes_scanned": statistics.get('bytesScanned', 0)
-            },
-            "results_count": len(structured_results),
-            "field_names": list(field_names),
-            "results": structured_results[:50],  # 최대 50개 결과만 반환
-            "analysis_summary": analysis_summary
+            **build_insights_result(
+                iter_result_rows(result_response.get('results', [])),
+                result_response.get('statistics', {}),
+                analysis_type,
+                export_name=query_id if export_results else None,
+                export=export_results
+            )
         }
 
     except Exception as e:
-        print(f"Logs Insights 분석 오류: {str(e)}")
+        print(f"Logs Insights 쿼리 상태 조회 오류: {str(e)}")
         return {
             "status": "error",
-            "message": f"분석 실행 중 오류 발생: {str(e)}"
+            "message": f"쿼리 상태 조회 중 오류 발생: {str(e)}",
+            "query_id": query_id
+        }
+
+
+def insights_status_action(query_id: str, analysis_type: str, export_results: bool) -> Dict[str, Any]:
+    """pending 응답에 포함하는 다음 호출 안내 (getInsightsQueryStatus 도구와 인자)"""
+    return {
+        "tool": "getInsightsQueryStatus",
+        "arguments": {
+            "query_id": query_id,
+            "analysis_type": analysis_type,
+            "export_results": export_results
+        }
+    }
+
+
+def insights_pending_response(
+        query_id: str,
+        query_info: Dict[str, Any],
+        export_results: bool,
+        message: str = "쿼리가 실행 중입니다. getInsightsQueryStatus 도구에 query_id와 analysis_type을 전달하여 결과를 조회하세요."
+) -> Dict[str, Any]:
+    """실행 중인 쿼리의 query_id와 다음 호출 안내를 담은 pending 응답"""
+    return {
+        "status": "pending",
+        "query_id": query_id,
+        **query_info,
+        "message": message,
+        "export_results": export_results,
+        "next_action": insights_status_action(query_id, query_info["analysis_type"], export_results)
+    }
+
+
+def insights_query_timeout() -> float:
+    """현재 Lambda 호출의 남은 시간에서 응답 여유분을 뺀 쿼리 대기 시간 (초)"""
+    return query_time_budget(current_lambda_context.get())
+
+
+def run_sharded_insights_query(
+        plan: InsightsQueryPlan,
+        shards: List[Dict[str, Any]],
+        max_results: int,
+        query_info: Dict[str, Any],
+        export_results: bool = False
+) -> Dict[str, Any]:
+    """분할된 쿼리를 동시 실행 한도 내에서 병렬로 실행하고 결과를 하나의 쿼리 결과처럼 병합합니다."""
+    # 집계 쿼리는 샤드별 결과가 잘리지 않도록 최대 행 수로 실행하고, 병합 후 limit 적용
+    shard_limit = 10000 if plan.is_aggregation else max_results
+    responses = insights_queries.run_shards(shards, plan.shard_query(), limit=shard_limit,
+                                            timeout=insights_query_timeout())
+
+    shard_reports = []
+    shard_rows = []
+    totals = {'recordsMatched': 0, 'recordsScanned': 0, 'bytesScanned': 0}
+    for shard, response in zip(shards, responses):
+        statistics = response.get('statistics', {})
+        for key in totals:
+            totals[key] += statistics.get(key, 0)
+        if response['status'] == 'Complete':
+            shard_rows.append(rows_to_dicts(response.get('results', [])))
+
+        report = {
+            "query_id": response.get('query_id'),
+            "status": response['status'],
+            "log_groups_count": len(shard['log_groups']),
+            "start": datetime.utcfromtimestamp(shard['start_time']).isoformat(),
+            "end": datetime.utcfromtimestamp(shard['end_time']).isoformat(),
+            "records_scanned": statistics.get('recordsScanned', 0),
+            "bytes_scanned": statistics.get('bytesScanned', 0)
+        }
+        if response.get('error'):
+            report["error"] = response['error']
+        shard_reports.append(report)
+
+    print(f"샤드 {len(shards)}개 중 {len(shard_rows)}개 완료")
+
+    if not shard_rows:
+        return {
+            "status": "error",
+            "message": "모든 분할 쿼리 실행 실패",
+            "shards": shard_reports
+        }
+
+    merged_rows = merge_shard_rows(plan, shard_rows, limit=max_results)
+    result = build_insights_result(merged_rows, totals, query_info["analysis_type"], export=export_results)
+
+    return {
+        "status": "success" if len(shard_rows) == len(shards) else "partial",
+        "query_ids": [report["query_id"] for report in shard_reports if report["query_id"]],
+        **query_info,
+        **result,
+        "shards": shard_reports
+    }
+
+
+def run_incremental_insights_query(
+        plan: InsightsQueryPlan,
+        log_group_list: List[str],
+        start_timestamp: int,
+        end_timestamp: int,
+        max_results: int,
+        query_info: Dict[str, Any],
+        export_results: bool = False
+) -> Dict[str, Any]:
+    """저장된 구간 집계와 새로 조회한 구간 결과를 이어 붙여 전체 기간 쿼리 결과를 만듭니다."""
+    evaluation = insights_incremental.evaluate(
+        plan, log_group_list, start_timestamp, end_timestamp, max_results=max_results,
+        timeout=insights_query_timeout()
+    )
+    print(f"증분 평가: 구간 {evaluation['chunks_total']}개 중 {evaluation['chunks_cached']}개 재사용, "
+          f"조회 {len(evaluation['segments'])}건")
+
+    result = build_insights_result(
+        evaluation['rows'], evaluation['statistics'], query_info["analysis_type"], export=export_results
+    )
+
+    return {
+        "status": evaluation['status'],
+        **query_info,
+        **result,
+        "incremental": {
+            "chunks_total": evaluation['chunks_total'],
+            "chunks_cached": evaluation['chunks_cached'],
+            "segments": evaluation['segments']
         }
+    }
+
+
+def build_insights_result(
+        rows: Iterable[Dict[str, str]],
+        statistics: Dict[str, Any],
+        analysis_type: str,
+        export_name: Optional[str] = None,
+        export: bool = False
+) -> Dict[str, Any]:
+    """
+    결과 행을 한 번만 순회하며 도구 응답 형식(통계, 결과 샘플, 분석 요약)으로 변환합니다.
+
+    각 행은 분석기에 바로 전달되고 응답용 샘플만 남기므로 메모리 사용량이 결과 행 수에
+    비례하지 않습니다. export=True이면 전체 결과를 gzip JSONL로 S3에 저장하고
+    다운로드 URL을 함께 반환합니다.
+    """
+    analyzer = InsightsResultAnalyzer(analysis_type)
+    exporter = ResultExporter(s3_client) if export else None
+    samples = []
+
+    for row in rows:
+        analyzer.add(row)
+        if len(samples) < MAX_RESULT_SAMPLES:
+            samples.append(row)
+        if exporter:
+            exporter.write(row)
+
+    result = {
+        "statistics": {
+            "records_matched": statistics.get('recordsMatched', 0),
+            "records_scanned": statistics.get('recordsScanned', 0),
+            "bytes_scanned": statistics.get('bytesScanned', 0)
+        },
+        "results_count": analyzer.total_records,
+        "field_names": list(analyzer.field_names),
+        "results": samples,  # 최대 50개 결과만 반환
+        "analysis_summary": analyzer.result()
+    }
+
+    if exporter:
+        try:
+            result["export"] = {"status": "success", **exporter.upload(export_name)}
+        except Exception as e:
+            print(f"Logs Insights 결과 내보내기 오류: {str(e)}")
+            result["export"] = {"status": "error", "message": f"결과 내보내기 실패: {str(e)}"}
+
+    return result
 
 
 @mcp_server.tool()
@@ -807,7 +1050,7 @@ def get_insights_query_templates() -> Dict[str, Any]:
     """
     return get_query_templates()
 
-@mcp_server.tool()
+@mcp_server.tool(output_format="columnar")
 def get_detailed_breakdown_by_day(days: int = 7) -> Dict[str, Any]:
     """
     Retrieve daily spend breakdown by region, service, and instance type.
@@ -820,6 +1063,9 @@ def get_detailed_breakdown_by_day(days: int = 7) -> Dict[str, Any]:
             - A nested dictionary with cost data organized by date, region, and service
             - A string containing the formatted output report
     """
+    # pandas/tabulate are only needed by this tool, so keep them off the cold-start path
+    import pandas as pd
+    from tabulate import tabulate
 
     # Calculate the time period
     end_date = datetime.now().strftime('%Y-%m-%d')
@@ -1095,6 +1341,8 @@ def generate_architecture_diagram(
         Dictionary with the S3 URL and status information
     """
     try:
+        # The diagram stack (and its S3 client) loads only when a diagram tool is called
+        from lambda_mcp.diagram_utils import generate_diagram
         result = generate_diagram(code, filename, timeout)
         # DiagramGenerateResponse 객체를 딕셔너리로 변환
         return {
@@ -1145,6 +1393,7 @@ def get_diagram_code_examples(
         else:
             dtype = DiagramType.ALL
 
+        from lambda_mcp.diagram_utils import get_diagram_examples
         result = get_diagram_examples(dtype)
         # DiagramExampleResponse 객체를 딕셔너리로 변환
         return {
@@ -1176,6 +1425,7 @@ def list_available_diagram_icons(
         Dictionary with available providers, services, and icons
     """
     try:
+        from lambda_mcp.diagram_utils import list_diagram_icons
         result = list_diagram_icons(provider_filter, service_filter)
         # DiagramIconsResponse 객체를 딕셔너리로 변환
         return {
@@ -0,0 +1,74 @@
+"""
+Cold-start benchmark for the MCP Lambda (mcp/app.py).
+
+Each sample runs in a fresh interpreter so module caches, boto3 client
+construction and LambdaMCPServer.__init__ are measured the same way a new
+Lambda container pays for them. The script reports the time spent importing
+app.py (which constructs the server) and the total process wall time.
+
+Usage:
+    python benchmarks/cold_start.py --runs 10
+
+Set AWS_REGION / MCP_SESSION_TABLE as in the Lambda environment. Any DynamoDB
+round-trip made during import (e.g. a DescribeTable on the session table) shows
+up directly in the import time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000}))
+"""
+
+
+def run_once(python: str) -> dict:
+    """Import app.py in a fresh interpreter and return timings in milliseconds"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-c", PROBE],
+        cwd=MCP_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or "app import failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_ms"] = wall_ms
+    return result
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCP Lambda cold-start time")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh-interpreter samples")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to benchmark")
+    args = parser.parse_args()
+
+    samples = [run_once(args.python) for _ in range(args.runs)]
+
+    for key in ("import_ms", "wall_ms"):
+        values = [s[key] for s in samples]
+        print(f"{key:>10}: median={statistics.median(values):8.1f}  "
+              f"p90={percentile(values, 90):8.1f}  min={min(values):8.1f}  max={max(values):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
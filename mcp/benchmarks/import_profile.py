@@ -0,0 +1,99 @@
+"""
+Import-time profile for the MCP Lambda (mcp/app.py).
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter, parses the
+per-module timings CPython writes to stderr and prints a report of the slowest
+modules and top-level packages. Use it to keep heavy dependencies (pandas,
+tabulate, diagrams, ...) off the cold-start path.
+
+Usage:
+    python benchmarks/import_profile.py --top 25
+    python benchmarks/import_profile.py --output import_profile.md
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+MCP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:      self [us] |   cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def collect(python: str, module: str) -> list:
+    """Return [(module, self_us, cumulative_us, depth)] for one fresh import"""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=MCP_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(tail[-20:]) or f"import {module} failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def render(module: str, rows: list, top: int) -> str:
+    """Format the parsed timings as a markdown report"""
+    total_us = next((cum for name, _, cum, _ in rows if name == module), sum(r[1] for r in rows))
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    lines = [
+        f"# Import-time profile: `import {module}`",
+        "",
+        f"Python {sys.version.split()[0]}, {len(rows)} modules, total {total_us / 1000:.1f} ms",
+        "",
+        f"## Top {top} packages by self time",
+        "",
+        "| package | self (ms) | share |",
+        "|---|---:|---:|",
+    ]
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"| {name} | {self_us / 1000:.1f} | {self_us / max(total_us, 1):.1%} |")
+
+    lines += [
+        "",
+        f"## Top {top} modules by cumulative time",
+        "",
+        "| module | cumulative (ms) | self (ms) |",
+        "|---|---:|---:|",
+    ]
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"| {name} | {cumulative_us / 1000:.1f} | {self_us / 1000:.1f} |")
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the MCP Lambda")
+    parser.add_argument("--module", default="app", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to profile")
+    parser.add_argument("--output", help="Write the report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = render(args.module, collect(args.python, args.module), args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
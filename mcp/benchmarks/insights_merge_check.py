@@ -0,0 +1,83 @@
+"""
+Consistency check for merging sharded Logs Insights results.
+
+For every query generate_insights_query produces, builds the shard plan, merges
+synthetic rows from two day-long shards (day 1 returned first, as run_shards does)
+and checks that the merged rows come back in the order a single query would return
+them: binned queries newest bin first, so `limit` and the 50-row sample keep the
+most recent data. Also checks that division inside stats is not mistaken for a
+/regex/ literal. Exits with status 1 on any failure.
+
+Usage:
+    python benchmarks/insights_merge_check.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lambda_mcp.insights_merge import InsightsQueryPlan, merge_shard_rows  # noqa: E402
+from lambda_mcp.logs_utils import generate_insights_query  # noqa: E402
+
+ANALYSIS_TYPES = ["errors", "performance", "security", "traffic", "login", "custom"]
+
+
+def shard_rows(plan: InsightsQueryPlan, day: int) -> list:
+    """Three rows per shard, one per 5-minute bin, with every group and aggregate column filled"""
+    rows = []
+    for minute in (0, 5, 10):
+        row = {field: f"2024-01-0{day} 10:{minute:02d}:00.000" if field == plan.bin_group_field else "value"
+               for field in plan.group_fields}
+        for aggregate in plan.aggregates:
+            row[aggregate['field']] = "1"
+            if aggregate['function'] == 'avg':
+                row[aggregate['sum_field']] = "1"
+                row[aggregate['count_field']] = "1"
+        if not plan.is_aggregation:
+            row = {"@timestamp": f"2024-01-0{day} 10:{minute:02d}:00.000", "@message": "x"}
+        rows.append(row)
+    return rows
+
+
+def check_generated_queries() -> list:
+    failures = []
+    for analysis_type in ANALYSIS_TYPES:
+        plan = InsightsQueryPlan(generate_insights_query(analysis_type))
+        if not plan.mergeable:
+            print(f"{analysis_type}: not mergeable, runs unsharded")
+            continue
+        merged = merge_shard_rows(plan, [shard_rows(plan, 1), shard_rows(plan, 2)], limit=3)
+        time_field = plan.bin_group_field if plan.is_aggregation else "@timestamp"
+        if time_field is None:
+            print(f"{analysis_type}: {len(merged)} rows, no time column")
+            continue
+        times = [row.get(time_field, '') for row in merged]
+        ok = len(merged) == 3 and all(value.startswith("2024-01-02") for value in times) \
+            and times == sorted(times, reverse=True)
+        print(f"{analysis_type}: {'ok' if ok else 'FAIL'} {times}")
+        if not ok:
+            failures.append(analysis_type)
+    return failures
+
+
+def check_division() -> list:
+    plan = InsightsQueryPlan("stats avg(@duration/1000) as d by bin(5m) | sort d desc")
+    ok = (plan.mergeable and plan.group_fields == ["bin(5m)"] and plan.sort == ("d", True)
+          and plan.aggregates[0]['argument'] == "@duration/1000")
+    regex = InsightsQueryPlan("filter @message like /a|b/ | stats count() by bin(5m)")
+    ok = ok and regex.group_fields == ["bin(5m)"] and len(regex.commands) == 2
+    unterminated = InsightsQueryPlan("filter @message like /ERROR | stats count() by bin(5m)")
+    ok = ok and not unterminated.mergeable
+    print(f"division / regex parsing: {'ok' if ok else 'FAIL'}")
+    return [] if ok else ["division"]
+
+
+def main():
+    failures = check_generated_queries() + check_division()
+    if failures:
+        print(f"\nfailed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
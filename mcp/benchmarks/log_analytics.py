@@ -0,0 +1,138 @@
+"""
+Synthetic-log benchmark for analyze_log_group's analytics.
+
+Compares the previous multi-pass analysis (format every timestamp, sort, then a
+separate pass each for error/warning/info counts, hourly buckets and first-5-words
+patterns) with the single-pass LogEventAnalyzer, which mines Drain-style templates,
+and reports events per second.
+
+Usage:
+    python benchmarks/log_analytics.py --events 100000 --repeat 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lambda_mcp.logs_utils import LogEventAnalyzer  # noqa: E402
+
+TEMPLATES = [
+    "START RequestId: {uuid} Version: $LATEST",
+    "END RequestId: {uuid}",
+    "REPORT RequestId: {uuid} Duration: {ms} ms Billed Duration: {ms} ms Memory Size: 512 MB",
+    "[ERROR] ValueError: invalid literal for int() with base 10: '{n}' request {uuid}",
+    "[WARN] Slow response from 10.0.{n}.{n} took {ms} ms",
+    "[INFO] Processed {n} records for tenant {n} in {ms} ms",
+    "GET /api/v1/items/{n} 200 {ms}ms",
+]
+
+
+def synthetic_streams(event_count: int, streams: int = 10, seed: int = 7) -> list:
+    """Per-stream event lists, oldest first, like get_log_events returns"""
+    rng = random.Random(seed)
+    start_ms = int(time.time() * 1000) - 24 * 3_600_000
+    per_stream = event_count // streams
+    result = []
+    for _ in range(streams):
+        timestamp = start_ms + rng.randint(0, 60_000)
+        events = []
+        for _ in range(per_stream):
+            timestamp += rng.randint(1, 86_400_000 // max(per_stream, 1))
+            message = rng.choice(TEMPLATES).format(uuid=uuid.UUID(int=rng.getrandbits(128)),
+                                                   n=rng.randint(0, 255), ms=rng.randint(1, 3000))
+            events.append({'timestamp': timestamp, 'message': message})
+        result.append(events)
+    return result
+
+
+def legacy_analyze(stream_events: list) -> dict:
+    """The analysis analyze_log_group performed before the single-pass analyzer"""
+    all_events = []
+    for index, events in enumerate(stream_events):
+        for event in events:
+            all_events.append({
+                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
+                'message': event['message'],
+                'stream': index
+            })
+    all_events.sort(key=lambda x: x['timestamp'], reverse=True)
+
+    error_count = sum(1 for event in all_events if 'error' in event['message'].lower())
+    warning_count = sum(1 for event in all_events if 'warn' in event['message'].lower())
+    info_count = sum(1 for event in all_events if 'info' in event['message'].lower())
+
+    hour_distribution = {}
+    for event in all_events:
+        hour = event['timestamp'][:13]
+        hour_distribution[hour] = hour_distribution.get(hour, 0) + 1
+
+    patterns = {}
+    for event in all_events:
+        words = event['message'].split()
+        if len(words) >= 5:
+            pattern = ' '.join(words[:5])
+            patterns[pattern] = patterns.get(pattern, 0) + 1
+    top_patterns = sorted(patterns.items(), key=lambda x: x[1], reverse=True)[:10]
+
+    return {
+        "event_levels": {"error": error_count, "warning": warning_count, "info": info_count,
+                         "other": len(all_events) - error_count - warning_count - info_count},
+        "hourly_distribution": hour_distribution,
+        "common_patterns": [{"pattern": p, "count": c} for p, c in top_patterns],
+    }
+
+
+def legacy_pattern_keys(stream_events: list) -> set:
+    return {' '.join(event['message'].split()[:5]) for events in stream_events for event in events}
+
+
+def single_pass_analyze(stream_events: list) -> dict:
+    analyzer = LogEventAnalyzer()
+    for events in stream_events:
+        analyzer.add_events(events)
+    return {
+        "event_levels": analyzer.event_levels(),
+        "hourly_distribution": analyzer.hourly_distribution(),
+        "common_patterns": analyzer.top_patterns(10),
+    }
+
+
+def measure(fn, stream_events: list, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(stream_events)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze_log_group analytics")
+    parser.add_argument("--events", type=int, default=100_000, help="Synthetic events to analyze")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    stream_events = synthetic_streams(args.events)
+    total = sum(len(events) for events in stream_events)
+
+    legacy, single = legacy_analyze(stream_events), single_pass_analyze(stream_events)
+    assert legacy["event_levels"] == single["event_levels"], "level counts differ"
+    assert legacy["hourly_distribution"] == single["hourly_distribution"], "hourly buckets differ"
+    # Patterns differ by design: first-5-words keys vs mined templates
+    print(f"distinct patterns: first-5-words={len(legacy_pattern_keys(stream_events))}, "
+          f"templates={len(single['common_patterns'])} (top 10 shown below)")
+    for pattern in single["common_patterns"]:
+        print(f"  {pattern['count']:8,}  {pattern['pattern']}")
+
+    for name, fn in (("multi-pass (before)", legacy_analyze), ("single-pass (after)", single_pass_analyze)):
+        seconds = measure(fn, stream_events, args.repeat)
+        print(f"{name:>20}: {seconds * 1000:8.1f} ms  {total / seconds:12,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Token-count benchmark for MCP tool output formats.
+
+Serializes representative tool results (Logs Insights results, the daily cost
+breakdown, recent log events, log group listings) as:
+
+    repr      str(result), what handle_request used to send
+    json      json.dumps with default separators
+    compact   serialize_tool_result(result, "json")
+    columnar  serialize_tool_result(result, "columnar")
+
+and reports characters and tokens for each. Tokens are counted with tiktoken's
+cl100k_base encoding when it is installed, otherwise estimated by a regex that
+splits words, numbers and punctuation (close to BPE counts for JSON-like text).
+
+Usage:
+    python benchmarks/tool_output_tokens.py
+"""
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lambda_mcp.output_format import serialize_tool_result  # noqa: E402
+
+_TOKEN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken cl100k_base", lambda text: len(encoding.encode(text))
+    except ImportError:
+        return "regex estimate", lambda text: len(_TOKEN.findall(text))
+
+
+def insights_payload(rng: random.Random) -> dict:
+    start = datetime(2024, 1, 1)
+    results = []
+    for i in range(50):
+        results.append({
+            "@timestamp": (start + timedelta(seconds=37 * i)).strftime("%Y-%m-%d %H:%M:%S.000"),
+            "@message": f"[ERROR] Task timed out after {rng.randint(3, 30)}.00 seconds RequestId: {uuid.UUID(int=rng.getrandbits(128))}",
+            "@logStream": f"2024/01/01/[$LATEST]{uuid.UUID(int=rng.getrandbits(128)).hex}",
+            "@requestId": str(uuid.UUID(int=rng.getrandbits(128))),
+            "@duration": f"{rng.uniform(1, 3000):.2f}",
+        })
+    return {
+        "status": "success",
+        "query_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "analysis_type": "errors",
+        "log_groups": ["/aws/lambda/orders-api"],
+        "statistics": {"records_matched": 1834, "records_scanned": 912334, "bytes_scanned": 301234567},
+        "results_count": 1000,
+        "field_names": list(results[0]),
+        "results": results,
+        "analysis_summary": {"total_records": 1000, "insights": []},
+    }
+
+
+def breakdown_payload(rng: random.Random) -> dict:
+    services = ["Amazon Elastic Compute Cloud - Compute", "AWS Lambda", "Amazon Simple Storage Service",
+                "Amazon DynamoDB", "Amazon CloudWatch", "AWS Key Management Service", "Amazon API Gateway",
+                "Amazon Relational Database Service", "Amazon Virtual Private Cloud", "AWS Cost Explorer"]
+    regions = ["us-east-1", "ap-northeast-2", "global"]
+    breakdown = []
+    for day in range(7):
+        date = (datetime(2024, 1, 1) + timedelta(days=day)).strftime("%Y-%m-%d")
+        for region in regions:
+            for service in services:
+                breakdown.append({"date": date, "region": region, "service": service,
+                                  "cost": round(rng.uniform(0, 40), 2)})
+    return {"status": "success", "breakdown_count": len(breakdown), "breakdown": breakdown}
+
+
+def log_events_payload(rng: random.Random) -> dict:
+    start = datetime(2024, 1, 1, 12)
+    events = [{"timestamp": (start + timedelta(milliseconds=731 * i)).isoformat(),
+               "message": f"REPORT RequestId: {uuid.UUID(int=rng.getrandbits(128))} Duration: {rng.uniform(1, 900):.2f} ms"}
+              for i in range(100)]
+    return {
+        "service": "lambda",
+        "time_range": "2024-01-01T11:00:00 to 2024-01-01T12:00:00",
+        "log_groups_count": 1,
+        "log_groups": {"/aws/lambda/orders-api": {"status": "success", "events_count": 4210, "events": events}},
+    }
+
+
+def log_groups_payload(rng: random.Random) -> dict:
+    groups = [{"name": f"/aws/lambda/service-{i:03d}", "arn": f"arn:aws:logs:us-east-1:123456789012:log-group:/aws/lambda/service-{i:03d}:*",
+               "stored_bytes": rng.randint(0, 10 ** 9), "creation_time": "2023-06-01T00:00:00",
+               "retention_days": rng.choice([7, 14, 30, None])}
+              for i in range(120)]
+    return {"status": "success", "group_count": len(groups), "log_groups": groups}
+
+
+def main():
+    rng = random.Random(11)
+    method, count_tokens = token_counter()
+    payloads = {
+        "analyze_log_groups_insights": insights_payload(rng),
+        "get_detailed_breakdown_by_day": breakdown_payload(rng),
+        "fetch_cloudwatch_logs_for_service": log_events_payload(rng),
+        "list_log_groups": log_groups_payload(rng),
+    }
+    formats = {
+        "repr": str,
+        "json": lambda result: json.dumps(result, ensure_ascii=False),
+        "compact": lambda result: serialize_tool_result(result, "json"),
+        "columnar": lambda result: serialize_tool_result(result, "columnar"),
+    }
+
+    print(f"Token counts ({method})\n")
+    print("| payload | " + " | ".join(formats) + " | columnar vs repr |")
+    print("|---|" + "---:|" * (len(formats) + 1))
+    for name, payload in payloads.items():
+        tokens = {label: count_tokens(serialize(payload)) for label, serialize in formats.items()}
+        saving = 1 - tokens["columnar"] / tokens["repr"]
+        print(f"| {name} | " + " | ".join(f"{tokens[label]:,}" for label in formats) + f" | -{saving:.0%} |")
+
+    print("\nCharacters\n")
+    print("| payload | " + " | ".join(formats) + " |")
+    print("|---|" + "---:|" * len(formats))
+    for name, payload in payloads.items():
+        print(f"| {name} | " + " | ".join(f"{len(serialize(payload)):,}" for serialize in formats.values()) + " |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Lazy boto3 client registry for the Lambda MCP server."""
+
+import threading
+from typing import Any, Dict, Optional
+
+import boto3
+
+
+class AwsClientRegistry:
+    """Creates boto3 clients on first use and reuses them for the life of the container.
+
+    Building a client loads its service model, so constructing every client at import
+    time adds to cold start even though a request usually touches only one or two.
+    """
+
+    def __init__(self, region_name: Optional[str] = None):
+        self.region_name = region_name
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str) -> Any:
+        """Return the client for a service, creating it on first access"""
+        client = self._clients.get(service_name)
+        if client is None:
+            # boto3's default session is not thread-safe while creating clients
+            with self._lock:
+                client = self._clients.get(service_name)
+                if client is None:
+                    client = boto3.client(service_name, region_name=self.region_name)
+                    self._clients[service_name] = client
+        return client
+
+    def lazy(self, service_name: str) -> "LazyClient":
+        """Return a placeholder that resolves to the real client on first attribute access"""
+        return LazyClient(self, service_name)
+
+    def loaded(self) -> list:
+        """Names of the clients created so far"""
+        return sorted(self._clients)
+
+
+class LazyClient:
+    """Proxy for a boto3 client owned by an AwsClientRegistry"""
+
+    __slots__ = ("_registry", "_service_name")
+
+    def __init__(self, registry: AwsClientRegistry, service_name: str):
+        self._registry = registry
+        self._service_name = service_name
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._registry.get(self._service_name), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyClient {self._service_name}>"
@@ -0,0 +1,207 @@
+"""
+Two-tier result cache for CloudWatch Logs Insights queries
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import boto3
+
+from .insights_merge import split_top_level
+
+DEFAULT_CACHE_TTL = int(os.environ.get('INSIGHTS_CACHE_TTL', '900'))
+DEFAULT_CACHE_SIZE = int(os.environ.get('INSIGHTS_CACHE_SIZE', '64'))
+DEFAULT_BUCKET_SECONDS = int(os.environ.get('INSIGHTS_CACHE_BUCKET_SECONDS', '300'))
+
+# DynamoDB items are limited to 400 KB; leave room for the key and attributes
+MAX_SHARED_ITEM_BYTES = 350_000
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so reformatted copies of a query share a cache key"""
+    commands = [' '.join(command.split()) for command in split_top_level(query, '|')]
+    return ' | '.join(command for command in commands if command)
+
+
+def make_cache_key(query: str, log_groups: List[str], start_time: int, end_time: int,
+                   bucket_seconds: int = DEFAULT_BUCKET_SECONDS, **options: Any) -> str:
+    """
+    Cache key for a query over a time range (epoch seconds).
+
+    Both ends of the range are rounded down to bucket_seconds, so "last 24h" asked again
+    within the same bucket hits the cache; results are at most one bucket stale.
+    """
+    bucket = max(1, bucket_seconds)
+    material = json.dumps({
+        'query': normalize_query(query),
+        'log_groups': sorted(set(log_groups)),
+        'start': start_time // bucket,
+        'end': end_time // bucket,
+        'bucket': bucket,
+        'options': options,
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class InsightsResultCache:
+    """Insights results cached in an in-container LRU and, optionally, a shared DynamoDB table.
+
+    The LRU serves repeats within one container; the DynamoDB tier (table with partition key
+    cache_key and TTL on expires_at) lets every container reuse a result instead of paying
+    for the bytes scanned again.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, max_entries: int = DEFAULT_CACHE_SIZE,
+                 ttl_seconds: int = DEFAULT_CACHE_TTL, max_item_bytes: int = MAX_SHARED_ITEM_BYTES):
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_item_bytes = max_item_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._table = None
+
+    @property
+    def table(self):
+        # Created on first use to keep the DynamoDB resource off the cold-start path
+        if self._table is None and self.table_name:
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            {'value', 'stored_at', 'tier'} or None. tier is 'memory' or 'dynamodb'.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return {'value': value, 'stored_at': stored_at, 'tier': 'memory'}
+                del self._entries[key]
+
+        if self.table is None:
+            return None
+
+        try:
+            item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        except Exception as e:
+            print(f"Insights cache read failed: {e}")
+            return None
+
+        # DynamoDB TTL deletion is lazy, so check expiry here as well
+        if not item or int(item.get('expires_at', 0)) <= now:
+            return None
+
+        stored_at = float(item['stored_at'])
+        value = json.loads(gzip.decompress(item['payload'].value).decode('utf-8'))
+        self._remember(key, stored_at, value)
+        return {'value': value, 'stored_at': stored_at, 'tier': 'dynamodb'}
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up several keys at once (BatchGetItem for the keys not held in memory).
+
+        Returns:
+            {key: {'value', 'stored_at', 'tier'}} for the keys found
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    found[key] = {'value': entry[1], 'stored_at': entry[0], 'tier': 'memory'}
+                else:
+                    missing.append(key)
+
+        if not missing or self.table is None:
+            return found
+
+        dynamodb = self.table.meta.client
+        for offset in range(0, len(missing), 100):  # BatchGetItem takes at most 100 keys
+            request = {self.table_name: {'Keys': [{'cache_key': {'S': key}} for key in missing[offset:offset + 100]]}}
+            try:
+                while request:
+                    response = dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        if int(item['expires_at']['N']) <= now:
+                            continue
+                        key = item['cache_key']['S']
+                        stored_at = float(item['stored_at']['N'])
+                        value = json.loads(gzip.decompress(item['payload']['B']).decode('utf-8'))
+                        self._remember(key, stored_at, value)
+                        found[key] = {'value': value, 'stored_at': stored_at, 'tier': 'dynamodb'}
+                    request = response.get('UnprocessedKeys') or None
+                    if request:
+                        time.sleep(0.1)  # Unprocessed keys mean the table is throttling
+            except Exception as e:
+                print(f"Insights cache batch read failed: {e}")
+        return found
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result in both tiers; results too large for a DynamoDB item stay in memory only"""
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+
+        if self.table is None:
+            return
+
+        payload = gzip.compress(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        if len(payload) > self.max_item_bytes:
+            print(f"Insights cache: result too large for shared tier ({len(payload)} bytes)")
+            return
+
+        try:
+            self.table.put_item(Item={
+                'cache_key': key,
+                'payload': payload,
+                'stored_at': Decimal(str(round(stored_at, 3))),
+                'expires_at': int(stored_at + self.ttl_seconds)
+            })
+        except Exception as e:
+            print(f"Insights cache write failed: {e}")
+
+    def put_many(self, values: Dict[str, Dict[str, Any]]) -> None:
+        """Store several results, batching the shared-tier writes"""
+        stored_at = time.time()
+        for key, value in values.items():
+            self._remember(key, stored_at, value)
+
+        if self.table is None or not values:
+            return
+
+        try:
+            with self.table.batch_writer() as batch:
+                for key, value in values.items():
+                    payload = gzip.compress(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+                    if len(payload) > self.max_item_bytes:
+                        continue
+                    batch.put_item(Item={
+                        'cache_key': key,
+                        'payload': payload,
+                        'stored_at': Decimal(str(round(stored_at, 3))),
+                        'expires_at': int(stored_at + self.ttl_seconds)
+                    })
+        except Exception as e:
+            print(f"Insights cache batch write failed: {e}")
+
+    def _remember(self, key: str, stored_at: float, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
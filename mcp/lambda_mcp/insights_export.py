@@ -0,0 +1,83 @@
+"""
+Export of full Logs Insights result sets to S3 as gzip-compressed JSONL
+"""
+import gzip
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+DEFAULT_EXPORT_BUCKET = os.environ.get(
+    'INSIGHTS_EXPORT_BUCKET',
+    os.environ.get('DIAGRAM_BUCKET', f'wga-diagrambucket-{os.environ.get("ENV", "dev")}')
+)
+
+# Presigned URLs for exported results stay valid for 24 hours (same as diagrams)
+DEFAULT_URL_EXPIRES = 86400
+
+# Compressed bytes kept in memory before the spool file moves to /tmp
+SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
+
+class ResultExporter:
+    """Writes result rows one at a time to a gzip JSONL spool and uploads it to S3.
+
+    Rows are compressed as they are written, so only the compressed output is held
+    (in memory up to SPOOL_MEMORY_BYTES, then in a temp file) rather than the rows.
+    """
+
+    def __init__(self, s3_client, bucket: str = DEFAULT_EXPORT_BUCKET, prefix: str = 'insights-results'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.rows = 0
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        self._gzip = gzip.GzipFile(fileobj=self._spool, mode='wb')
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._gzip.write(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+        self._gzip.write(b'\n')
+        self.rows += 1
+
+    def upload(self, name: str = None, expires_in: int = DEFAULT_URL_EXPIRES) -> Dict[str, Any]:
+        """
+        Finish the spool, upload it and return a presigned download URL.
+
+        Returns:
+            {'bucket', 's3_key', 'url', 'rows', 'bytes', 'expires_in'}
+        """
+        self._gzip.close()
+        size = self._spool.tell()
+        self._spool.seek(0)
+
+        s3_key = f'{self.prefix}/{datetime.utcnow().strftime("%Y/%m/%d")}/{name or uuid.uuid4().hex}.jsonl.gz'
+        try:
+            self.s3_client.upload_fileobj(
+                self._spool,
+                self.bucket,
+                s3_key,
+                ExtraArgs={'ContentType': 'application/gzip'}
+            )
+        finally:
+            self._spool.close()
+
+        url = self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': s3_key},
+            ExpiresIn=expires_in
+        )
+        return {
+            'bucket': self.bucket,
+            's3_key': s3_key,
+            'url': url,
+            'rows': self.rows,
+            'bytes': size,
+            'expires_in': expires_in
+        }
+
+    def discard(self) -> None:
+        """Drop the spool without uploading"""
+        self._gzip.close()
+        self._spool.close()
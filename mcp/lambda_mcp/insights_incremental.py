@@ -0,0 +1,176 @@
+"""
+Incremental evaluation of binned Logs Insights aggregations over sliding windows
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .insights_cache import InsightsResultCache, normalize_query
+from .insights_merge import InsightsQueryPlan, merge_shard_rows, rows_to_dicts
+from .insights_query import DEFAULT_QUERY_TIMEOUT, InsightsQueryManager
+
+# Span of one stored chunk of closed bins; must be a multiple of the query's bin size
+DEFAULT_CHUNK_SECONDS = int(os.environ.get('INSIGHTS_INCREMENTAL_CHUNK_SECONDS', '3600'))
+
+# Bins ending less than this long ago may still receive late-ingested events
+DEFAULT_CLOSED_LAG_SECONDS = int(os.environ.get('INSIGHTS_INCREMENTAL_LAG_SECONDS', '600'))
+
+# Longest run of missing chunks fetched by one query, so a run stays under the row limit
+MAX_CHUNKS_PER_QUERY = 24
+
+# Maximum rows get_query_results returns; a segment hitting it may be truncated
+MAX_QUERY_ROWS = 10000
+
+_BIN = re.compile(r'^bin\((\d+)([smhd])\)$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def bin_field(plan: InsightsQueryPlan) -> Optional[Tuple[str, int]]:
+    """Return (field name, bin seconds) of the query's bin() group key, if any"""
+    for field in plan.group_fields:
+        match = _BIN.match(field.replace(' ', ''))
+        if match:
+            return field, int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    return None
+
+
+def parse_bin_timestamp(value: str) -> Optional[int]:
+    """Epoch seconds of an Insights bin value such as '2024-01-01 10:05:00.000' (UTC)"""
+    try:
+        parsed = datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+class IncrementalInsightsEvaluator:
+    """Answers `stats ... by bin(...)` queries from stored per-chunk aggregates plus fresh queries.
+
+    The range is cut on chunk boundaries:
+
+        [start, head_end)        partial first chunk          always queried
+        [head_end, closed_end)   whole, closed chunks          read from the store; missing
+                                                               runs are queried and stored
+        [closed_end, end]        open tail (incl. late data)   always queried, never stored
+
+    Chunk boundaries are multiples of the bin size, so no bin straddles two segments and the
+    per-segment rows can be combined with the regular shard merge.
+    """
+
+    def __init__(self, query_manager: InsightsQueryManager, store: InsightsResultCache,
+                 chunk_seconds: int = DEFAULT_CHUNK_SECONDS,
+                 closed_lag_seconds: int = DEFAULT_CLOSED_LAG_SECONDS):
+        self.query_manager = query_manager
+        self.store = store
+        self.chunk_seconds = chunk_seconds
+        self.closed_lag_seconds = closed_lag_seconds
+
+    def supports(self, plan: InsightsQueryPlan) -> bool:
+        """Mergeable aggregations grouped by a bin that evenly divides the chunk size"""
+        if not (plan.is_aggregation and plan.mergeable):
+            return False
+        binned = bin_field(plan)
+        return bool(binned) and self.chunk_seconds % binned[1] == 0
+
+    def _series_key(self, plan: InsightsQueryPlan, log_groups: List[str]) -> str:
+        material = json.dumps({'query': normalize_query(plan.shard_query()),
+                               'log_groups': sorted(set(log_groups))}, sort_keys=True)
+        return 'bins#' + hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _closed_segment(self, run: List[int]) -> Dict[str, Any]:
+        return {'start_time': run[0], 'end_time': run[-1] + self.chunk_seconds - 1,
+                'kind': 'closed', 'store': True, 'chunks': list(run)}
+
+    def evaluate(self, plan: InsightsQueryPlan, log_groups: List[str], start_time: int, end_time: int,
+                 max_results: Optional[int] = None, now: Optional[float] = None,
+                 timeout: float = DEFAULT_QUERY_TIMEOUT) -> Dict[str, Any]:
+        """
+        Evaluate the query over [start_time, end_time] (epoch seconds, inclusive).
+        Segments still running after timeout seconds are stopped and reported as failed.
+
+        Returns:
+            {'status', 'rows', 'statistics', 'segments', 'chunks_total', 'chunks_cached'}
+        """
+        chunk = self.chunk_seconds
+        bin_name, _ = bin_field(plan)
+        now = time.time() if now is None else now
+
+        head_end = min(-(-start_time // chunk) * chunk, end_time + 1)
+        closed_end = max(head_end, min((int(now) - self.closed_lag_seconds) // chunk * chunk,
+                                       (end_time + 1) // chunk * chunk))
+
+        chunk_starts = list(range(head_end, closed_end, chunk))
+        series = self._series_key(plan, log_groups)
+        keys = {chunk_start: f'{series}#{chunk_start}' for chunk_start in chunk_starts}
+        stored = self.store.get_many(list(keys.values())) if keys else {}
+
+        # Segments to query: head, runs of missing chunks, tail (inclusive end times)
+        segments = []
+        if start_time < head_end:
+            segments.append({'start_time': start_time, 'end_time': head_end - 1, 'kind': 'head', 'store': False})
+
+        run: List[int] = []
+        for chunk_start in chunk_starts:
+            if keys[chunk_start] not in stored:
+                run.append(chunk_start)
+            if run and (keys[chunk_start] in stored or len(run) == MAX_CHUNKS_PER_QUERY):
+                segments.append(self._closed_segment(run))
+                run = []
+        if run:
+            segments.append(self._closed_segment(run))
+
+        if closed_end <= end_time:
+            segments.append({'start_time': closed_end, 'end_time': end_time, 'kind': 'tail', 'store': False})
+
+        shards = [{'log_groups': log_groups, **segment} for segment in segments]
+        responses = self.query_manager.run_shards(shards, plan.shard_query(), limit=MAX_QUERY_ROWS,
+                                               timeout=timeout) if shards else []
+
+        shard_rows = [stored[key]['value']['rows'] for key in keys.values() if key in stored]
+        statistics = {'recordsMatched': 0, 'recordsScanned': 0, 'bytesScanned': 0}
+        reports = []
+        failed = False
+
+        for segment, response in zip(segments, responses):
+            response_statistics = response.get('statistics', {})
+            for name in statistics:
+                statistics[name] += response_statistics.get(name, 0)
+            reports.append({
+                'start': datetime.utcfromtimestamp(segment['start_time']).isoformat(),
+                'end': datetime.utcfromtimestamp(segment['end_time']).isoformat(),
+                'kind': segment['kind'],
+                'status': response['status'],
+                'bytes_scanned': response_statistics.get('bytesScanned', 0)
+            })
+            if response['status'] != 'Complete':
+                failed = True
+                continue
+
+            rows = rows_to_dicts(response.get('results', []))
+            shard_rows.append(rows)
+
+            # Store the closed chunks of this segment unless the result may have been truncated
+            if segment['store'] and len(rows) < MAX_QUERY_ROWS:
+                by_chunk: Dict[int, List[Dict[str, str]]] = {chunk_start: [] for chunk_start in segment['chunks']}
+                for row in rows:
+                    bin_start = parse_bin_timestamp(row.get(bin_name, ''))
+                    if bin_start is not None:
+                        chunk_start = bin_start - (bin_start - head_end) % chunk
+                        if chunk_start in by_chunk:
+                            by_chunk[chunk_start].append(row)
+                # Empty chunks are stored too, so quiet hours are not queried again
+                self.store.put_many({keys[chunk_start]: {'rows': chunk_rows}
+                                     for chunk_start, chunk_rows in by_chunk.items()})
+
+        return {
+            'status': 'partial' if failed else 'success',
+            'rows': merge_shard_rows(plan, shard_rows, limit=max_results),
+            'statistics': statistics,
+            'segments': reports,
+            'chunks_total': len(chunk_starts),
+            'chunks_cached': len(stored)
+        }
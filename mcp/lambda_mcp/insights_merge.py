@@ -0,0 +1,258 @@
+"""
+Merging Logs Insights results computed over several shards (time slices / log-group batches)
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Aggregations whose shard results can be combined exactly
+MERGEABLE_FUNCTIONS = frozenset({'count', 'sum', 'min', 'max', 'avg'})
+
+HIDDEN_PREFIX = '__shard_'
+
+_CALL = re.compile(r'^\s*([A-Za-z_]+)\s*\((.*)\)\s*$', re.S)
+_ALIAS = re.compile(r'^(.*?)\s+as\s+([\w@.]+)\s*$', re.S | re.I)
+_BIN_FIELD = re.compile(r'^bin\(\s*\d+\s*[a-z]+\s*\)$', re.I)
+
+# A / starts a regex literal only after these tokens; anywhere else it is division
+_REGEX_START = re.compile(r'(?:\blike|=~|[(,])\s*$', re.I)
+
+
+def _scan_top_level(text: str, separator: str) -> Tuple[List[str], bool]:
+    """Split on a separator outside parentheses, quotes and /regex/ literals.
+
+    Returns the parts and whether every quote and regex literal was closed.
+    """
+    parts, current, depth, quote, escaped = [], [], 0, None, False
+    for ch in text:
+        if quote:
+            current.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in ('"', "'", '`') or (ch == '/' and _REGEX_START.search(''.join(current))):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append(''.join(current))
+    return parts, quote is None and depth == 0
+
+
+def split_top_level(text: str, separator: str) -> List[str]:
+    """Split on a separator outside parentheses, quotes and /regex/ literals"""
+    return _scan_top_level(text, separator)[0]
+
+
+def _field_name(expression: str) -> Tuple[str, str]:
+    """Return (expression, result field name) for an `expr [as alias]` item"""
+    expression = ' '.join(expression.split())
+    match = _ALIAS.match(expression)
+    if match:
+        return match.group(1).strip(), match.group(2)
+    return expression, expression
+
+
+class InsightsQueryPlan:
+    """Parsed view of a query used to rewrite it for shards and to merge shard results"""
+
+    def __init__(self, query: str):
+        self.query = query
+        segments, balanced = _scan_top_level(query, '|')
+        self.commands = [segment.strip() for segment in segments if segment.strip()]
+        self.stats_index: Optional[int] = None
+        self.aggregates: List[Dict[str, Any]] = []
+        self.group_fields: List[str] = []
+        self.sort: Optional[Tuple[str, bool]] = None
+        self.limit: Optional[int] = None
+        # An unterminated quote/regex or unbalanced parentheses means the commands may be
+        # split wrongly, so such queries are never sharded
+        self.mergeable = balanced
+
+        stats_indexes = [i for i, command in enumerate(self.commands) if command.lower().startswith('stats ')]
+        if len(stats_indexes) > 1:
+            # Multi-stage stats cannot be recombined from shard outputs
+            self.stats_index = stats_indexes[0]
+            self.mergeable = False
+        elif stats_indexes:
+            self.stats_index = stats_indexes[0]
+            self._parse_stats(self.commands[self.stats_index][len('stats '):])
+            # Commands after stats other than sort/limit (e.g. a filter on an aggregate)
+            # would be evaluated per shard, not on the merged result
+            if any(not command.lower().startswith(('sort ', 'limit '))
+                   for command in self.commands[self.stats_index + 1:]):
+                self.mergeable = False
+
+        for command in self.commands[(self.stats_index or 0):]:
+            lowered = command.lower()
+            if lowered.startswith('sort '):
+                tokens = command.split()
+                self.sort = (tokens[1].rstrip(','), len(tokens) < 3 or tokens[2].lower() != 'asc')
+            elif lowered.startswith('limit '):
+                try:
+                    self.limit = int(command.split()[1])
+                except (IndexError, ValueError):
+                    pass
+
+    def _parse_stats(self, body: str) -> None:
+        by_split = re.split(r'\s+by\s+', body, maxsplit=1, flags=re.I)
+        aggregations = by_split[0]
+        if len(by_split) > 1:
+            self.group_fields = [_field_name(key)[1] for key in split_top_level(by_split[1], ',') if key.strip()]
+
+        for index, item in enumerate(split_top_level(aggregations, ',')):
+            expression, field = _field_name(item)
+            match = _CALL.match(expression)
+            function = match.group(1).lower() if match else None
+            if function not in MERGEABLE_FUNCTIONS:
+                self.mergeable = False
+                return
+            aggregate = {'function': function, 'field': field, 'argument': match.group(2).strip()}
+            if function == 'avg':
+                # Averages are rebuilt from per-shard sum and count
+                aggregate['sum_field'] = f'{HIDDEN_PREFIX}sum_{index}'
+                aggregate['count_field'] = f'{HIDDEN_PREFIX}count_{index}'
+            self.aggregates.append(aggregate)
+
+    @property
+    def is_aggregation(self) -> bool:
+        return self.stats_index is not None
+
+    @property
+    def bin_group_field(self) -> Optional[str]:
+        """The bin(...) group key, which holds each row's time bucket after stats"""
+        for field in self.group_fields:
+            if _BIN_FIELD.match(field):
+                return field
+        return None
+
+    def shard_query(self) -> str:
+        """Query to run on each shard: avg gets hidden sum/count, post-stats sort/limit are applied after merging"""
+        if not self.is_aggregation or not self.mergeable:
+            return self.query
+
+        commands = list(self.commands[:self.stats_index + 1])
+        extra = []
+        for aggregate in self.aggregates:
+            if aggregate['function'] == 'avg':
+                extra.append(f"sum({aggregate['argument']}) as {aggregate['sum_field']}")
+                extra.append(f"count({aggregate['argument']}) as {aggregate['count_field']}")
+        if extra:
+            body = commands[-1][len('stats '):]
+            by_split = re.split(r'(\s+by\s+)', body, maxsplit=1, flags=re.I)
+            by_split[0] = by_split[0].rstrip() + ', ' + ', '.join(extra)
+            commands[-1] = 'stats ' + ''.join(by_split)
+        return '\n| '.join(commands)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    number = _number(value)
+    return (0, number) if number is not None else (1, str(value))
+
+
+def rows_to_dicts(results: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    return [{field['field']: field.get('value', '') for field in row if field.get('field')} for row in results]
+
+
+def iter_result_rows(results: Iterable[List[Dict[str, str]]]) -> Iterator[Dict[str, str]]:
+    """Yield get_query_results rows as dicts one at a time, skipping empty rows"""
+    for row in results:
+        converted = {field['field']: field.get('value', '') for field in row if field.get('field')}
+        if converted:
+            yield converted
+
+
+def dicts_to_rows(rows: List[Dict[str, Any]]) -> List[List[Dict[str, str]]]:
+    return [[{'field': name, 'value': value} for name, value in row.items()] for row in rows]
+
+
+def merge_shard_rows(plan: InsightsQueryPlan, shard_rows: List[List[Dict[str, str]]],
+                     limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Combine per-shard result rows into the rows a single query over all shards would return.
+
+    Aggregations are regrouped by their `by` keys: counts and sums are added, min/max are
+    compared and averages are recomputed from the hidden per-shard sum and count. Raw rows
+    are concatenated. The query's sort and limit are then applied to the merged rows.
+    """
+    if plan.is_aggregation and plan.mergeable:
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        for rows in shard_rows:
+            for row in rows:
+                key = tuple(row.get(field, '') for field in plan.group_fields)
+                merged = groups.get(key)
+                if merged is None:
+                    merged = groups[key] = {field: row.get(field, '') for field in plan.group_fields}
+                for aggregate in plan.aggregates:
+                    function = aggregate['function']
+                    if function == 'avg':
+                        for hidden in (aggregate['sum_field'], aggregate['count_field']):
+                            merged[hidden] = merged.get(hidden, 0.0) + (_number(row.get(hidden)) or 0.0)
+                        continue
+                    value = _number(row.get(aggregate['field']))
+                    if value is None:
+                        continue
+                    current = merged.get(aggregate['field'])
+                    if current is None:
+                        merged[aggregate['field']] = value
+                    elif function in ('count', 'sum'):
+                        merged[aggregate['field']] = current + value
+                    elif function == 'min':
+                        merged[aggregate['field']] = min(current, value)
+                    else:
+                        merged[aggregate['field']] = max(current, value)
+
+        merged_rows = []
+        for merged in groups.values():
+            row = {field: merged[field] for field in plan.group_fields}
+            for aggregate in plan.aggregates:
+                if aggregate['function'] == 'avg':
+                    count = merged.get(aggregate['count_field'], 0.0)
+                    if count:
+                        row[aggregate['field']] = _format_number(merged[aggregate['sum_field']] / count)
+                elif aggregate['field'] in merged:
+                    row[aggregate['field']] = _format_number(merged[aggregate['field']])
+            merged_rows.append(row)
+    else:
+        merged_rows = [row for rows in shard_rows for row in rows]
+
+    sort = plan.sort
+    bin_field = plan.bin_group_field if plan.is_aggregation else None
+    if sort and merged_rows and sort[0] not in merged_rows[0]:
+        field, descending = sort
+        if f'{field}()' in merged_rows[0]:
+            sort = (f'{field}()', descending)  # `sort count desc` refers to the count() column
+        elif field == '@timestamp' and bin_field:
+            sort = (bin_field, descending)  # after stats, @timestamp is the bin(...) bucket
+        else:
+            sort = None
+    if not sort and bin_field:
+        sort = (bin_field, True)  # newest bins first, so the limit keeps the most recent data
+    if sort and merged_rows:
+        field, descending = sort
+        merged_rows.sort(key=lambda row: _sort_key(row.get(field, '')), reverse=descending)
+
+    limits = [value for value in (plan.limit, limit) if value]
+    if limits:
+        merged_rows = merged_rows[:min(limits)]
+    return merged_rows
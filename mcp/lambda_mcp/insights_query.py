@@ -0,0 +1,218 @@
+"""
+CloudWatch Logs Insights query manager with adaptive polling
+"""
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .logs_fetch import AdaptiveConcurrencyLimiter, is_throttling_error
+
+# Terminal statuses reported by get_query_results
+TERMINAL_STATUSES = frozenset({'Complete', 'Failed', 'Cancelled', 'Timeout', 'Unknown'})
+
+# Longest a tool call waits for queries; kept below the MCP Lambda timeout (180s) and the
+# LLM client's read timeout (170s) so the timeout handling runs before the function is killed
+DEFAULT_QUERY_TIMEOUT = float(os.environ.get('INSIGHTS_QUERY_TIMEOUT', '150'))
+
+# Time left for building and returning the response after the query deadline
+QUERY_DEADLINE_MARGIN = float(os.environ.get('INSIGHTS_QUERY_DEADLINE_MARGIN', '20'))
+
+# Logs Insights accepts at most 50 log groups per query
+MAX_LOG_GROUPS_PER_QUERY = 50
+
+# Concurrent queries this tool may run; the account quota (30 by default) is shared with other callers
+DEFAULT_MAX_CONCURRENT_QUERIES = int(os.environ.get('INSIGHTS_MAX_CONCURRENT_QUERIES', '10'))
+
+# Time span of one shard when a long range is split
+DEFAULT_SLICE_SECONDS = int(float(os.environ.get('INSIGHTS_SLICE_HOURS', '24')) * 3600)
+
+
+def query_time_budget(context=None, timeout: float = DEFAULT_QUERY_TIMEOUT,
+                      margin: float = QUERY_DEADLINE_MARGIN) -> float:
+    """
+    Seconds a tool call may spend waiting for queries.
+
+    Args:
+        context: Lambda context of the current invocation; its remaining time minus the
+            margin caps the timeout
+    """
+    if context is None:
+        return timeout
+    return max(0.0, min(timeout, context.get_remaining_time_in_millis() / 1000 - margin))
+
+
+def plan_shards(log_groups: List[str], start_time: int, end_time: int,
+                slice_seconds: Optional[int] = DEFAULT_SLICE_SECONDS,
+                max_groups_per_query: int = MAX_LOG_GROUPS_PER_QUERY) -> List[Dict[str, Any]]:
+    """
+    Split a query range into log-group batches x time slices.
+
+    Args:
+        slice_seconds: Slice length, or None to keep the whole range in one slice
+            (for queries whose results cannot be merged across time)
+
+    Returns:
+        [{log_groups, start_time, end_time}], times in epoch seconds
+    """
+    batches = [log_groups[i:i + max_groups_per_query] for i in range(0, len(log_groups), max_groups_per_query)]
+
+    windows = [(start_time, end_time)]
+    if slice_seconds and end_time - start_time > slice_seconds:
+        count = math.ceil((end_time - start_time) / slice_seconds)
+        # Slices are contiguous and non-overlapping (Insights end times are inclusive)
+        windows = []
+        for i in range(count):
+            window_start = start_time + i * slice_seconds
+            window_end = min(end_time, window_start + slice_seconds)
+            windows.append((window_start, window_end if i == count - 1 else window_end - 1))
+
+    return [{'log_groups': batch, 'start_time': window_start, 'end_time': window_end}
+            for batch in batches for window_start, window_end in windows]
+
+
+class InsightsQueryManager:
+    """Starts Logs Insights queries and polls them with exponentially growing intervals.
+
+    Short queries finish within the first few sub-second polls, while long scans are
+    polled less often so they do not burn GetQueryResults quota. Queries that run past
+    the timeout are stopped with stop_query instead of being left running (and billed).
+    """
+
+    def __init__(self, logs_client, limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 initial_interval: float = 0.5, max_interval: float = 5.0, backoff: float = 1.5):
+        self.logs_client = logs_client
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def start(self, log_groups: List[str], start_time: int, end_time: int, query: str,
+              limit: Optional[int] = None) -> str:
+        """Start a query and return its query ID (times are epoch seconds)"""
+        kwargs = {
+            'logGroupNames': log_groups,
+            'startTime': start_time,
+            'endTime': end_time,
+            'queryString': query,
+        }
+        if limit:
+            kwargs['limit'] = limit
+        return self.limiter.call(self.logs_client.start_query, **kwargs)['queryId']
+
+    def poll(self, query_id: str) -> Dict[str, Any]:
+        """Fetch the current status (and results, once complete) of a query"""
+        return self.limiter.call(self.logs_client.get_query_results, queryId=query_id)
+
+    def stop(self, query_id: str) -> bool:
+        """Stop a running query; returns False if it had already finished"""
+        try:
+            return bool(self.limiter.call(self.logs_client.stop_query, queryId=query_id).get('success'))
+        except Exception as e:
+            print(f"stop_query failed for {query_id}: {e}")
+            return False
+
+    def wait(self, query_id: str, timeout: float = DEFAULT_QUERY_TIMEOUT,
+             stop_on_timeout: bool = True) -> Dict[str, Any]:
+        """
+        Poll until the query reaches a terminal status or the timeout expires.
+
+        Args:
+            stop_on_timeout: Stop the query on timeout; pass False when the caller hands the
+                query ID back to the client to poll later
+
+        Returns:
+            The last get_query_results response. On timeout the response status is set to
+            'Timeout' (the query is stopped only if stop_on_timeout is set).
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.initial_interval
+
+        while True:
+            response = self.poll(query_id)
+            if response.get('status') in TERMINAL_STATUSES:
+                return response
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if stop_on_timeout:
+                    self.stop(query_id)
+                return {**response, 'status': 'Timeout'}
+
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+    def run_shards(self, shards: List[Dict[str, Any]], query: str, limit: Optional[int] = None,
+                   timeout: float = DEFAULT_QUERY_TIMEOUT,
+                   max_concurrent: int = DEFAULT_MAX_CONCURRENT_QUERIES) -> List[Dict[str, Any]]:
+        """
+        Run one query per shard with at most max_concurrent queries in flight.
+
+        All running queries are polled from this thread with the same adaptive interval, and
+        queued shards start as slots free up. When the account's concurrent-query quota is
+        exhausted (LimitExceededException) the shard waits for a running query to finish.
+
+        Returns:
+            get_query_results responses in shard order, each with 'query_id' added. Shards
+            that failed to start or whose results could not be fetched carry status 'Failed'
+            and an 'error' message; shards cut off by the timeout are stopped and carry
+            status 'Timeout'. Queries still running when an exception escapes are stopped.
+        """
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(shards)
+        pending = deque(range(len(shards)))
+        running: Dict[str, int] = {}
+        deadline = time.monotonic() + timeout
+        interval = self.initial_interval
+
+        try:
+            while pending or running:
+                while pending and len(running) < max_concurrent:
+                    index = pending[0]
+                    shard = shards[index]
+                    try:
+                        query_id = self.start(shard['log_groups'], shard['start_time'], shard['end_time'], query, limit)
+                    except Exception as e:
+                        if is_throttling_error(e) and running:
+                            break  # Quota is full; retry once a running query completes
+                        pending.popleft()
+                        responses[index] = {'status': 'Failed', 'error': str(e)}
+                        continue
+                    pending.popleft()
+                    running[query_id] = index
+
+                for query_id, index in list(running.items()):
+                    try:
+                        response = self.poll(query_id)
+                    except Exception as e:
+                        # Poll still failing after the limiter's retries (throttling, expired or unknown ID)
+                        self.stop(query_id)
+                        responses[index] = {'status': 'Failed', 'error': str(e), 'query_id': query_id}
+                        del running[query_id]
+                        continue
+                    if response.get('status') in TERMINAL_STATUSES:
+                        responses[index] = {**response, 'query_id': query_id}
+                        del running[query_id]
+                        interval = self.initial_interval
+
+                if not running and not pending:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    for query_id, index in list(running.items()):
+                        self.stop(query_id)
+                        responses[index] = {'status': 'Timeout', 'query_id': query_id}
+                        del running[query_id]
+                    for index in pending:
+                        responses[index] = {'status': 'Timeout', 'error': 'Not started before the timeout'}
+                    break
+
+                time.sleep(min(interval, remaining))
+                interval = min(interval * self.backoff, self.max_interval)
+        finally:
+            # Never leave queries running (and billed) when an exception escapes the loop
+            for query_id in running:
+                self.stop(query_id)
+
+        return responses
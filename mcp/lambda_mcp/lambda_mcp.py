@@ -8,7 +8,8 @@ from .mcp_types import (
     TextContent,
     ErrorContent
 )
-from .session import SessionManager
+from .session import SessionManager, SessionTokenSigner
+from .output_format import OUTPUT_FORMATS, serialize_tool_result
 import json
 import logging
 from typing import Optional, Any, Dict, Callable, get_type_hints, List, TypeVar, Generic
@@ -20,6 +21,12 @@ logger = logging.getLogger(__name__)
 
 # Context variable to store current session ID
 current_session_id: ContextVar[Optional[str]] = ContextVar('current_session_id', default=None)
+# Verified claims of the current signed session token (stateless mode only)
+current_session_claims: ContextVar[Optional[Dict[str, Any]]] = ContextVar('current_session_claims', default=None)
+# Whether the tool currently executing was registered with stateful=True
+current_tool_stateful: ContextVar[bool] = ContextVar('current_tool_stateful', default=False)
+# Lambda context of the request being handled (tools use it to stay within the remaining time)
+current_lambda_context: ContextVar[Optional[Any]] = ContextVar('current_lambda_context', default=None)
 
 T = TypeVar('T')
 
@@ -43,14 +50,43 @@ class SessionData(Generic[T]):
 class LambdaMCPServer:
     """A class to handle MCP protocol in AWS Lambda"""
     
-    def __init__(self, name: str, version: str = "1.0.0", session_table: str = "mcp_sessions"):
+    def __init__(self, name: str, version: str = "1.0.0", session_table: str = "mcp_sessions",
+                 session_cache_size: int = 1024, session_cache_ttl: int = 300,
+                 session_mode: str = "dynamodb", session_secret: Optional[str] = None,
+                 auto_create_session_table: bool = True):
+        """Initialize the server
+
+        Args:
+            name: Server name reported on initialize
+            version: Server version reported on initialize
+            session_table: DynamoDB table for sessions
+            session_cache_size: Per-container session cache size
+            session_cache_ttl: Per-container session cache TTL in seconds
+            session_mode: "dynamodb" (session row per initialize) or "stateless"
+                (HMAC-signed MCP-Session-Id validated locally; only stateful tools touch the table)
+            session_secret: HMAC secret shared by all containers, required for stateless mode
+            auto_create_session_table: Create the session table on first write if it does not exist
+        """
         self.name = name
         self.version = version
         self.tools: Dict[str, Dict] = {}
         self.tool_implementations: Dict[str, Callable] = {}
-        self.session_manager = SessionManager(table_name=session_table)
-        # Ensure session table exists
-        self.session_manager.create_table(table_name=session_table)
+        self.stateful_tools: set = set()
+        self.tool_output_formats: Dict[str, str] = {}
+        self.session_manager = SessionManager(
+            table_name=session_table,
+            cache_size=session_cache_size,
+            cache_ttl=session_cache_ttl,
+            auto_create_table=auto_create_session_table
+        )
+        self.token_signer: Optional[SessionTokenSigner] = None
+        if session_mode == "stateless":
+            if session_secret:
+                self.token_signer = SessionTokenSigner(session_secret)
+            else:
+                logger.warning("Stateless session mode requires a session secret; falling back to DynamoDB sessions")
+        # The session table is provisioned at deploy time (cloudformation/base.yaml). SessionManager
+        # only creates it lazily, once per container, if a write reports the table missing.
     
     def get_session(self) -> Optional[SessionData]:
         """Get the current session data wrapper.
@@ -61,6 +97,20 @@ class LambdaMCPServer:
         session_id = current_session_id.get()
         if not session_id:
             return None
+
+        claims = current_session_claims.get()
+        if claims is not None:
+            # Stateless mode: read-only tools get the token data with no DynamoDB I/O
+            if not current_tool_stateful.get():
+                return SessionData(dict(claims.get('data', {})))
+
+            # Stateful tools fall back to the table, seeded from the token on first use
+            data = self.session_manager.get_session(claims['sid'])
+            if data is None:
+                data = dict(claims.get('data', {}))
+                self.session_manager.create_session(data, session_id=claims['sid'], expires_at=claims['exp'])
+            return SessionData(data)
+
         data = self.session_manager.get_session(session_id)
         return SessionData(data) if data is not None else None
 
@@ -76,6 +126,15 @@ class LambdaMCPServer:
         session_id = current_session_id.get()
         if not session_id:
             return False
+
+        claims = current_session_claims.get()
+        if claims is not None:
+            if not current_tool_stateful.get():
+                logger.warning("Session writes in stateless mode require a tool registered with stateful=True")
+                return False
+            self.session_manager.create_session(data, session_id=claims['sid'], expires_at=claims['exp'])
+            return True
+
         return self.session_manager.update_session(session_id, data)
 
     def update_session(self, updater_func: Callable[[SessionData], None]) -> bool:
@@ -97,11 +156,20 @@ class LambdaMCPServer:
         # Save back to storage
         return self.set_session(session.raw())
 
-    def tool(self):
+    def tool(self, stateful: bool = False, output_format: str = "json"):
         """Decorator to register a function as an MCP tool.
         
         Uses function name, docstring, and type hints to generate the MCP tool schema.
+
+        Args:
+            stateful: Whether the tool reads/writes server-side session state. In stateless
+                session mode only these tools touch the DynamoDB session table.
+            output_format: How the result is serialized for the client: "json", or
+                "columnar" to send lists of records as {"columns": [...], "rows": [[...]]}
         """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+
         def decorator(func: Callable):
             # Get function name and convert to camelCase for tool name
             func_name = func.__name__
@@ -165,6 +233,9 @@ class LambdaMCPServer:
             # Register the tool
             self.tools[tool_name] = tool_schema
             self.tool_implementations[tool_name] = func
+            if stateful:
+                self.stateful_tools.add(tool_name)
+            self.tool_output_formats[tool_name] = output_format
             
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
@@ -235,6 +306,8 @@ class LambdaMCPServer:
             # Get session ID from headers
             session_id = headers.get("mcp-session-id")
             
+            current_lambda_context.set(context)
+
             # Set current session ID in context
             if session_id:
                 current_session_id.set(session_id)
@@ -245,7 +318,15 @@ class LambdaMCPServer:
             if event.get("httpMethod") == "DELETE":
                 if not session_id:
                     return {"statusCode": 400, "body": "Missing session ID"}
-                    
+
+                if self.token_signer:
+                    # Signed tokens cannot be revoked; drop any server-side state kept for stateful tools
+                    claims = self.token_signer.verify(session_id)
+                    if claims is None:
+                        return {"statusCode": 404}
+                    self.session_manager.delete_session(claims['sid'])
+                    return {"statusCode": 204}
+
                 if self.session_manager.delete_session(session_id):
                     return {"statusCode": 204}
                 else:
@@ -283,8 +364,11 @@ class LambdaMCPServer:
             # Handle initialization request
             if request.method == "initialize":
                 logger.info("Handling initialize request")
-                # Create new session
-                session_id = self.session_manager.create_session()
+                # Create new session (a signed token in stateless mode, no DynamoDB write)
+                if self.token_signer:
+                    session_id = self.token_signer.issue()
+                else:
+                    session_id = self.session_manager.create_session()
                 current_session_id.set(session_id)
                 result = InitializeResult(
                     protocolVersion="2024-11-05",
@@ -294,8 +378,14 @@ class LambdaMCPServer:
                 return self._create_success_response(result.model_dump(), request.id, session_id)
             
             # For all other requests, validate session if provided
-            if session_id:
+            if session_id and self.token_signer:
+                claims = self.token_signer.verify(session_id)
+                if claims is None:
+                    return self._create_error_response(-32000, "Invalid or expired session", request.id, status_code=404)
+                current_session_claims.set(claims)
+            elif session_id:
                 session_data = self.session_manager.get_session(session_id)
+                logger.debug(f"Session cache stats: {self.session_manager.cache_stats()}")
                 if session_data is None:
                     return self._create_error_response(-32000, "Invalid or expired session", request.id, status_code=404)
             elif request.method != "initialize":
@@ -315,8 +405,10 @@ class LambdaMCPServer:
                     return self._create_error_response(-32601, f"Tool '{tool_name}' not found", request.id, session_id=session_id)
                 
                 try:
+                    current_tool_stateful.set(tool_name in self.stateful_tools)
                     result = self.tool_implementations[tool_name](**tool_args)
-                    content = [TextContent(text=str(result)).model_dump()]
+                    text = serialize_tool_result(result, self.tool_output_formats.get(tool_name, "json"))
+                    content = [TextContent(text=text).model_dump()]
                     return self._create_success_response({"content": content}, request.id, session_id)
                 except Exception as e:
                     logger.error(f"Error executing tool {tool_name}: {e}")
@@ -331,4 +423,7 @@ class LambdaMCPServer:
             return self._create_error_response(-32000, str(e), request_id, session_id=session_id)
         finally:
             # Clear session context
-            current_session_id.set(None) 
\ No newline at end of file
+            current_session_id.set(None)
+            current_session_claims.set(None)
+            current_tool_stateful.set(False)
+            current_lambda_context.set(None) 
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Drain-style log template mining
+
+Groups log messages that differ only in variable parts (request IDs, IPs,
+numbers, ...) into templates such as "END RequestId: <UUID>". Messages are
+routed through a fixed-depth prefix tree (token count, then the first few
+tokens), so each message is compared only with the handful of clusters in one
+leaf and mining stays O(n) over a stream of events.
+
+Reference: He et al., "Drain: An Online Log Parsing Approach with Fixed Depth Tree", ICWS 2017.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+WILDCARD = '<*>'
+HAS_DIGIT = re.compile(r'\d')
+
+# Masks applied before tokenizing; order matters (UUIDs contain digits, IPs contain numbers)
+MASKS = [
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<UUID>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d{1,5})?\b'), '<IP>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<HEX>'),
+    (re.compile(r'(?<![\w.])[-+]?\d+(?:\.\d+)?(?![\w.])'), '<NUM>'),
+]
+
+
+def mask_message(message: str) -> str:
+    """Replace UUIDs, IP addresses, hex values and numbers with placeholders"""
+    for pattern, placeholder in MASKS:
+        message = pattern.sub(placeholder, message)
+    return message
+
+
+class TokenMasker:
+    """Masks messages token by token, memoizing tokens since most repeat across messages.
+
+    None of the masks span whitespace, so masking each token gives the same result as
+    mask_message(message).split().
+    """
+
+    def __init__(self, max_cache_size: int = 50000):
+        self.max_cache_size = max_cache_size
+        self._cache: Dict[str, str] = {}
+
+    def tokens(self, message: str) -> List[str]:
+        tokens = message.split()
+        cache = self._cache
+        for index, token in enumerate(tokens):
+            masked = cache.get(token)
+            if masked is None:
+                masked = mask_message(token)
+                if len(cache) >= self.max_cache_size:
+                    cache.clear()
+                cache[token] = masked
+            tokens[index] = masked
+        return tokens
+
+
+class LogCluster:
+    """A template and the number of messages matched to it"""
+
+    __slots__ = ('tokens', 'count')
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.count = 0
+
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+
+    def similarity(self, tokens: List[str]) -> float:
+        """Share of positions where the template token equals the message token"""
+        same = 0
+        for template_token, token in zip(self.tokens, tokens):
+            if template_token == token:
+                same += 1
+        return same / len(tokens) if tokens else 1.0
+
+    def merge(self, tokens: List[str]) -> None:
+        """Turn positions that differ from the message into wildcards"""
+        for index, token in enumerate(tokens):
+            if self.tokens[index] != token:
+                self.tokens[index] = WILDCARD
+
+
+class TemplateMiner:
+    """Incremental Drain-like template miner with a fixed-depth prefix tree"""
+
+    def __init__(self, depth: int = 4, similarity_threshold: float = 0.4,
+                 max_children: int = 100, max_clusters: int = 1000):
+        """
+        Args:
+            depth: Tree depth including the token-count level (prefix tokens = depth - 2)
+            similarity_threshold: Minimum similarity for a message to join an existing cluster
+            max_children: Maximum distinct prefix tokens per node before falling back to a wildcard child
+            max_clusters: Cap on clusters kept; further unmatched messages are counted as unclustered
+        """
+        self.prefix_depth = max(1, depth - 2)
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.masker = TokenMasker()
+        self.root: Dict[int, Dict] = {}
+        self.clusters: List[LogCluster] = []
+        self.total = 0
+        self.unclustered = 0
+
+    def _leaf(self, tokens: List[str]) -> List[LogCluster]:
+        node = self.root.setdefault(len(tokens), {})
+        for token in tokens[:self.prefix_depth]:
+            # Tokens with digits are likely parameters; route them with the wildcard
+            if HAS_DIGIT.search(token):
+                token = WILDCARD
+            if token not in node:
+                token = token if len(node) < self.max_children else WILDCARD
+            node = node.setdefault(token, {})
+        return node.setdefault(None, [])
+
+    def add(self, message: str) -> Optional[LogCluster]:
+        """Match a message to a cluster, creating one if nothing is similar enough"""
+        self.total += 1
+        tokens = self.masker.tokens(message)
+        leaf = self._leaf(tokens)
+
+        best, best_similarity = None, -1.0
+        for cluster in leaf:
+            similarity = cluster.similarity(tokens)
+            if similarity > best_similarity:
+                best, best_similarity = cluster, similarity
+
+        if best is not None and best_similarity >= self.similarity_threshold:
+            best.merge(tokens)
+        elif len(self.clusters) < self.max_clusters:
+            best = LogCluster(tokens)
+            leaf.append(best)
+            self.clusters.append(best)
+        else:
+            self.unclustered += 1
+            return None
+
+        best.count += 1
+        return best
+
+    def top_templates(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most frequent templates with their message counts"""
+        top = sorted(self.clusters, key=lambda cluster: cluster.count, reverse=True)[:limit]
+        return [{"template": cluster.template, "count": cluster.count} for cluster in top]
@@ -0,0 +1,262 @@
+"""
+Concurrent CloudWatch Logs fetching with adaptive concurrency
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+# Error codes CloudWatch Logs returns when an account/API quota is exceeded
+THROTTLING_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'LimitExceededException',
+})
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get('LOGS_MAX_CONCURRENCY', '8'))
+
+# Largest page get_log_events / filter_log_events return per call
+MAX_EVENTS_PER_CALL = 10000
+
+# filter_log_events scans the stream a slice at a time and can return many empty pages
+# that still carry a nextToken when the pattern is sparse; bound the pages read per stream
+MAX_EMPTY_FILTER_PAGES = int(os.environ.get('LOGS_MAX_EMPTY_FILTER_PAGES', '5'))
+MAX_FILTER_PAGES_PER_STREAM = int(os.environ.get('LOGS_MAX_FILTER_PAGES_PER_STREAM', '50'))
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Return True if the exception is an AWS throttling error"""
+    return (isinstance(error, ClientError)
+            and error.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Bounds in-flight AWS calls and adapts the bound to throttling (AIMD).
+
+    The limit is halved on every throttled call and grows by one after a full
+    window of successful calls, never exceeding max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, min_concurrency: int = 1):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = self.max_concurrency
+        self.throttled = 0
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self._successes = 0
+                self.limit = max(self.min_concurrency, self.limit // 2)
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    def call(self, fn: Callable[..., Any], *args, max_attempts: int = 5, base_delay: float = 0.2, **kwargs) -> Any:
+        """Run an AWS call under the limiter, backing off and retrying when throttled"""
+        for attempt in range(max_attempts):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(throttled=throttled)
+                if not throttled or attempt == max_attempts - 1:
+                    raise
+                # Full jitter keeps retrying workers from hitting the quota in lockstep
+                time.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+                continue
+            self.release()
+            return result
+
+
+def merge_events_newest_first(stream_events: List[List[Dict[str, Any]]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lazy k-way merge of per-stream events into newest first, keyed on the integer epoch ms.
+
+    Each per-stream list is oldest first, as the API returns it. Yields (stream_index, event).
+    The heap holds one entry per stream, so consuming K items costs O(K + streams) memory.
+    """
+    iterators = [((index, event) for event in reversed(events)) for index, events in enumerate(stream_events)]
+    return heapq.merge(*iterators, key=lambda item: item[1]['timestamp'], reverse=True)
+
+
+def top_k_newest(stream_events: List[List[Dict[str, Any]]], k: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Return the k newest (stream_index, event) pairs across all streams"""
+    return list(itertools.islice(merge_events_newest_first(stream_events), k))
+
+
+def read_stream_events(
+        logs_client,
+        limiter: "AdaptiveConcurrencyLimiter",
+        log_group: str,
+        stream_name: str,
+        start_time_ms: int,
+        end_time_ms: int,
+        filter_pattern: str = "",
+        limit: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Read up to limit events of one stream in the time range, oldest first.
+
+    Uses filter_log_events when a pattern is given, otherwise get_log_events, which
+    returns the newest events and is paged backwards. Limits above one API page
+    (10,000 events) are served by following the pagination tokens. A filtered read
+    stops early after MAX_EMPTY_FILTER_PAGES consecutive empty pages or
+    MAX_FILTER_PAGES_PER_STREAM pages, returning the events matched so far.
+    """
+    if filter_pattern:
+        events: List[Dict[str, Any]] = []
+        kwargs = {}
+        empty_pages = 0
+        for _ in range(MAX_FILTER_PAGES_PER_STREAM):
+            if len(events) >= limit:
+                break
+            response = limiter.call(
+                logs_client.filter_log_events,
+                logGroupName=log_group,
+                logStreamNames=[stream_name],
+                startTime=start_time_ms,
+                endTime=end_time_ms,
+                filterPattern=filter_pattern,
+                limit=min(limit - len(events), MAX_EVENTS_PER_CALL),
+                **kwargs
+            )
+            page = response.get('events', [])
+            events.extend(page)
+            empty_pages = 0 if page else empty_pages + 1
+            if not response.get('nextToken') or empty_pages >= MAX_EMPTY_FILTER_PAGES:
+                break
+            kwargs['nextToken'] = response['nextToken']
+        return events[:limit]
+
+    pages: List[List[Dict[str, Any]]] = []
+    fetched = 0
+    kwargs = {}
+    while fetched < limit:
+        response = limiter.call(
+            logs_client.get_log_events,
+            logGroupName=log_group,
+            logStreamName=stream_name,
+            startTime=start_time_ms,
+            endTime=end_time_ms,
+            limit=min(limit - fetched, MAX_EVENTS_PER_CALL),
+            **kwargs
+        )
+        page = response.get('events', [])
+        token = response.get('nextBackwardToken')
+        if not page:
+            break
+        pages.append(page)
+        fetched += len(page)
+        # The backward token repeats once the start of the range is reached
+        if not token or token == kwargs.get('nextToken'):
+            break
+        kwargs['nextToken'] = token
+
+    # Pages were read newest first; each page is oldest first
+    return [event for page in reversed(pages) for event in page]
+
+
+def fetch_stream_events(
+        logs_client,
+        log_group: str,
+        stream_names: List[str],
+        start_time_ms: int,
+        end_time_ms: int,
+        filter_pattern: str = "",
+        events_per_stream: int = 100,
+        limiter: Optional["AdaptiveConcurrencyLimiter"] = None
+) -> List[List[Dict[str, Any]]]:
+    """Read several streams of one log group concurrently; results follow stream_names order"""
+    limiter = limiter or AdaptiveConcurrencyLimiter()
+    with ThreadPoolExecutor(max_workers=min(limiter.max_concurrency, max(1, len(stream_names)))) as pool:
+        return list(pool.map(
+            lambda stream_name: read_stream_events(logs_client, limiter, log_group, stream_name,
+                                                   start_time_ms, end_time_ms, filter_pattern,
+                                                   events_per_stream),
+            stream_names
+        ))
+
+
+def fetch_recent_stream_events(
+        logs_client,
+        log_groups: List[str],
+        start_time_ms: int,
+        end_time_ms: int,
+        filter_pattern: str = "",
+        streams_per_group: int = 5,
+        events_per_stream: int = 100,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None
+) -> Dict[str, Any]:
+    """
+    Fetch the most recent events of the newest streams of each log group concurrently.
+
+    describe_log_streams runs for all groups first, then every (group, stream) read is
+    fanned out on the same bounded pool, so neither phase waits on the other's workers.
+
+    Returns:
+        {log_group: list of per-stream event lists | Exception}, in log_groups order.
+        A group with no streams maps to an empty list.
+    """
+    limiter = limiter or AdaptiveConcurrencyLimiter()
+
+    def describe(log_group: str) -> List[Dict[str, Any]]:
+        response = limiter.call(
+            logs_client.describe_log_streams,
+            logGroupName=log_group,
+            orderBy='LastEventTime',
+            descending=True,
+            limit=streams_per_group
+        )
+        return response.get('logStreams', [])
+
+    def read_stream(log_group: str, stream_name: str) -> List[Dict[str, Any]]:
+        return read_stream_events(logs_client, limiter, log_group, stream_name,
+                                  start_time_ms, end_time_ms, filter_pattern, events_per_stream)
+
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=limiter.max_concurrency) as pool:
+        stream_futures = {group: pool.submit(describe, group) for group in log_groups}
+
+        event_futures = {}
+        for group, future in stream_futures.items():
+            try:
+                streams = future.result()
+            except Exception as e:
+                results[group] = e
+                continue
+            event_futures[group] = [pool.submit(read_stream, group, stream['logStreamName'])
+                                    for stream in streams]
+
+        for group in log_groups:
+            if group in results:
+                continue
+            try:
+                results[group] = [future.result() for future in event_futures[group]]
+            except Exception as e:
+                results[group] = e
+
+    return {group: results[group] for group in log_groups}
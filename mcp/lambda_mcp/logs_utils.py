@@ -1,7 +1,96 @@
 """
 CloudWatch Logs Insights utility functions for log analysis
 """
-from typing import Dict, List, Any
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional
+from .log_templates import TemplateMiner
+
+# 시간대별 분포 집계 단위 (밀리초)
+HOUR_MS = 3_600_000
+
+
+def format_timestamp(timestamp_ms: int) -> str:
+    """epoch 밀리초를 도구 출력용 ISO 문자열로 변환합니다."""
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
+
+
+class LogEventAnalyzer:
+    """
+    로그 이벤트를 한 번만 순회하며 레벨별 건수, 시간대별 분포, 메시지 템플릿을 함께 집계합니다.
+
+    이벤트를 add()로 스트리밍할 수 있으므로 전체 이벤트 목록을 여러 번 순회하거나
+    포맷된 이벤트 목록을 따로 만들 필요가 없습니다.
+    """
+
+    def __init__(self, miner: Optional[TemplateMiner] = None):
+        self.miner = miner or TemplateMiner()
+        self.event_count = 0
+        self.error_count = 0
+        self.warning_count = 0
+        self.info_count = 0
+        self.hour_buckets: Dict[int, int] = {}
+        self.newest_ms: Optional[int] = None
+        self.oldest_ms: Optional[int] = None
+
+    def add_events(self, events: Iterable[Dict[str, Any]]) -> None:
+        """CloudWatch Logs 이벤트({timestamp, message})를 집계합니다."""
+        # 반복문 안의 속성 조회를 줄이기 위해 지역 변수로 바인딩
+        hour_buckets = self.hour_buckets
+        add_to_template = self.miner.add
+        count = error = warning = info = 0
+        newest = self.newest_ms
+        oldest = self.oldest_ms
+
+        for event in events:
+            message = event['message']
+            timestamp = event['timestamp']
+            count += 1
+
+            lowered = message.lower()
+            if 'error' in lowered:
+                error += 1
+            if 'warn' in lowered:
+                warning += 1
+            if 'info' in lowered:
+                info += 1
+
+            hour = timestamp // HOUR_MS
+            hour_buckets[hour] = hour_buckets.get(hour, 0) + 1
+
+            if newest is None or timestamp > newest:
+                newest = timestamp
+            if oldest is None or timestamp < oldest:
+                oldest = timestamp
+
+            # 요청 ID, IP, 숫자만 다른 메시지는 같은 템플릿으로 묶음
+            add_to_template(message)
+
+        self.event_count += count
+        self.error_count += error
+        self.warning_count += warning
+        self.info_count += info
+        self.newest_ms = newest
+        self.oldest_ms = oldest
+
+    def event_levels(self) -> Dict[str, int]:
+        """레벨별 이벤트 건수 (한 메시지가 여러 레벨에 해당할 수 있음)"""
+        return {
+            "error": self.error_count,
+            "warning": self.warning_count,
+            "info": self.info_count,
+            "other": self.event_count - self.error_count - self.warning_count - self.info_count
+        }
+
+    def hourly_distribution(self) -> Dict[str, int]:
+        """시간대별 이벤트 건수 (최신 시간대부터, 키 형식: YYYY-MM-DDTHH)"""
+        return {
+            format_timestamp(hour * HOUR_MS)[:13]: self.hour_buckets[hour]
+            for hour in sorted(self.hour_buckets, reverse=True)
+        }
+
+    def top_patterns(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """가장 자주 나타난 메시지 템플릿 상위 N개"""
+        return [{"pattern": t["template"], "count": t["count"]} for t in self.miner.top_templates(limit)]
 
 def generate_insights_query(analysis_type: str) -> str:
     """분석 유형에 따라 Logs Insights 쿼리를 자동 생성합니다."""
@@ -55,85 +144,69 @@ def generate_insights_query(analysis_type: str) -> str:
     return queries.get(analysis_type, queries["custom"]).strip()
 
 
-def analyze_insights_results(
-        results: List[Dict],
-        analysis_type: str,
-        field_names: set
-) -> Dict[str, Any]:
-    """Logs Insights 결과를 분석하여 인사이트를 생성합니다."""
-
-    if not results:
-        return {"summary": "분석할 데이터가 없습니다."}
+class InsightsResultAnalyzer:
+    """
+    Logs Insights 결과 행을 하나씩 받아 분석 유형별 인사이트를 점진적으로 집계합니다.
 
-    analysis = {
-        "total_records": len(results),
-        "field_names": list(field_names),
-        "insights": []
-    }
+    결과 전체를 리스트로 만들지 않고 스트리밍으로 처리하므로 메모리 사용량이
+    결과 행 수(max_results)에 비례하지 않습니다.
+    """
 
-    if analysis_type == "errors":
-        # 에러 패턴 분석
-        error_patterns = {}
-        for result in results:
+    def __init__(self, analysis_type: str):
+        self.analysis_type = analysis_type
+        self.total_records = 0
+        self.field_names: Dict[str, None] = {}  # 처음 등장한 순서를 유지
+        self.time_distribution: Dict[str, int] = {}
+
+        # 유형별 집계 상태
+        self.miner = TemplateMiner() if analysis_type == "errors" else None
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.duration_max: Optional[float] = None
+        self.duration_min: Optional[float] = None
+        self.ip_addresses: Dict[str, int] = {}
+        self.login_stats: Dict[str, int] = {}
+        self.failed_logins: Dict[str, int] = {}
+        self.success_logins: Dict[str, int] = {}
+        self.ip_locations: Dict[str, int] = {}
+        self.traffic_events = 0
+        self.first_timestamp: Optional[str] = None
+        self.last_timestamp: Optional[str] = None
+
+    def add(self, result: Dict[str, Any]) -> None:
+        """결과 행 하나를 집계합니다."""
+        self.total_records += 1
+        for field_name in result:
+            if field_name not in self.field_names:
+                self.field_names[field_name] = None
+
+        analysis_type = self.analysis_type
+        if analysis_type == "errors":
+            # 에러 메시지 템플릿 마이닝 (요청 ID, IP, 숫자 등 가변 부분은 마스킹)
             message = result.get('@message', '')
-            # 간단한 에러 패턴 추출
             if 'ERROR' in message or 'Exception' in message:
-                # 첫 번째 단어를 패턴으로 사용
-                pattern = message.split()[:3] if message.split() else ['Unknown']
-                pattern_key = ' '.join(pattern)
-                error_patterns[pattern_key] = error_patterns.get(pattern_key, 0) + 1
-
-        # 상위 에러 패턴
-        top_errors = sorted(error_patterns.items(), key=lambda x: x[1], reverse=True)[:5]
-        analysis["insights"].append({
-            "type": "top_error_patterns",
-            "data": top_errors
-        })
-
-    elif analysis_type == "performance":
-        # 성능 통계 분석
-        durations = []
-        for result in results:
+                self.miner.add(message)
+
+        elif analysis_type == "performance":
+            # 성능 통계 분석
             if '@duration' in result:
                 try:
                     duration = float(result['@duration'])
-                    durations.append(duration)
                 except (ValueError, TypeError):
-                    continue
-
-        if durations:
-            analysis["insights"].append({
-                "type": "performance_stats",
-                "data": {
-                    "avg_duration": sum(durations) / len(durations),
-                    "max_duration": max(durations),
-                    "min_duration": min(durations),
-                    "sample_count": len(durations)
-                }
-            })
-
-    elif analysis_type == "security":
-        # 보안 이벤트 분석
-        ip_addresses = {}
-        for result in results:
+                    duration = None
+                if duration is not None:
+                    self.duration_count += 1
+                    self.duration_sum += duration
+                    self.duration_max = duration if self.duration_max is None else max(self.duration_max, duration)
+                    self.duration_min = duration if self.duration_min is None else min(self.duration_min, duration)
+
+        elif analysis_type == "security":
+            # 보안 이벤트 분석
             ip = result.get('sourceIPAddress', 'Unknown')
-            ip_addresses[ip] = ip_addresses.get(ip, 0) + 1
-
-        # 상위 IP 주소
-        top_ips = sorted(ip_addresses.items(), key=lambda x: x[1], reverse=True)[:10]
-        analysis["insights"].append({
-            "type": "top_source_ips",
-            "data": top_ips
-        })
-
-    elif analysis_type == "login":
-        # Console 로그인 분석
-        login_stats = {}
-        failed_logins = {}
-        success_logins = {}
-        ip_locations = {}
-
-        for result in results:
+            self.ip_addresses[ip] = self.ip_addresses.get(ip, 0) + 1
+
+        elif analysis_type == "login":
+            # Console 로그인 분석
             source_ip = result.get('sourceIPAddress', 'Unknown')
             username = result.get('userIdentity.userName', 'Unknown')
             error_code = result.get('errorCode', 'Success')
@@ -141,81 +214,136 @@ def analyze_insights_results(
 
             # 전체 로그인 통계
             key = f"{username}@{source_ip}"
-            login_stats[key] = login_stats.get(key, 0) + count
+            self.login_stats[key] = self.login_stats.get(key, 0) + count
 
             # 실패한 로그인 통계
             if error_code and error_code != 'Success':
                 failed_key = f"{username}@{source_ip} ({error_code})"
-                failed_logins[failed_key] = failed_logins.get(failed_key, 0) + count
+                self.failed_logins[failed_key] = self.failed_logins.get(failed_key, 0) + count
             else:
-                success_key = f"{username}@{source_ip}"
-                success_logins[success_key] = success_logins.get(success_key, 0) + count
+                self.success_logins[key] = self.success_logins.get(key, 0) + count
 
             # IP별 통계
-            ip_locations[source_ip] = ip_locations.get(source_ip, 0) + count
-
-        # 상위 로그인 시도
-        top_logins = sorted(login_stats.items(), key=lambda x: x[1], reverse=True)[:10]
-        top_failed = sorted(failed_logins.items(), key=lambda x: x[1], reverse=True)[:10]
-        top_success = sorted(success_logins.items(), key=lambda x: x[1], reverse=True)[:10]
-        suspicious_ips = sorted(ip_locations.items(), key=lambda x: x[1], reverse=True)[:10]
-
-        analysis["insights"].extend([
-            {
-                "type": "top_login_attempts",
-                "description": "가장 많은 로그인 시도 (사용자@IP)",
-                "data": top_logins
-            },
-            {
-                "type": "failed_logins",
-                "description": "실패한 로그인 시도",
-                "data": top_failed
-            },
-            {
-                "type": "successful_logins",
-                "description": "성공한 로그인",
-                "data": top_success
-            },
-            {
-                "type": "suspicious_ips",
-                "description": "의심스러운 IP 주소 (로그인 시도 횟수 기준)",
-                "data": suspicious_ips
-            }
-        ])
-
-    elif analysis_type == "traffic":
-        # 트래픽 패턴 분석
-        timestamps = []
-        for result in results:
+            self.ip_locations[source_ip] = self.ip_locations.get(source_ip, 0) + count
+
+        elif analysis_type == "traffic":
+            # 트래픽 패턴 분석
             if '@timestamp' in result:
-                timestamps.append(result['@timestamp'])
-
-        analysis["insights"].append({
-            "type": "traffic_pattern",
-            "data": {
-                "total_events": len(timestamps),
-                "time_span": f"{timestamps[0] if timestamps else 'N/A'} to {timestamps[-1] if timestamps else 'N/A'}"
-            }
-        })
-
-    # 공통 분석: 시간대별 분포
-    time_distribution = {}
-    for result in results:
+                self.traffic_events += 1
+                if self.first_timestamp is None:
+                    self.first_timestamp = result['@timestamp']
+                self.last_timestamp = result['@timestamp']
+
+        # 공통 분석: 시간대별 분포
         timestamp = result.get('@timestamp', '')
         if timestamp:
             # 시간 추출 (예: 2024-01-01T10:30:00 -> 10시)
             try:
                 hour = timestamp.split('T')[1][:2] if 'T' in timestamp else '00'
-                time_distribution[f"{hour}:00"] = time_distribution.get(f"{hour}:00", 0) + 1
+                self.time_distribution[f"{hour}:00"] = self.time_distribution.get(f"{hour}:00", 0) + 1
             except (IndexError, AttributeError):
-                continue
+                pass
+
+    def result(self) -> Dict[str, Any]:
+        """집계된 인사이트를 반환합니다."""
+        if not self.total_records:
+            return {"summary": "분석할 데이터가 없습니다."}
+
+        analysis = {
+            "total_records": self.total_records,
+            "field_names": list(self.field_names),
+            "insights": []
+        }
+
+        if self.analysis_type == "errors":
+            # 상위 에러 템플릿
+            top_errors = [(t["template"], t["count"]) for t in self.miner.top_templates(5)]
+            analysis["insights"].append({
+                "type": "top_error_patterns",
+                "data": top_errors
+            })
 
-    if time_distribution:
-        analysis["insights"].append({
-            "type": "hourly_distribution",
-            "data": dict(sorted(time_distribution.items()))
-        })
+        elif self.analysis_type == "performance":
+            if self.duration_count:
+                analysis["insights"].append({
+                    "type": "performance_stats",
+                    "data": {
+                        "avg_duration": self.duration_sum / self.duration_count,
+                        "max_duration": self.duration_max,
+                        "min_duration": self.duration_min,
+                        "sample_count": self.duration_count
+                    }
+                })
+
+        elif self.analysis_type == "security":
+            # 상위 IP 주소
+            top_ips = sorted(self.ip_addresses.items(), key=lambda x: x[1], reverse=True)[:10]
+            analysis["insights"].append({
+                "type": "top_source_ips",
+                "data": top_ips
+            })
+
+        elif self.analysis_type == "login":
+            # 상위 로그인 시도
+            top_logins = sorted(self.login_stats.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_failed = sorted(self.failed_logins.items(), key=lambda x: x[1], reverse=True)[:10]
+            top_success = sorted(self.success_logins.items(), key=lambda x: x[1], reverse=True)[:10]
+            suspicious_ips = sorted(self.ip_locations.items(), key=lambda x: x[1], reverse=True)[:10]
+
+            analysis["insights"].extend([
+                {
+                    "type": "top_login_attempts",
+                    "description": "가장 많은 로그인 시도 (사용자@IP)",
+                    "data": top_logins
+                },
+                {
+                    "type": "failed_logins",
+                    "description": "실패한 로그인 시도",
+                    "data": top_failed
+                },
+                {
+                    "type": "successful_logins",
+                    "description": "성공한 로그인",
+                    "data": top_success
+                },
+                {
+                    "type": "suspicious_ips",
+                    "description": "의심스러운 IP 주소 (로그인 시도 횟수 기준)",
+                    "data": suspicious_ips
+                }
+            ])
+
+        elif self.analysis_type == "traffic":
+            analysis["insights"].append({
+                "type": "traffic_pattern",
+                "data": {
+                    "total_events": self.traffic_events,
+                    "time_span": f"{self.first_timestamp or 'N/A'} to {self.last_timestamp or 'N/A'}"
+                }
+            })
+
+        if self.time_distribution:
+            analysis["insights"].append({
+                "type": "hourly_distribution",
+                "data": dict(sorted(self.time_distribution.items()))
+            })
+
+        return analysis
+
+
+def analyze_insights_results(
+        results: Iterable[Dict],
+        analysis_type: str,
+        field_names: set = None
+) -> Dict[str, Any]:
+    """Logs Insights 결과를 분석하여 인사이트를 생성합니다."""
+    analyzer = InsightsResultAnalyzer(analysis_type)
+    for result in results:
+        analyzer.add(result)
 
+    analysis = analyzer.result()
+    if field_names is not None and "field_names" in analysis:
+        analysis["field_names"] = list(field_names)
     return analysis
 
 
@@ -0,0 +1,68 @@
+"""
+Serialization of tool results into the text content returned to MCP clients
+"""
+import json
+from typing import Any, Dict, List
+
+# "json": results as returned by the tool
+# "columnar": lists of records become {"columns": [...], "rows": [[...]]} so keys are not repeated per row
+OUTPUT_FORMATS = ("json", "columnar")
+
+# A list is made columnar only when the shared columns fill at least this share of cells
+MIN_COLUMNAR_FILL = 0.5
+
+
+def to_columnar(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert a list of dicts to {"columns", "rows"}; keys missing from a record become null"""
+    columns: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns[key] = None
+    names = list(columns)
+    return {"columns": names, "rows": [[record.get(name) for name in names] for record in records]}
+
+
+def _is_tabular(value: List[Any]) -> bool:
+    if len(value) < 2 or not all(isinstance(item, dict) and item for item in value):
+        return False
+    columns = set()
+    cells = 0
+    for item in value:
+        columns.update(item)
+        cells += len(item)
+    return cells >= MIN_COLUMNAR_FILL * len(columns) * len(value)
+
+
+def compact_result(value: Any) -> Any:
+    """Recursively replace lists of records with their columnar form"""
+    if isinstance(value, dict):
+        return {key: compact_result(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [compact_result(item) for item in value]
+        return to_columnar(items) if _is_tabular(items) else items
+    return value
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def serialize_tool_result(result: Any, output_format: str = "json") -> str:
+    """
+    Serialize a tool result as compact JSON (strings are returned unchanged).
+
+    Non-ASCII text is kept as-is and separators carry no padding, since the output is
+    read by an LLM and every character counts against its context.
+    """
+    if isinstance(result, str):
+        return result
+    if hasattr(result, 'model_dump'):
+        result = result.model_dump()
+    if output_format == "columnar":
+        result = compact_result(result)
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':'), default=_default)
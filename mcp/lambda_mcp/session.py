@@ -1,25 +1,223 @@
 """Session management for MCP server using DynamoDB"""
 import uuid
 import time
+import copy
+import json
+import hmac
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Any
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 import logging
 
 logger = logging.getLogger(__name__)
 
+class SessionCache:
+    """Per-container LRU cache of session data bounded by a TTL and the session's expires_at"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: int = 300):
+        """Initialize the cache
+
+        Args:
+            max_size: Maximum number of sessions kept in memory
+            ttl_seconds: Maximum age of a cached entry (bounds staleness across containers)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached session data, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[session_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, session_id: str, data: Dict[str, Any], expires_at: float) -> None:
+        """Cache session data until min(now + ttl, expires_at)"""
+        valid_until = min(time.time() + self.ttl_seconds, expires_at)
+        with self._lock:
+            self._entries[session_id] = (copy.deepcopy(data), valid_until, expires_at)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def update(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Write-through for data updates, keeping the cached expiry bounds"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+        if entry is not None:
+            self.put(session_id, data, entry[2])
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session from the cache"""
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'size': len(self._entries)
+            }
+
+
+def _b64url_encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SessionTokenSigner:
+    """Issues and validates stateless HMAC-signed MCP session tokens
+
+    Token format: ``v1.<base64url(claims JSON)>.<base64url(HMAC-SHA256)>`` where the claims
+    carry a session id (``sid``), issue/expiry times and a small ``data`` dict.
+    """
+
+    VERSION = "v1"
+
+    def __init__(self, secret: str, ttl_seconds: int = 24 * 60 * 60, max_data_bytes: int = 1024):
+        """Initialize the signer
+
+        Args:
+            secret: Shared HMAC secret (must be identical across all containers)
+            ttl_seconds: Token lifetime
+            max_data_bytes: Maximum serialized size of the embedded session data
+        """
+        if not secret:
+            raise ValueError("A session token secret is required")
+        self._key = secret.encode('utf-8')
+        self.ttl_seconds = ttl_seconds
+        self.max_data_bytes = max_data_bytes
+
+    def _sign(self, message: bytes) -> str:
+        return _b64url_encode(hmac.new(self._key, message, hashlib.sha256).digest())
+
+    def issue(self, session_data: Optional[Dict[str, Any]] = None) -> str:
+        """Issue a new signed session token
+
+        Args:
+            session_data: Optional small session data embedded in the token
+
+        Returns:
+            The signed token, used as the MCP-Session-Id
+        """
+        data_json = json.dumps(session_data or {}, separators=(',', ':'), sort_keys=True)
+        if len(data_json.encode('utf-8')) > self.max_data_bytes:
+            raise ValueError(f"Session data exceeds {self.max_data_bytes} bytes")
+
+        now = int(time.time())
+        claims = {
+            'sid': str(uuid.uuid4()),
+            'iat': now,
+            'exp': now + self.ttl_seconds,
+            'data': session_data or {}
+        }
+        body = _b64url_encode(json.dumps(claims, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+        signing_input = f"{self.VERSION}.{body}".encode('ascii')
+        return f"{self.VERSION}.{body}.{self._sign(signing_input)}"
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Validate a token locally
+
+        Args:
+            token: The MCP-Session-Id header value
+
+        Returns:
+            The token claims, or None if the token is malformed, tampered with or expired
+        """
+        try:
+            version, body, signature = token.split('.')
+        except (AttributeError, ValueError):
+            return None
+
+        if version != self.VERSION:
+            return None
+
+        expected = self._sign(f"{version}.{body}".encode('ascii'))
+        if not hmac.compare_digest(expected, signature):
+            return None
+
+        try:
+            claims = json.loads(_b64url_decode(body))
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+        if not isinstance(claims, dict) or claims.get('exp', 0) < time.time():
+            return None
+
+        return claims
+
+
 class SessionManager:
     """Manages MCP sessions using DynamoDB"""
     
-    def __init__(self, table_name: str = "mcp_sessions"):
+    def __init__(self, table_name: str = "mcp_sessions", cache_size: int = 1024, cache_ttl: int = 300,
+                 auto_create_table: bool = True):
         """Initialize the session manager
+
+        No DynamoDB call is made here, so constructing the manager adds nothing to cold start.
         
         Args:
             table_name: Name of DynamoDB table to use for sessions
+            cache_size: Maximum number of sessions cached in this container (0 disables the cache)
+            cache_ttl: Maximum seconds a positive lookup is served from the cache
+            auto_create_table: Create the table once per container if a write finds it missing
         """
         self.table_name = table_name
         self.dynamodb = boto3.resource('dynamodb')
         self.table = self.dynamodb.Table(table_name)
+        self.cache = SessionCache(max_size=cache_size, ttl_seconds=cache_ttl) if cache_size > 0 else None
+        self.auto_create_table = auto_create_table
+        self._table_checked = False
+        self._table_lock = threading.Lock()
+
+    def _put_item(self, item: Dict[str, Any]) -> None:
+        """Write a session item, provisioning the table lazily on the first missing-table error"""
+        try:
+            self.table.put_item(Item=item)
+        except ClientError as e:
+            if (e.response.get('Error', {}).get('Code') != 'ResourceNotFoundException'
+                    or not self.auto_create_table or self._table_checked):
+                raise
+            with self._table_lock:
+                if not self._table_checked:
+                    logger.warning(f"Session table {self.table_name} not found, creating it")
+                    self.create_table(table_name=self.table_name)
+                    self._table_checked = True
+            self.table.put_item(Item=item)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get session cache hit-rate counters
+
+        Returns:
+            Dict with hits, misses, hit_rate and size (all zero when the cache is disabled)
+        """
+        if not self.cache:
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0}
+        return self.cache.stats()
         
     @classmethod
     def create_table(cls, table_name: str = "mcp_sessions") -> None:
@@ -68,20 +266,23 @@ class SessionManager:
 
             logger.info(f"Created table {table_name}")
 
-    def create_session(self, session_data: Optional[Dict[str, Any]] = None) -> str:
+    def create_session(self, session_data: Optional[Dict[str, Any]] = None,
+                       session_id: Optional[str] = None, expires_at: Optional[int] = None) -> str:
         """Create a new session
 
         Args:
             session_data: Optional initial session data
+            session_id: Optional session ID to store under (e.g. a signed token's sid)
+            expires_at: Optional expiry epoch seconds (default: 24 hours from now)
 
         Returns:
             The session ID
         """
         # Generate a secure random UUID for the session
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
 
         # Set session expiry to 24 hours from now
-        expires_at = int(time.time()) + (24 * 60 * 60)
+        expires_at = expires_at or int(time.time()) + (24 * 60 * 60)
 
         # Store session in DynamoDB
         item = {
@@ -91,9 +292,12 @@ class SessionManager:
             'data': session_data or {}
         }
 
-        self.table.put_item(Item=item)
+        self._put_item(item)
         logger.info(f"Created session {session_id}")
 
+        if self.cache:
+            self.cache.put(session_id, item['data'], expires_at)
+
         return session_id
 
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -105,6 +309,11 @@ class SessionManager:
         Returns:
             Session data or None if not found
         """
+        if self.cache:
+            cached = self.cache.get(session_id)
+            if cached is not None:
+                return cached
+
         try:
             response = self.table.get_item(Key={'session_id': session_id})
             item = response.get('Item')
@@ -117,7 +326,11 @@ class SessionManager:
                 self.delete_session(session_id)
                 return None
 
-            return item.get('data', {})
+            data = item.get('data', {})
+            if self.cache:
+                self.cache.put(session_id, data, float(item['expires_at']))
+
+            return data
 
         except Exception as e:
             logger.error(f"Error getting session {session_id}: {e}")
@@ -140,6 +353,8 @@ class SessionManager:
                 ExpressionAttributeNames={'#data': 'data'},
                 ExpressionAttributeValues={':data': session_data}
             )
+            if self.cache:
+                self.cache.update(session_id, session_data)
             return True
         except Exception as e:
             logger.error(f"Error updating session {session_id}: {e}")
@@ -154,6 +369,9 @@ class SessionManager:
         Returns:
             True if successful, False otherwise
         """
+        if self.cache:
+            self.cache.invalidate(session_id)
+
         try:
             self.table.delete_item(Key={'session_id': session_id})
             logger.info(f"Deleted session {session_id}")
@@ -0,0 +1,122 @@
+"""
+Benchmark for chat_history_service.delete_sessions_by_user against a local DynamoDB stand-in.
+
+Seeds one user with many sessions (each with a few message items) and deletes them with:
+
+    legacy      one UserIdIndex query page, then per session: query + batch_writer delete
+                of its messages and a delete_item, all serial
+    batched     delete_sessions_by_user: paginated key-only query, 25-item BatchWriteItem
+                segments in parallel, UnprocessedItems retried with backoff
+
+and reports requests, seconds and what is left behind. The stand-in can return a share of
+every batch as UnprocessedItems (--unprocessed) to exercise the retry path. Exits with
+status 1 if the batched delete leaves any session or message item.
+
+Usage:
+    python benchmarks/bulk_delete.py --sessions 10000 --messages 3 --latency 0.001
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, '..', '..', 'layers'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from boto3.dynamodb.conditions import Key  # noqa: E402
+from common.chat_messages import iter_messages  # noqa: E402
+
+import chat_history_service as service  # noqa: E402
+from local_dynamodb import LocalTable  # noqa: E402
+
+USER_ID = 'bench-user'
+
+
+def legacy_delete_sessions_by_user(user_id):
+    """delete_sessions_by_user as it was: the first query page only, one session at a time"""
+    messages_table = service.messages_table
+    response = service.table.query(
+        IndexName='UserIdIndex',
+        KeyConditionExpression=Key('userId').eq(user_id)
+    )
+    deleted_count = 0
+    for item in response.get('Items', []):
+        session_id = item.get('sessionId')
+        if session_id:
+            with messages_table.batch_writer() as batch:
+                for message in iter_messages(messages_table, session_id, projection=('sessionId', 'messageKey')):
+                    batch.delete_item(Key={'sessionId': session_id, 'messageKey': message['messageKey']})
+            service.table.delete_item(Key={'sessionId': session_id})
+            deleted_count += 1
+    return {'deletedCount': deleted_count}
+
+
+def seed(sessions, messages, latency, unprocessed):
+    service.table = LocalTable('chat-history', 'sessionId', indexes={'UserIdIndex': ('userId', None)})
+    service.messages_table = LocalTable('chat-messages', 'sessionId', 'messageKey')
+    for index in range(sessions):
+        session_id = f'session-{index:05d}'
+        service.table.put_item(Item={
+            'sessionId': session_id, 'userId': USER_ID, 'title': f'대화 {index}',
+            'createdAt': '2024-01-01T00:00:00+09:00', 'updatedAt': '2024-01-01T00:00:00+09:00'
+        })
+        for number in range(messages):
+            service.messages_table.put_item(Item={
+                'sessionId': session_id, 'messageKey': f'2024-01-01T00:00:{number:02d}.000000+09:00#m{number}',
+                'id': f'm{number}', 'sender': 'user', 'text': '로그 분석 결과를 보여줘' * 4
+            })
+    for local_table in (service.table, service.messages_table):
+        local_table.latency = latency
+        local_table.unprocessed_rate = unprocessed
+        local_table.requests = 0
+
+
+def run(label, delete, args):
+    seed(args.sessions, args.messages, args.latency, args.unprocessed)
+    started = time.perf_counter()
+    result = delete(USER_ID)
+    seconds = time.perf_counter() - started
+    return {
+        'label': label,
+        'deleted': result.get('deletedCount', 0),
+        'messages': result.get('deletedMessageCount', '-'),
+        'left_sessions': len(service.table.items),
+        'left_messages': len(service.messages_table.items),
+        'requests': service.table.requests + service.messages_table.requests,
+        'seconds': seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=3, help='message items per session')
+    parser.add_argument('--latency', type=float, default=0.001, help='simulated seconds per request')
+    parser.add_argument('--unprocessed', type=float, default=0.01,
+                        help='share of batch requests returned as UnprocessedItems')
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    rows = []
+    if not args.skip_legacy:
+        rows.append(run('legacy serial', legacy_delete_sessions_by_user, args))
+    rows.append(run('delete_sessions_by_user', service.delete_sessions_by_user, args))
+
+    print(f"{args.sessions} sessions x {args.messages} messages, {args.latency * 1000:.1f} ms per request, "
+          f"{args.unprocessed:.0%} unprocessed\n")
+    print("| implementation | sessions deleted | messages deleted | sessions left | messages left | requests | seconds |")
+    print("|---|---:|---:|---:|---:|---:|---:|")
+    for row in rows:
+        print(f"| {row['label']} | {row['deleted']} | {row['messages']} | {row['left_sessions']} | "
+              f"{row['left_messages']} | {row['requests']} | {row['seconds']:.2f} |")
+
+    batched = rows[-1]
+    if batched['left_sessions'] or batched['left_messages'] or batched['deleted'] != args.sessions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
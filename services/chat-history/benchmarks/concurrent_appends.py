@@ -0,0 +1,92 @@
+"""
+Concurrency check for chat_history_service.add_message against a local DynamoDB stand-in.
+
+Posts messages to one session from many threads at once (like the user and the
+assistant message arriving together) and counts what was stored:
+
+    legacy      get_item of the session, append in Python, SET messages = :messages
+    add_message the service's conditional UpdateItem + per-message item
+
+The legacy read-modify-write loses messages whenever two writers read the same list;
+add_message must store every message. Exits with status 1 if it does not.
+
+Usage:
+    python benchmarks/concurrent_appends.py --writers 16 --messages 25 --latency 0.002
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, '..', '..', 'layers'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import chat_history_service as service  # noqa: E402
+from local_dynamodb import LocalTable  # noqa: E402
+
+
+def legacy_add_message(table, session_id, text):
+    """add_message as it was before message items: the whole list is read and rewritten"""
+    session = table.get_item(Key={'sessionId': session_id}).get('Item')
+    messages = session.get('messages', [])
+    messages.append({'id': text, 'sender': 'user', 'text': text})
+    table.update_item(
+        Key={'sessionId': session_id},
+        UpdateExpression="SET messages = :messages",
+        ExpressionAttributeValues={':messages': messages}
+    )
+
+
+def run(label, append, writers, messages_per_writer):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        futures = [pool.submit(append, f'w{writer}-m{index}')
+                   for index in range(messages_per_writer) for writer in range(writers)]
+        for future in futures:
+            future.result()
+    return label, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--messages', type=int, default=25, help='messages per writer')
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated seconds per request')
+    args = parser.parse_args()
+    expected = args.writers * args.messages
+
+    # Legacy layout: one session item holding the message list
+    legacy_table = LocalTable('chat-history', 'sessionId', latency=args.latency)
+    legacy_table.put_item(Item={'sessionId': 'legacy', 'messages': []})
+    _, legacy_seconds = run('legacy', lambda text: legacy_add_message(legacy_table, 'legacy', text),
+                            args.writers, args.messages)
+    legacy_stored = len(legacy_table.items[('legacy', None)]['messages'])
+
+    # Current layout: session metadata item + one item per message
+    service.table = LocalTable('chat-history', 'sessionId', indexes={'UserIdIndex': ('userId', None)},
+                               latency=args.latency)
+    service.messages_table = LocalTable('chat-messages', 'sessionId', 'messageKey', latency=args.latency)
+    session_id = service.create_session({'userId': 'bench-user'})['sessionId']
+    _, current_seconds = run('add_message',
+                             lambda text: service.add_message(session_id, 'user', text, '0초'),
+                             args.writers, args.messages)
+    current_stored = len(service.get_messages(session_id))
+    missing_session = service.add_message('no-such-session', 'user', 'x', '0초')
+
+    print(f"{args.writers} writers x {args.messages} messages, {args.latency * 1000:.1f} ms per request\n")
+    print("| implementation | stored | lost | seconds |")
+    print("|---|---:|---:|---:|")
+    print(f"| legacy read-modify-write | {legacy_stored} | {expected - legacy_stored} | {legacy_seconds:.2f} |")
+    print(f"| add_message | {current_stored} | {expected - current_stored} | {current_seconds:.2f} |")
+    print(f"\nadd_message on a missing session returns {missing_session!r}")
+
+    if current_stored != expected or missing_session is not None:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+In-memory stand-in for the boto3 DynamoDB Table API, for local benchmarks.
+
+Implements the subset the chat history service uses: put/get/update/delete_item,
+query (with GSIs, pagination at 1 MB like DynamoDB, projections, simple filters), batch_writer,
+client.batch_write_item and client.query with a single-key equality condition. Every call is serialized per table like a single-item
+write in DynamoDB, and can carry a simulated network latency so concurrency
+effects (lost updates, parallel speed-ups) show up as they would against AWS.
+"""
+import copy
+import json
+import random
+import re
+import threading
+import time
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+# DynamoDB stops a Query page after 1 MB of items read
+PAGE_BYTES = 1024 * 1024
+
+
+def _error(code, message=''):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, 'LocalDynamoDB')
+
+
+def _item_size(item):
+    return len(json.dumps(item, default=str))
+
+
+def _resolve(name, names):
+    return (names or {}).get(name, name)
+
+
+def _split_top_level(text, separator=','):
+    parts, depth, current = [], 0, ''
+    for ch in text:
+        depth += ch == '('
+        depth -= ch == ')'
+        if ch == separator and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class LocalTable:
+    def __init__(self, name, hash_key, range_key=None, indexes=None, latency=0.0):
+        """
+        Args:
+            indexes: {index name: (hash key, range key or None)}
+            latency: Seconds slept (outside the table lock) per request
+        """
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = indexes or {}
+        self.latency = latency
+        self.items = {}
+        self._partitions = {}  # hash key value -> {item key: item}, so base-table queries skip the scan
+        self.requests = 0
+        self.unprocessed_rate = 0.0
+        self._lock = threading.Lock()
+        self.meta = type('Meta', (), {'client': LocalClient(self)})()
+
+    # -- helpers --------------------------------------------------------------------------
+
+    def _key(self, key):
+        return (key[self.hash_key], key.get(self.range_key) if self.range_key else None)
+
+    def _store(self, key, item):
+        self.items[key] = item
+        self._partitions.setdefault(key[0], {})[key] = item
+
+    def _remove(self, key):
+        self.items.pop(key, None)
+        self._partitions.get(key[0], {}).pop(key, None)
+
+    def _candidates(self, expression, index_name):
+        """Items in the queried partition (base table), or every item (GSI)"""
+        if index_name is None:
+            spec = expression.get_expression()
+            parts = spec['values'] if spec['operator'] == 'AND' else [expression]
+            for part in parts:
+                part_spec = part.get_expression()
+                if part_spec['operator'] == '=' and part_spec['values'][0].name == self.hash_key:
+                    return list(self._partitions.get(part_spec['values'][1], {}).values())
+        return list(self.items.values())
+
+    def _request(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+
+    @staticmethod
+    def _project(item, projection, names):
+        if not projection:
+            return item
+        projected = {}
+        for field in projection.split(','):
+            match = re.match(r'^(.+)\[(\d+)\]$', field.strip())
+            if match:  # list element, e.g. messages[0]
+                name, index = _resolve(match.group(1), names), int(match.group(2))
+                if index < len(item.get(name) or []):
+                    projected.setdefault(name, []).append(item[name][index])
+            else:
+                name = _resolve(field.strip(), names)
+                if name in item:
+                    projected[name] = item[name]
+        return projected
+
+    @staticmethod
+    def _clause_holds(item, clause, names, values):
+        clause = clause.strip()
+        match = re.match(r'^(attribute_exists|attribute_not_exists)\((.+)\)$', clause)
+        if match:
+            exists = item is not None and _resolve(match.group(2).strip(), names) in item
+            return exists if match.group(1) == 'attribute_exists' else not exists
+        match = re.match(r'^size\((.+)\)\s*=\s*(:\w+)$', clause)
+        if not match:
+            raise NotImplementedError(clause)
+        field = _resolve(match.group(1).strip(), names)
+        return item is not None and field in item and len(item[field]) == values[match.group(2)]
+
+    def _check(self, item, condition, names, values):
+        """Conditions are ANDs of ORs of the clauses above (no parentheses)"""
+        if not condition:
+            return
+        for conjunct in re.split(r'\s+AND\s+', condition):
+            if not any(self._clause_holds(item, clause, names, values)
+                       for clause in re.split(r'\s+OR\s+', conjunct)):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed')
+
+    @staticmethod
+    def _apply_update(item, expression, names, values):
+        clauses = re.split(r'\b(SET|ADD|REMOVE)\b', expression)
+        for action, body in zip(clauses[1::2], clauses[2::2]):
+            for part in _split_top_level(body):
+                if action == 'SET':
+                    field, value = [side.strip() for side in part.split('=', 1)]
+                    field = _resolve(field, names)
+                    match = re.match(r'^(list_append|if_not_exists)\((.+),\s*(:\w+)\)$', value)
+                    if match and match.group(1) == 'list_append':
+                        item[field] = list(item.get(_resolve(match.group(2).strip(), names), [])) + list(values[match.group(3)])
+                    elif match:
+                        item.setdefault(field, values[match.group(3)])
+                    else:
+                        item[field] = values[value]
+                elif action == 'ADD':
+                    field, value = part.split()
+                    field = _resolve(field, names)
+                    item[field] = item.get(field, 0) + values[value]
+                else:
+                    item.pop(_resolve(part, names), None)
+
+    @staticmethod
+    def _key_matches(expression, item):
+        spec = expression.get_expression()
+        operator = spec['operator']
+        if operator == 'AND':
+            return all(LocalTable._key_matches(part, item) for part in spec['values'])
+        field = spec['values'][0].name
+        if field not in item:
+            return False
+        value, args = item[field], spec['values'][1:]
+        if operator == '=':
+            return value == args[0]
+        if operator == 'begins_with':
+            return value.startswith(args[0])
+        if operator == 'BETWEEN':
+            return args[0] <= value <= args[1]
+        return {'<': value < args[0], '<=': value <= args[0],
+                '>': value > args[0], '>=': value >= args[0]}[operator]
+
+    # -- Table API -----------------------------------------------------------------------
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, **kwargs):
+        self._request()
+        with self._lock:
+            key = self._key(Item)
+            self._check(self.items.get(key), ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            self._store(key, copy.deepcopy(Item))
+        return {}
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self._request()
+        with self._lock:
+            item = self.items.get(self._key(Key))
+            if item is None:
+                return {}
+            return {'Item': self._project(copy.deepcopy(item), ProjectionExpression, ExpressionAttributeNames)}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues='NONE', **kwargs):
+        self._request()
+        with self._lock:
+            key = self._key(Key)
+            current = self.items.get(key)
+            self._check(current, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            item = copy.deepcopy(current) if current is not None else copy.deepcopy(Key)
+            self._apply_update(item, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues or {})
+            self._store(key, item)
+            return {'Attributes': copy.deepcopy(item)} if ReturnValues == 'ALL_NEW' else {}
+
+    def delete_item(self, Key, **kwargs):
+        self._request()
+        with self._lock:
+            self._remove(self._key(Key))
+        return {}
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True, Limit=None,
+              ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None,
+              FilterExpression=None, **kwargs):
+        self._request()
+        hash_key, range_key = self.indexes[IndexName] if IndexName else (self.hash_key, self.range_key)
+        with self._lock:
+            matches = [item for item in self._candidates(KeyConditionExpression, IndexName)
+                       if hash_key in item and self._key_matches(KeyConditionExpression, item)]
+
+        # Order by the index range key, then the table key (as a GSI does for duplicates)
+        def order(item):
+            return (item.get(range_key, '') if range_key else '', self._key(item))
+        matches.sort(key=order, reverse=not ScanIndexForward)
+
+        if ExclusiveStartKey:
+            start = order(ExclusiveStartKey)
+            matches = [item for item in matches
+                       if (order(item) > start if ScanIndexForward else order(item) < start)]
+
+        page, size = [], 0
+        for item in matches:
+            if (Limit and len(page) >= Limit) or (page and size >= PAGE_BYTES):
+                break
+            page.append(item)
+            size += _item_size(item)
+
+        # Filters apply after the page is read, so a page may come back empty with a next key
+        selected = [item for item in page if FilterExpression is None or self._key_matches(FilterExpression, item)]
+        response = {
+            'Items': [self._project(copy.deepcopy(item), ProjectionExpression, ExpressionAttributeNames)
+                      for item in selected],
+            'Count': len(selected)
+        }
+        if len(page) < len(matches):
+            last = page[-1]
+            key_fields = {self.hash_key, self.range_key, hash_key, range_key} - {None}
+            response['LastEvaluatedKey'] = {field: last[field] for field in key_fields if field in last}
+        return response
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return LocalBatchWriter(self)
+
+
+class LocalClient:
+    """client.batch_write_item and client.query for one table, with optional simulated UnprocessedItems"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues,
+              ExpressionAttributeNames=None, **kwargs):
+        match = re.fullmatch(r'\s*(#?\w+)\s*=\s*(:\w+)\s*', KeyConditionExpression)
+        if TableName != self.table.name or not match:
+            raise _error('ValidationException', f'Unsupported query: {KeyConditionExpression}')
+        field = _resolve(match.group(1), ExpressionAttributeNames)
+        return self.table.query(Key(field).eq(ExpressionAttributeValues[match.group(2)]),
+                                ExpressionAttributeNames=ExpressionAttributeNames, **kwargs)
+
+    def batch_write_item(self, RequestItems):
+        table = self.table
+        requests = RequestItems[table.name]
+        if len(requests) > 25:
+            raise _error('ValidationException', 'Too many items requested for the BatchWriteItem call')
+        table._request()
+
+        unprocessed = []
+        with table._lock:
+            for request in requests:
+                if table.unprocessed_rate and random.random() < table.unprocessed_rate:
+                    unprocessed.append(request)
+                elif 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                    table._store(table._key(item), copy.deepcopy(item))
+                else:
+                    table._remove(table._key(request['DeleteRequest']['Key']))
+        return {'UnprocessedItems': {table.name: unprocessed} if unprocessed else {}}
+
+
+class LocalBatchWriter:
+    """Buffers writes and flushes them 25 at a time, resending unprocessed items like boto3"""
+
+    def __init__(self, table):
+        self.table = table
+        self.buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        while self.buffer:
+            self._flush()
+
+    def put_item(self, Item):
+        self._add({'PutRequest': {'Item': Item}})
+
+    def delete_item(self, Key):
+        self._add({'DeleteRequest': {'Key': Key}})
+
+    def _add(self, request):
+        self.buffer.append(request)
+        if len(self.buffer) >= 25:
+            self._flush()
+
+    def _flush(self):
+        batch, self.buffer = self.buffer[:25], self.buffer[25:]
+        response = self.table.meta.client.batch_write_item(RequestItems={self.table.name: batch})
+        self.buffer.extend(response['UnprocessedItems'].get(self.table.name, []))
@@ -1,21 +1,51 @@
 import boto3
 import uuid
+import json
+import base64
+import time
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 from common.config import get_config
 from common.utils import cors_response
+from common.chat_messages import (
+    MESSAGE_FIELDS,
+    put_message,
+    query_messages,
+    get_message as get_message_item,
+    projection_kwargs,
+    load_session_messages,
+    migrate_legacy_messages,
+    message_timestamp,
+    to_message
+)
 
 # 설정 로드
 CONFIG = get_config()
 CHAT_HISTORY_TABLE = CONFIG['db']['chat_history_table']
+CHAT_MESSAGES_TABLE = CONFIG['db']['chat_messages_table']
 
 # DynamoDB 리소스 초기화
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(CHAT_HISTORY_TABLE)
+messages_table = dynamodb.Table(CHAT_MESSAGES_TABLE)
 
 # KST 타임존 정의
 KST = datetime.timezone(datetime.timedelta(hours=9))
 
+# 세션 목록/조회 응답에 포함하는 세션 필드 (이전 방식 messages 리스트는 읽지 않음)
+SESSION_FIELDS = ('sessionId', 'userId', 'title', 'createdAt', 'updatedAt')
+
+# 일괄 삭제: BatchWriteItem 최대 요청 수, 병렬 작업 수, UnprocessedItems 재시도 횟수
+DELETE_BATCH_SIZE = 25
+DELETE_WORKERS = 8
+DELETE_MAX_RETRIES = 8
+
+# 메시지 목록 페이지 크기 (limit 미지정 시 기본값, 최대값)
+DEFAULT_MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
 def handle_chat_history_request(path, http_method, body, event, origin):
     """채팅 기록 관련 요청 처리"""
 
@@ -105,6 +135,24 @@ def handle_chat_history_request(path, http_method, body, event, origin):
             return response
 
         elif http_method == 'GET':
+            query_params = event.get('queryStringParameters', {}) or {}
+
+            # limit/cursor/fields 중 하나라도 있으면 최신순 페이지 조회
+            if any(name in query_params for name in ('limit', 'cursor', 'fields')):
+                try:
+                    page = get_messages_page(
+                        session_id,
+                        limit=query_params.get('limit'),
+                        cursor=query_params.get('cursor'),
+                        fields=query_params.get('fields')
+                    )
+                except ValueError as e:
+                    return cors_response(400, {'error': str(e)}, origin)
+                if page is None:
+                    return cors_response(404, {'error': 'Session not found'}, origin)
+
+                return cors_response(200, page, origin)
+
             # 메시지 목록 조회
             messages = get_messages(session_id)
             if messages is None:
@@ -127,6 +175,29 @@ def handle_chat_history_request(path, http_method, body, event, origin):
 
             return cors_response(200, message, origin)
 
+    # /sessions/{sessionId}/messages/{messageId} 패턴 확인
+    elif path_parts[-2:-1] == ['messages'] and path.endswith(f'/sessions/{session_id}/messages/{path_parts[-1]}'):
+        if http_method == "OPTIONS":
+            response = cors_response(200, "", origin)
+            return response
+
+        elif http_method == 'GET':
+            # 메시지 하나 조회 (목록에서 제외한 inference, query_result 등을 필요할 때 조회)
+            query_params = event.get('queryStringParameters', {}) or {}
+            try:
+                message = get_message(
+                    session_id,
+                    path_parts[-1],
+                    timestamp=query_params.get('timestamp'),
+                    fields=query_params.get('fields')
+                )
+            except ValueError as e:
+                return cors_response(400, {'error': str(e)}, origin)
+            if not message:
+                return cors_response(404, {'error': 'Message not found'}, origin)
+
+            return cors_response(200, message, origin)
+
     # 지원하지 않는 경로
     return cors_response(404, {'error': f'Route not found: {http_method} {path}'}, origin)
 
@@ -139,14 +210,13 @@ def create_session(data):
     session_id = str(uuid.uuid4())
     timestamp = datetime.datetime.now(KST).isoformat()
 
-    # DynamoDB에 세션 정보 저장
+    # DynamoDB에 세션 정보 저장 (메시지는 메시지 테이블에 별도 아이템으로 저장)
     session_item = {
         'sessionId': session_id,
         'userId': user_id,
         'title': title,
         'createdAt': timestamp,
-        'updatedAt': timestamp,
-        'messages': []
+        'updatedAt': timestamp
     }
 
     table.put_item(Item=session_item)
@@ -161,20 +231,31 @@ def create_session(data):
     }
 
 
+def iter_user_sessions(user_id, projection=SESSION_FIELDS):
+    """
+    사용자의 세션 아이템을 UserIdIndex에서 페이지 단위로 조회하며 반환
+
+    Query 응답은 1MB에서 끊기므로 LastEvaluatedKey가 없을 때까지 이어서 조회하고,
+    ProjectionExpression으로 필요한 필드만 받습니다.
+    """
+    kwargs = {
+        'IndexName': 'UserIdIndex',
+        'KeyConditionExpression': Key('userId').eq(user_id),
+        **projection_kwargs(projection)
+    }
+    while True:
+        response = table.query(**kwargs)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+
+
 def get_sessions(user_id):
     """사용자 ID에 해당하는, 모든 채팅 세션 조회"""
-    # 사용자 ID에 해당하는 세션 조회 (GlobalSecondaryIndex 사용)
-    response = table.query(
-        IndexName='UserIdIndex',
-        KeyConditionExpression=Key('userId').eq(user_id)
-    )
-
-    sessions = []
-    for item in response.get('Items', []):
-        # 메시지 필드는 응답에서 제외 (크기 절약)
-        if 'messages' in item:
-            del item['messages']
-        sessions.append(item)
+    # 사용자 ID에 해당하는 세션 조회 (GlobalSecondaryIndex 사용, 메시지 필드 제외)
+    sessions = list(iter_user_sessions(user_id))
 
     # 업데이트 시간 기준 내림차순 정렬
     sessions.sort(key=lambda x: x.get('updatedAt', ''), reverse=True)
@@ -184,26 +265,21 @@ def get_sessions(user_id):
 
 def get_session(session_id):
     """세션 ID에 해당하는 세션 정보 조회"""
+    # 메시지 필드는 읽지 않음 (별도 API로 조회)
     response = table.get_item(
-        Key={'sessionId': session_id}
+        Key={'sessionId': session_id},
+        **projection_kwargs(SESSION_FIELDS)
     )
 
-    session = response.get('Item')
-    if not session:
-        return None
-
-    # 메시지 필드는 응답에서 제외 (별도 API로 조회)
-    if 'messages' in session:
-        del session['messages']
-
-    return session
+    return response.get('Item')
 
 
 def update_session(session_id, title):
     """세션 ID에 해당하는 세션 정보 업데이트"""
-    # 세션 정보 조회
+    # 세션 존재 확인 (키만 조회)
     response = table.get_item(
-        Key={'sessionId': session_id}
+        Key={'sessionId': session_id},
+        ProjectionExpression='sessionId'
     )
 
     session = response.get('Item')
@@ -235,16 +311,18 @@ def update_session(session_id, title):
 
 def delete_session(session_id):
     """세션 ID에 해당하는 세션 삭제"""
-    # 세션 정보 조회
+    # 세션 존재 확인 (키만 조회)
     response = table.get_item(
-        Key={'sessionId': session_id}
+        Key={'sessionId': session_id},
+        ProjectionExpression='sessionId'
     )
 
     session = response.get('Item')
     if not session:
         return False
 
-    # 세션 삭제
+    # 세션 메시지 삭제 후 세션 삭제
+    delete_session_messages(session_id)
     table.delete_item(
         Key={'sessionId': session_id}
     )
@@ -252,20 +330,76 @@ def delete_session(session_id):
     return True
 
 
-def add_message(session_id, sender, text, elapsed_time, inference=None, query_string=None, query_result=None):
-    """세션에 새 메시지 추가"""
-    # 세션 정보 조회
-    response = table.get_item(
-        Key={'sessionId': session_id}
-    )
+def message_item_keys(session_id):
+    """
+    세션의 메시지 아이템 키 목록 (키 속성만 조회)
+
+    병렬 삭제 스레드에서 호출되므로 공유 Table 리소스 대신 thread-safe한
+    low-level client(messages_table.meta.client)로 페이지 단위 조회합니다.
+    """
+    client = messages_table.meta.client
+    keys = []
+    kwargs = {}
+    while True:
+        response = client.query(
+            TableName=messages_table.name,
+            KeyConditionExpression='sessionId = :sessionId',
+            ExpressionAttributeValues={':sessionId': session_id},
+            ProjectionExpression='sessionId, messageKey',
+            **kwargs
+        )
+        keys.extend({'sessionId': item['sessionId'], 'messageKey': item['messageKey']}
+                    for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return keys
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def delete_session_messages(session_id):
+    """세션의 메시지 아이템 전체 삭제"""
+    return batch_delete(messages_table, message_item_keys(session_id))
+
+
+def batch_delete(target_table, keys):
+    """
+    키 목록을 BatchWriteItem으로 25개씩 삭제
+
+    처리되지 않은 요청(UnprocessedItems)은 지수 백오프 후 다시 보내고,
+    DELETE_MAX_RETRIES번 재시도해도 남으면 예외를 발생시킵니다.
+
+    Returns:
+        삭제 요청이 처리된 키 개수
+    """
+    client = target_table.meta.client
+    deleted_count = 0
+
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        requests = [{'DeleteRequest': {'Key': key}} for key in keys[start:start + DELETE_BATCH_SIZE]]
+        retries = 0
+        while requests:
+            response = client.batch_write_item(RequestItems={target_table.name: requests})
+            unprocessed = response.get('UnprocessedItems', {}).get(target_table.name, [])
+            deleted_count += len(requests) - len(unprocessed)
+            requests = unprocessed
+            if requests:
+                retries += 1
+                if retries > DELETE_MAX_RETRIES:
+                    raise RuntimeError(f"{target_table.name}: {len(requests)}개 항목 삭제 실패 (UnprocessedItems)")
+                time.sleep(min(0.025 * 2 ** (retries - 1), 1.0))
+
+    return deleted_count
 
-    session = response.get('Item')
-    if not session:
-        return None
 
+def add_message(session_id, sender, text, elapsed_time, inference=None, query_string=None, query_result=None):
+    """세션에 새 메시지 추가
+
+    세션을 먼저 조회하지 않고 세션 존재 조건(attribute_exists)을 건 UpdateItem 한 번으로
+    존재 확인과 수정 시간 갱신을 처리합니다. 메시지는 (타임스탬프, ID)를 키로 하는 별도
+    아이템이므로 동시에 추가되는 메시지가 서로를 덮어쓰지 않습니다.
+    """
     # 새 메시지 생성
     message_id = str(uuid.uuid4())
-    timestamp = datetime.datetime.now(KST).isoformat()
+    timestamp = message_timestamp(datetime.datetime.now(KST))
 
     message = {
         'id': message_id,
@@ -282,52 +416,181 @@ def add_message(session_id, sender, text, elapsed_time, inference=None, query_st
     if query_result is not None:
         message['query_result'] = query_result
 
-    # 메시지 추가 및 세션 업데이트 시간 변경
-    messages = session.get('messages', [])
-    messages.append(message)
-
-    table.update_item(
-        Key={'sessionId': session_id},
-        UpdateExpression="SET messages = :messages, updatedAt = :updatedAt",
-        ExpressionAttributeValues={
-            ':messages': messages,
-            ':updatedAt': timestamp
-        }
-    )
+    # 세션이 있을 때만 업데이트 시간 변경 (없으면 ConditionalCheckFailedException)
+    try:
+        table.update_item(
+            Key={'sessionId': session_id},
+            UpdateExpression="SET updatedAt = :updatedAt",
+            ConditionExpression="attribute_exists(sessionId)",
+            ExpressionAttributeValues={
+                ':updatedAt': timestamp
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+
+    # 메시지 아이템 추가
+    put_message(messages_table, session_id, message)
 
     return message
 
 
 def get_messages(session_id):
     """세션의 모든 메시지 조회"""
-    # 세션 정보 조회
-    response = table.get_item(
-        Key={'sessionId': session_id}
-    )
+    session, messages = load_session_messages(table, messages_table, session_id)
+    if session is None:
+        return None
 
-    session = response.get('Item')
+    # 이전 방식(세션 아이템의 messages 리스트)으로 저장된 메시지는 메시지 아이템으로 이전
+    migrate_messages(session_id, session.get('messages') or [])
+
+    return messages
+
+
+def migrate_messages(session_id, legacy_messages):
+    """세션 아이템의 messages 리스트를 메시지 아이템으로 이전 (실패해도 조회는 계속)"""
+    if not legacy_messages:
+        return
+    try:
+        migrate_legacy_messages(table, messages_table, session_id, legacy_messages)
+    except Exception as e:
+        print(f"메시지 이전 실패 (session {session_id}): {str(e)}")
+
+
+def parse_message_fields(fields):
+    """쉼표로 구분한 필드 목록 검증 (없으면 None = 전체 필드)"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in MESSAGE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown message fields: {', '.join(unknown)}")
+    return names
+
+
+def encode_cursor(last_key):
+    """LastEvaluatedKey를 URL에 넣을 수 있는 커서 문자열로 변환"""
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, session_id):
+    """커서 문자열을 이 세션의 ExclusiveStartKey로 변환"""
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return {'sessionId': session_id, 'messageKey': str(last_key['messageKey'])}
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def get_messages_page(session_id, limit=None, cursor=None, fields=None):
+    """
+    세션 메시지를 최신순으로 한 페이지 조회
+
+    Args:
+        limit: 페이지 크기 (기본 50, 최대 200)
+        cursor: 이전 페이지 응답의 nextCursor
+        fields: 반환할 필드 (예: "id,sender,text,timestamp"). id와 timestamp는
+            메시지별 상세 조회에 필요하므로 항상 포함
+
+    Returns:
+        {'messages': [...], 'nextCursor': 다음 페이지 커서 또는 None}. 세션이 없으면 None
+    """
+    try:
+        limit = min(int(limit), MAX_MESSAGE_PAGE_SIZE) if limit else DEFAULT_MESSAGE_PAGE_SIZE
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    projection = parse_message_fields(fields)
+    if projection:
+        projection = list(dict.fromkeys(['id', 'timestamp'] + projection))
+    start_key = decode_cursor(cursor, session_id) if cursor else None
+
+    # 세션 존재 확인 (이전 방식 메시지 리스트가 남아 있는지만 첫 원소로 확인)
+    session = table.get_item(
+        Key={'sessionId': session_id},
+        ProjectionExpression='sessionId, messages[0]'
+    ).get('Item')
     if not session:
         return None
 
-    # 메시지 반환
-    return session.get('messages', [])
+    # 이전 방식 메시지가 남아 있으면 먼저 메시지 아이템으로 이전해야 페이지 조회에 포함됨
+    # (이전은 멱등이므로 실패 시 오류를 반환하고 클라이언트가 다시 요청)
+    if session.get('messages'):
+        legacy = table.get_item(Key={'sessionId': session_id}, ProjectionExpression='messages').get('Item', {})
+        migrate_legacy_messages(table, messages_table, session_id, legacy.get('messages') or [])
+
+    items, last_key = query_messages(
+        messages_table, session_id,
+        newest_first=True, limit=limit, start_key=start_key, projection=projection
+    )
+
+    return {
+        'messages': [to_message(item) for item in items],
+        'nextCursor': encode_cursor(last_key)
+    }
+
+
+def get_message(session_id, message_id, timestamp=None, fields=None):
+    """
+    메시지 하나 조회
+
+    목록 조회에서 제외한 inference, query_result 같은 큰 필드를 메시지별로 가져올 때 사용합니다.
+    timestamp(목록 응답의 값)를 함께 주면 키로 바로 조회합니다.
+    """
+    projection = parse_message_fields(fields)
+    if projection:
+        projection = list(dict.fromkeys(['id'] + projection))
+
+    item = get_message_item(messages_table, session_id, message_id, timestamp=timestamp, projection=projection)
+    if item:
+        return to_message(item)
+
+    # 아직 이전되지 않은 세션은 세션 아이템의 messages 리스트에서 찾음
+    session = table.get_item(Key={'sessionId': session_id}, ProjectionExpression='messages').get('Item') or {}
+    for message in session.get('messages') or []:
+        if message.get('id') == message_id:
+            return {k: v for k, v in message.items() if not projection or k in projection}
+    return None
+
+
+def delete_session_segment(session_ids):
+    """세션 묶음 삭제: 메시지 아이템을 먼저 지우고 세션 아이템 삭제 (중간에 실패해도 다시 요청하면 이어서 삭제)"""
+    message_keys = [key for session_id in session_ids for key in message_item_keys(session_id)]
+    deleted_messages = batch_delete(messages_table, message_keys)
+    deleted_sessions = batch_delete(table, [{'sessionId': session_id} for session_id in session_ids])
+    return deleted_sessions, deleted_messages
 
 
 def delete_sessions_by_user(user_id):
-    """사용자 ID에 해당하는 모든 세션 삭제"""
-    # 사용자 ID에 해당하는 세션 조회
-    response = table.query(
-        IndexName='UserIdIndex',
-        KeyConditionExpression=Key('userId').eq(user_id)
-    )
+    """
+    사용자 ID에 해당하는 모든 세션 삭제
 
-    items = response.get('Items', [])
-    deleted_count = 0
+    UserIdIndex를 끝까지 페이지 조회해 세션 ID를 모은 뒤, 25개 단위 세션 묶음을
+    병렬로 BatchWriteItem 삭제합니다 (각 세션의 메시지 아이템 포함).
+    """
+    started = time.perf_counter()
 
-    for item in items:
-        session_id = item.get('sessionId')
-        if session_id:
-            table.delete_item(Key={'sessionId': session_id})
-            deleted_count += 1
+    # 사용자 ID에 해당하는 세션 ID 조회 (키만 조회)
+    session_ids = [item['sessionId'] for item in iter_user_sessions(user_id, projection=('sessionId',))]
+    segments = [session_ids[start:start + DELETE_BATCH_SIZE]
+                for start in range(0, len(session_ids), DELETE_BATCH_SIZE)]
 
-    return {'deletedCount': deleted_count}
\ No newline at end of file
+    deleted_count = 0
+    deleted_message_count = 0
+    if segments:
+        with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(segments))) as executor:
+            for deleted_sessions, deleted_messages in executor.map(delete_session_segment, segments):
+                deleted_count += deleted_sessions
+                deleted_message_count += deleted_messages
+
+    return {
+        'deletedCount': deleted_count,
+        'deletedMessageCount': deleted_message_count,
+        'elapsedMs': int((time.perf_counter() - started) * 1000)
+    }
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 재시도 대상 상태 코드 (529: Anthropic overloaded)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504, 529)
+
+# POST는 부수 효과가 있는 tools/call 등이 이미 처리됐을 수 있으므로
+# 서버가 요청을 처리하지 않고 거절했음을 뜻하는 상태 코드에서만 재시도
+POST_RETRY_STATUS_CODES = (429, 503, 529)
+
+# 기본 타임아웃 (연결, 읽기) - 초 단위
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+DEFAULT_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '170'))
+
+
+class MethodAwareRetry(Retry):
+    """
+    POST 요청은 POST_RETRY_STATUS_CODES 응답에서만 재시도하는 Retry
+
+    연결 오류(요청 전송 전)는 모든 메서드에서 재시도하고, 읽기/기타 오류는
+    create_http_session에서 재시도하지 않도록 설정한다.
+    """
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == 'POST':
+            return self._is_method_retryable(method) and status_code in POST_RETRY_STATUS_CODES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def create_http_session(pool_size: int = None, max_retries: int = None,
+                        backoff_factor: float = None) -> requests.Session:
+    """
+    keep-alive 연결 풀과 재시도 정책이 적용된 requests 세션 생성
+
+    MCP Function URL과 api.anthropic.com 호출이 TLS 연결을 재사용하도록
+    Lambda 컨테이너 단위로 하나만 만들어 공유한다.
+
+    Args:
+        pool_size: 호스트별 연결 풀 크기 (기본값: HTTP_POOL_SIZE 환경 변수 또는 10)
+        max_retries: 연결 오류 및 429/5xx 응답 시 최대 재시도 횟수, POST는 429/503/529 응답만
+            (기본값: HTTP_MAX_RETRIES 환경 변수 또는 3)
+        backoff_factor: 지수 백오프 계수 (기본값: HTTP_BACKOFF_FACTOR 환경 변수 또는 0.5)
+
+    Returns:
+        설정된 requests.Session
+    """
+    pool_size = pool_size or int(os.environ.get('HTTP_POOL_SIZE', '10'))
+    max_retries = max_retries if max_retries is not None else int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+    backoff_factor = backoff_factor if backoff_factor is not None else float(
+        os.environ.get('HTTP_BACKOFF_FACTOR', '0.5'))
+
+    retry = MethodAwareRetry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,  # 요청이 이미 처리됐을 수 있으므로 읽기 오류는 재시도하지 않음
+        other=0,  # 요청 전송 이후의 기타 오류도 같은 이유로 재시도하지 않음
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'POST', 'DELETE']),
+        respect_retry_after_header=True,
+        raise_on_status=False  # 재시도 후에도 실패하면 마지막 응답을 그대로 반환
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def default_timeout(read_timeout: float = None):
+    """
+    (연결, 읽기) 타임아웃 튜플 반환
+
+    Args:
+        read_timeout: 읽기 타임아웃 (기본값: HTTP_READ_TIMEOUT 환경 변수 또는 170초)
+
+    Returns:
+        requests timeout 튜플
+    """
+    return (DEFAULT_CONNECT_TIMEOUT, read_timeout or DEFAULT_READ_TIMEOUT)
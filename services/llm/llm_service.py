@@ -4,9 +4,14 @@ import requests
 import boto3
 import os
 import re
+import time
 from datetime import datetime, timezone
 from common.config import get_config
 from common.utils import invoke_bedrock_nova, cors_headers, cors_response
+from common.chat_messages import load_session_messages
+from http_session import create_http_session, default_timeout
+from mcp_state_store import MCPStateStore
+from mcp_client import tools_fingerprint
 from slack_sdk import WebClient
 
 # Lambda 환경에서 효율적인 재사용을 위한 클라이언트 캐싱
@@ -15,21 +20,31 @@ client = None
 # 클라이언트 캐시 저장을 위한 전역 변수
 client_cache = {}
 
+# 웜 호출 간 keep-alive 연결을 재사용하기 위한 공유 HTTP 세션
+http_session = None
+
+# 재사용 중인 도구 목록을 서버의 tools/list와 다시 비교하는 주기 (초)
+TOOLS_REVALIDATE_SECONDS = int(os.environ.get('MCP_TOOLS_REVALIDATE_SECONDS', '900'))
+
 # DynamoDB 설정 (안전하게 초기화)
 try:
     CONFIG = get_config()
     CHAT_HISTORY_TABLE = CONFIG.get('db', {}).get('chat_history_table')
+    CHAT_MESSAGES_TABLE = CONFIG.get('db', {}).get('chat_messages_table')
 
-    if CHAT_HISTORY_TABLE:
+    if CHAT_HISTORY_TABLE and CHAT_MESSAGES_TABLE:
         dynamodb = boto3.resource('dynamodb')
         chat_table = dynamodb.Table(CHAT_HISTORY_TABLE)
-        print(f"DynamoDB 테이블 연결 성공: {CHAT_HISTORY_TABLE}")
+        chat_messages_table = dynamodb.Table(CHAT_MESSAGES_TABLE)
+        print(f"DynamoDB 테이블 연결 성공: {CHAT_HISTORY_TABLE}, {CHAT_MESSAGES_TABLE}")
     else:
         chat_table = None
+        chat_messages_table = None
         print("DynamoDB 테이블 설정이 없습니다. 캐싱 기능을 비활성화합니다.")
 except Exception as e:
     print(f"DynamoDB 초기화 오류: {str(e)}")
     chat_table = None
+    chat_messages_table = None
 
 
 def get_anthropic_models():
@@ -53,9 +68,10 @@ def get_anthropic_models():
             "content-type": "application/json"
         }
 
-        response = requests.get(
+        response = get_http_session().get(
             "https://api.anthropic.com/v1/models",
-            headers=headers
+            headers=headers,
+            timeout=default_timeout()
         )
 
         if response.status_code != 200:
@@ -97,20 +113,12 @@ def get_session_messages_as_array(session_id: str) -> list:
             print("DynamoDB 테이블이 초기화되지 않았습니다.")
             return []
 
-        response = chat_table.get_item(
-            Key={'sessionId': session_id}
-        )
-
-        session = response.get('Item')
+        # 메시지 아이템과 이전 방식의 messages 리스트를 함께 시간순으로 조회
+        session, messages = load_session_messages(chat_table, chat_messages_table, session_id)
         if not session:
             print(f"세션을 찾을 수 없습니다: {session_id}")
             return []
 
-        messages = session.get('messages', [])
-
-        # 메시지를 시간순으로 정렬
-        messages.sort(key=lambda x: x.get('timestamp', ''))
-
         # Claude/Anthropic API 형식으로 변환
         formatted_messages = []
         for msg in messages:
@@ -136,6 +144,130 @@ def get_session_messages_as_array(session_id: str) -> list:
         return []
 
 
+def get_http_session():
+    """
+    컨테이너 단위로 공유되는 HTTP 세션을 가져오거나 생성
+    client_cache의 모든 클라이언트가 같은 연결 풀을 사용
+    """
+    global http_session
+
+    if http_session is None:
+        http_session = create_http_session()
+
+    return http_session
+
+
+def get_mcp_state_store(mcp_url: str):
+    """
+    MCP 세션/도구 목록 공유 저장소 생성 (MCP_CLIENT_STATE_TABLE 미설정 시 None)
+    """
+    table_name = os.environ.get('MCP_CLIENT_STATE_TABLE')
+    if not table_name or not mcp_url:
+        return None
+    return MCPStateStore(table_name, state_key=f"mcp#{mcp_url.rstrip('/')}")
+
+
+def refresh_mcp_tools(client, store=None, state_version=None):
+    """
+    서버의 현재 tools/list를 조회해 재사용 중인 도구 목록과 비교하고, 다르면 교체/저장
+
+    Args:
+        client: AnthropicMCPClient 또는 BedrockMCPClient
+        store: MCP 상태 저장소 (선택 사항)
+        state_version: 저장소 상태 version을 담은 {"version": ...} (저장 후 갱신됨)
+
+    Returns:
+        도구 목록이 바뀌었는지 여부
+    """
+    tools = client.mcp_client.list_tools()
+    client.tools_verified_at = time.time()
+    version = state_version.get("version") if state_version else None
+
+    if tools_fingerprint(tools) == tools_fingerprint(client.tools):
+        if store and version is not None:
+            store.mark_verified(version)
+        return False
+
+    print(f"MCP 도구 목록 변경 감지 - 도구 {len(client.tools)}개 → {len(tools)}개")
+    client.tools = tools
+    if store:
+        saved = store.save(client.mcp_client.session_id, tools, expected_version=version)
+        if saved and state_version is not None:
+            state_version["version"] = saved["version"]
+    return True
+
+
+def restore_or_initialize_mcp(client, mcp_url: str, model_id: str):
+    """
+    MCP 세션과 도구 목록을 재사용하거나 새로 초기화
+
+    재사용 순서: 같은 컨테이너의 다른 모델 클라이언트 → 공유 저장소(DynamoDB) → initialize/tools/list.
+    재사용한 세션이 만료(-32000)되면 MCPClient가 재초기화하고 새 세션 ID를 저장소에 기록한다.
+    재사용한 도구 목록은 TOOLS_REVALIDATE_SECONDS가 지났거나 서버가 알 수 없는 도구라고
+    응답하면 tools/list와 비교하여 다르면 교체하고 저장소에 다시 기록한다.
+
+    Args:
+        client: AnthropicMCPClient 또는 BedrockMCPClient
+        mcp_url: MCP 서버 URL
+        model_id: 모델 ID (로그용)
+    """
+    store = get_mcp_state_store(mcp_url)
+    state = None
+
+    # 같은 컨테이너에 이미 초기화된 클라이언트가 있으면 세션을 공유
+    for other_model_id, other in client_cache.items():
+        if other is not client and other.mcp_client.session_id and other.tools:
+            state = {"session_id": other.mcp_client.session_id, "tools": other.tools, "version": None,
+                     "verified_at": getattr(other, "tools_verified_at", 0)}
+            print(f"컨테이너 내 MCP 세션 재사용 - 모델 ID: {other_model_id}")
+            break
+
+    if state is None and store:
+        state = store.load()
+        if state:
+            print(f"공유 MCP 세션 재사용 - 버전: {state['version']}, ETag: {state['etag'][:12]}")
+
+    state_version = {"version": state.get("version") if state else None}
+
+    # 웜 컨테이너의 주기적 재확인(get_client)에서도 같은 저장소/버전을 사용
+    client.mcp_state_store = store
+    client.mcp_state_version = state_version
+
+    if state:
+        client.mcp_client.resume(state["session_id"])
+        client.tools = state["tools"]
+        client.tools_verified_at = state.get("verified_at") or 0
+        if time.time() - client.tools_verified_at > TOOLS_REVALIDATE_SECONDS:
+            try:
+                refresh_mcp_tools(client, store, state_version)
+            except Exception as e:
+                print(f"MCP 도구 목록 재확인 실패: {str(e)}")
+    else:
+        client.initialize()
+        client.tools_verified_at = time.time()
+        if store:
+            saved = store.save(client.mcp_client.session_id, client.tools)
+            state_version["version"] = saved.get("version") if saved else None
+
+    def refresh_unknown_tool(tool_name):
+        print(f"MCP 서버에 없는 도구 호출 ({tool_name}), 도구 목록을 다시 조회합니다.")
+        try:
+            refresh_mcp_tools(client, store, state_version)
+        except Exception as e:
+            print(f"MCP 도구 목록 재조회 실패: {str(e)}")
+
+    client.mcp_client.on_unknown_tool = refresh_unknown_tool
+
+    if store:
+        def persist_renewed_session(session_id):
+            saved = store.save(session_id, client.tools, expected_version=state_version["version"])
+            if saved:
+                state_version["version"] = saved["version"]
+            print(f"MCP 세션 재초기화 완료 - 모델 ID: {model_id}, 세션 ID: {session_id}")
+
+        client.mcp_client.on_session_renewed = persist_renewed_session
+
+
 def get_client(model_id: str = None):
     """
     MCP 클라이언트 인스턴스를 가져오거나 생성
@@ -164,7 +296,8 @@ def get_client(model_id: str = None):
             client_cache[model_id] = AnthropicMCPClient(
                 mcp_url=mcp_url,
                 api_key=anthropic_api_key,
-                model_id=model_id
+                model_id=model_id,
+                http_session=get_http_session()
             )
         else:
             # Bedrock 설정
@@ -177,55 +310,38 @@ def get_client(model_id: str = None):
                 mcp_url=mcp_url,
                 region=region,
                 auth_token=mcp_token,
-                model_id=model_id
+                model_id=model_id,
+                http_session=get_http_session()
             )
 
-        # 세션 초기화 및 도구 로드
-        client_cache[model_id].initialize()
+        # 세션 초기화 및 도구 로드 (공유 상태가 있으면 핸드셰이크 생략)
+        restore_or_initialize_mcp(client_cache[model_id], mcp_url, model_id)
 
         print(f"클라이언트 초기화 완료 - 모델 ID: {model_id}")
 
+    # 웜 컨테이너에서 오래 재사용한 도구 목록은 주기적으로 서버와 비교
+    elif time.time() - getattr(client_cache[model_id], "tools_verified_at", 0) > TOOLS_REVALIDATE_SECONDS:
+        cached = client_cache[model_id]
+        try:
+            refresh_mcp_tools(cached, getattr(cached, "mcp_state_store", None),
+                              getattr(cached, "mcp_state_version", None))
+        except Exception as e:
+            print(f"MCP 도구 목록 재확인 실패: {str(e)}")
+
     return client_cache[model_id]
 
 
-def handle_llm1_with_mcp(body, origin):
+def build_mcp_system_prompt(now):
     """
-    MCP 클라이언트를 사용하여 llm1 요청을 처리하고 도구 사용 과정 및 결과 포함
-    세션 기반 메시지 캐싱 지원 (개선된 messages 배열 방식)
+    MCP 도구 사용 에이전트용 시스템 프롬프트 생성
 
     Args:
-        body: 요청 본문
-        origin: CORS origin
+        now: 현재 UTC 시각
 
     Returns:
-        응답 객체 (도구 사용 과정 및 결과 포함)
+        시스템 프롬프트 문자열
     """
-    try:
-        # 요청 데이터 추출
-        user_input = body.get('question') or body.get('text') or body.get('input', {}).get('text', '')
-        session_id = body.get('sessionId')
-        is_cached = body.get('isCached', False)
-        model_id = body.get('modelId')
-        slack_user_id = body.get("user_id")
-        slack_previous_questions = body.get("previous_questions")
-        # 현재시간(한국)
-        now = datetime.now(timezone.utc)
-        print(f"=== 요청 분석 ===")
-        print(f"user_input: {user_input}")
-        print(f"session_id: {session_id}")
-        print(f"is_cached: {is_cached}")
-        print(f"model_id: {model_id}")
-        print(f"slack_user_id: {slack_user_id}")
-        print(f"slack 과거 기록: {len(slack_previous_questions) if slack_previous_questions else '없음'}")
-        print(f"chat_table 상태: {chat_table is not None}")
-        print(f"전체 body: {json.dumps(body, ensure_ascii=False)}")
-
-        if not user_input:
-            return cors_response(400, {"error": "사용자 입력이 제공되지 않았습니다."}, origin)
-
-
-        # 시스템 프롬프트 설정
-        system_prompt = f"""You are "AWS Cloud Agent" - an AWS-specialized AI assistant. Always respond in Korean.
+    return f"""You are "AWS Cloud Agent" - an AWS-specialized AI assistant. Always respond in Korean.
         The current time is UTC {now.strftime('%Y-%m-%d %H:%M:%S')}.
         Korean time is UTC+9.
         <Tools>
@@ -260,6 +376,119 @@ def handle_llm1_with_mcp(body, origin):
         </Rules>
         """
 
+
+def build_debug_info(debug_log, is_cached, session_id):
+    """
+    클라이언트 디버그 로그에서 응답용 inference 정보(도구 사용, 사고 과정, 토큰 사용량) 구성
+
+    Args:
+        debug_log: 클라이언트 디버그 로그
+        is_cached: 세션 캐싱 사용 여부
+        session_id: 채팅 세션 ID
+
+    Returns:
+        inference 딕셔너리
+    """
+    tools_used = []
+    reasoning_steps = []
+    token_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+    for entry in debug_log:
+        entry_type = entry.get("type")
+
+        if entry_type == "model_reasoning":
+            reasoning_steps.append({
+                "content": entry.get("content"),
+                "input_tokens": entry.get("input_tokens", 0),
+                "output_tokens": entry.get("output_tokens", 0),
+                "timestamp": entry.get("timestamp")
+            })
+        elif entry_type == "tool_result":
+            tools_used.append({
+                "tool_name": entry.get("tool_name"),
+                "input": entry.get("input")
+            })
+        elif entry_type in ["final_response", "final_response_with_history"]:
+            # 최종 응답에서 총 토큰 사용량 추출
+            token_usage = {
+                "input_tokens": entry.get("input_tokens", 0),
+                "output_tokens": entry.get("output_tokens", 0),
+                "cache_creation_input_tokens": entry.get("cache_creation_input_tokens", 0),
+                "cache_read_input_tokens": entry.get("cache_read_input_tokens", 0),
+            }
+            print(f"최종 토큰 사용량 추출: {token_usage}")
+
+    # 시간 순으로 정렬
+    reasoning_steps.sort(key=lambda x: x.get("timestamp", 0))
+    tools_used.sort(key=lambda x: x.get("timestamp", 0))
+
+    # 타임스탬프 정보는 제거
+    for step in reasoning_steps:
+        if "timestamp" in step:
+            del step["timestamp"]
+
+    for tool in tools_used:
+        if "timestamp" in tool:
+            del tool["timestamp"]
+
+    reasoning_content = []
+    for step in reasoning_steps:
+        reasoning_content.append({
+            "content": step.get("content"),
+            "input_tokens": step.get("input_tokens", 0),
+            "output_tokens": step.get("output_tokens", 0)
+        })
+
+    debug_info = {
+        "tools_used": tools_used,
+        "reasoning": reasoning_content,
+        "session_cached": is_cached and session_id is not None and chat_table is not None,
+        "session_id": session_id if is_cached else None,
+        "token_usage": token_usage
+    }
+
+    return debug_info
+
+
+def handle_llm1_with_mcp(body, origin):
+    """
+    MCP 클라이언트를 사용하여 llm1 요청을 처리하고 도구 사용 과정 및 결과 포함
+    세션 기반 메시지 캐싱 지원 (개선된 messages 배열 방식)
+
+    Args:
+        body: 요청 본문
+        origin: CORS origin
+
+    Returns:
+        응답 객체 (도구 사용 과정 및 결과 포함)
+    """
+    try:
+        # 요청 데이터 추출
+        user_input = body.get('question') or body.get('text') or body.get('input', {}).get('text', '')
+        session_id = body.get('sessionId')
+        is_cached = body.get('isCached', False)
+        model_id = body.get('modelId')
+        slack_user_id = body.get("user_id")
+        slack_previous_questions = body.get("previous_questions")
+        # 현재시간(한국)
+        now = datetime.now(timezone.utc)
+        print(f"=== 요청 분석 ===")
+        print(f"user_input: {user_input}")
+        print(f"session_id: {session_id}")
+        print(f"is_cached: {is_cached}")
+        print(f"model_id: {model_id}")
+        print(f"slack_user_id: {slack_user_id}")
+        print(f"slack 과거 기록: {len(slack_previous_questions) if slack_previous_questions else '없음'}")
+        print(f"chat_table 상태: {chat_table is not None}")
+        print(f"전체 body: {json.dumps(body, ensure_ascii=False)}")
+
+        if not user_input:
+            return cors_response(400, {"error": "사용자 입력이 제공되지 않았습니다."}, origin)
+
+
+        # 시스템 프롬프트 설정
+        system_prompt = build_mcp_system_prompt(now)
+
         # MCP 클라이언트 가져오기
         client = get_client(model_id)
 
@@ -317,61 +546,7 @@ def handle_llm1_with_mcp(body, origin):
         debug_log = client.get_debug_log() if hasattr(client, "get_debug_log") else []
 
         # 도구 사용 및 사고 과정 정리
-        tools_used = []
-        reasoning_steps = []
-        token_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
-
-        for entry in debug_log:
-            entry_type = entry.get("type")
-
-            if entry_type == "model_reasoning":
-                reasoning_steps.append({
-                    "content": entry.get("content"),
-                    "input_tokens": entry.get("input_tokens", 0),
-                    "output_tokens": entry.get("output_tokens", 0),
-                    "timestamp": entry.get("timestamp")
-                })
-            elif entry_type == "tool_result":
-                tools_used.append({
-                    "tool_name": entry.get("tool_name"),
-                    "input": entry.get("input")
-                })
-            elif entry_type in ["final_response", "final_response_with_history"]:
-                # 최종 응답에서 총 토큰 사용량 추출
-                token_usage = {
-                    "input_tokens": entry.get("input_tokens", 0),
-                    "output_tokens": entry.get("output_tokens", 0),
-                }
-                print(f"최종 토큰 사용량 추출: {token_usage}")
-
-        # 시간 순으로 정렬
-        reasoning_steps.sort(key=lambda x: x.get("timestamp", 0))
-        tools_used.sort(key=lambda x: x.get("timestamp", 0))
-
-        # 타임스탬프 정보는 제거
-        for step in reasoning_steps:
-            if "timestamp" in step:
-                del step["timestamp"]
-
-        for tool in tools_used:
-            if "timestamp" in tool:
-                del tool["timestamp"]
-
-        reasoning_content = []
-        for step in reasoning_steps:
-            reasoning_content.append({
-                "content": step.get("content"),
-                "input_tokens": step.get("input_tokens", 0),
-                "output_tokens": step.get("output_tokens", 0)
-            })
-
-        debug_info = {
-            "tools_used": tools_used,
-            "reasoning": reasoning_content,
-            "session_cached": is_cached and session_id is not None and chat_table is not None,
-            "session_id": session_id if is_cached else None,
-            "token_usage": token_usage
-        }
+        debug_info = build_debug_info(debug_log, is_cached, session_id)
 
         # 응답 시간 기록 및 경과 시간 계산
         response_time = datetime.now(timezone.utc)
@@ -413,6 +588,95 @@ def handle_llm1_with_mcp(body, origin):
         }, origin)
 
 
+def format_sse_event(event_type, data):
+    """
+    server-sent events 형식의 이벤트 문자열 생성
+
+    Args:
+        event_type: SSE event 이름
+        data: JSON으로 직렬화할 이벤트 데이터
+
+    Returns:
+        SSE 이벤트 문자열
+    """
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_llm1_with_mcp(body):
+    """
+    llm1 요청을 스트리밍 모드로 처리하여 SSE 이벤트 문자열을 순서대로 생성
+
+    이벤트 종류:
+        delta: 모델 텍스트 토큰 델타
+        tool_start / tool_finish: 도구 실행 시작/종료
+        done: 최종 응답, 경과 시간, inference 메타데이터
+        error: 처리 중 오류 (마지막 이벤트, 이후 done 없음)
+
+    Args:
+        body: 요청 본문
+
+    Yields:
+        SSE 이벤트 문자열
+    """
+    try:
+        user_input = body.get('question') or body.get('text') or body.get('input', {}).get('text', '')
+        session_id = body.get('sessionId')
+        is_cached = body.get('isCached', False)
+        model_id = body.get('modelId')
+
+        if not user_input:
+            yield format_sse_event("error", {"error": "사용자 입력이 제공되지 않았습니다."})
+            return
+
+        now = datetime.now(timezone.utc)
+        system_prompt = build_mcp_system_prompt(now)
+        client = get_client(model_id)
+        question_time = datetime.now(timezone.utc)
+
+        previous_messages = None
+        if is_cached and session_id and chat_table:
+            previous_messages = get_session_messages_as_array(session_id) or None
+
+        if hasattr(client, "stream_user_input"):
+            response_text = ""
+            for event in client.stream_user_input(user_input, system_prompt, previous_messages):
+                event_type = event.pop("type")
+                if event_type == "done":
+                    response_text = event.get("answer", "")
+                    continue
+                yield format_sse_event(event_type, event)
+                if event_type == "error":
+                    # 오류 이후에는 done 이벤트를 보내지 않음
+                    return
+        else:
+            # 스트리밍을 지원하지 않는 클라이언트(Bedrock)는 전체 응답을 한 번에 전달
+            if previous_messages:
+                response_text = client.process_user_input_with_history(user_input, system_prompt, previous_messages)
+            else:
+                response_text = client.process_user_input(user_input, system_prompt)
+            yield format_sse_event("delta", {"text": response_text})
+
+        debug_log = client.get_debug_log() if hasattr(client, "get_debug_log") else []
+        debug_info = build_debug_info(debug_log, is_cached, session_id)
+
+        elapsed = datetime.now(timezone.utc) - question_time
+        minutes, seconds = divmod(elapsed.total_seconds(), 60)
+        elapsed_str = f"{int(minutes)}분 {int(seconds)}초" if minutes else f"{int(seconds)}초"
+
+        yield format_sse_event("done", {
+            "answer": response_text,
+            "elapsed_time": elapsed_str,
+            "inference": debug_info
+        })
+
+    except Exception as e:
+        print(f"MCP 스트리밍 처리 중 오류: {str(e)}")
+        yield format_sse_event("error", {
+            "error": "MCP 처리 중 오류 발생",
+            "answer": str(e)
+        })
+
+
 def get_table_registry():
     dynamodb = boto3.resource("dynamodb")
     table_name = os.environ.get("ATHENA_TABLE_REGISTRY_TABLE")
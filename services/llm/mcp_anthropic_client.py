@@ -2,15 +2,19 @@ import json
 import time
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
-from mcp_client import MCPClient
+from mcp_client import MCPClient, tools_fingerprint
+from http_session import create_http_session, default_timeout
 
 
 class AnthropicMCPClient:
     """Anthropic API와 통합된 MCP 클라이언트 (SDK 없이 직접 API 호출)"""
 
     def __init__(self, mcp_url: str, api_key: str = None, model_id: str = None,
-                 session_id: str = None, max_retries: int = 5, max_iterations: int = 15):
+                 session_id: str = None, max_retries: int = 5, max_iterations: int = 15,
+                 max_tool_workers: int = 8, http_session: requests.Session = None, timeout=None,
+                 enable_prompt_cache: bool = True):
         """
         Anthropic MCP 클라이언트 초기화
 
@@ -21,8 +25,14 @@ class AnthropicMCPClient:
             session_id: 기존 세션 ID (선택 사항)
             max_retries: 작업 상태 확인을 위한 최대 재시도 횟수
             max_iterations: 도구 호출을 위한 최대 반복 횟수
+            max_tool_workers: 한 턴에서 동시에 실행할 최대 도구 호출 수
+            http_session: MCP 및 Anthropic 호출에 공유할 HTTP 세션 (선택 사항)
+            timeout: Anthropic API (연결, 읽기) 타임아웃 (선택 사항)
+            enable_prompt_cache: 도구 목록, 시스템 프롬프트, 대화 접두부에 cache_control 적용 여부
         """
-        self.mcp_client = MCPClient(mcp_url, None, session_id)
+        self.http_session = http_session or create_http_session()
+        self.timeout = timeout or default_timeout()
+        self.mcp_client = MCPClient(mcp_url, None, session_id, http_session=self.http_session)
         self.model_id = model_id or 'claude-3-7-sonnet-20250219'
         self.api_key = api_key
         self.api_url = "https://api.anthropic.com/v1/messages"
@@ -32,15 +42,27 @@ class AnthropicMCPClient:
             "content-type": "application/json"
         }
         self.tools = []
+        # 변환된 도구 스키마 캐시 (도구 목록 해시가 바뀔 때만 재생성)
+        self.tools_hash = None
+        self.tools_version = 0
+        self._tools_source = None
+        self._anthropic_tools = []
+        self._anthropic_tools_cached = []
+        self._tools_json = "[]"
         self.messages = []
         self.max_retries = max_retries
         self.max_iterations = max_iterations
+        self.max_tool_workers = max(1, max_tool_workers)
         self.pending_tasks = {}  # 대기 중인 작업 ID 및 상태 추적
         self.system_prompt = None
         self.debug_log = []  # 디버그 로그 추가 - 사고 과정과 도구 사용 추적
         # 토큰 사용량 누적 추적
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        # 프롬프트 캐시 토큰 사용량 누적 추적 (생성 = 캐시 미스, 읽기 = 캐시 히트)
+        self.enable_prompt_cache = enable_prompt_cache
+        self.total_cache_creation_tokens = 0
+        self.total_cache_read_tokens = 0
 
     def initialize(self) -> str:
         """
@@ -53,13 +75,21 @@ class AnthropicMCPClient:
         self.tools = self.mcp_client.list_tools()
         return session_id
 
-    def _convert_tools_format(self):
+    def _refresh_tool_schema(self):
         """
-        MCP 도구 형식을 Anthropic 도구 형식으로 변환
+        self.tools가 바뀐 경우에만 Anthropic 도구 스키마와 직렬화된 JSON 조각을 재생성
 
-        Returns:
-            Anthropic API 형식의 도구 목록
+        도구 목록 해시가 같으면 기존 변환 결과를 그대로 사용하므로
+        요청마다 도구 블록이 바이트 단위로 동일하게 유지된다 (프롬프트 캐시 히트 조건).
         """
+        if self._tools_source is self.tools:
+            return
+
+        self._tools_source = self.tools
+        tools_hash = tools_fingerprint(self.tools)
+        if tools_hash == self.tools_hash:
+            return
+
         anthropic_tools = []
         for tool in self.tools:
             # MCP 입력 스키마를 Anthropic 입력 스키마로 변환
@@ -80,7 +110,100 @@ class AnthropicMCPClient:
                 }
             })
 
-        return anthropic_tools
+        self._anthropic_tools = anthropic_tools
+        # 프롬프트 캐시 브레이크포인트가 적용된 버전도 미리 구성
+        self._anthropic_tools_cached = anthropic_tools[:-1] + [
+            {**anthropic_tools[-1], "cache_control": {"type": "ephemeral"}}
+        ] if anthropic_tools else []
+        sent_tools = self._anthropic_tools_cached if self.enable_prompt_cache else self._anthropic_tools
+        self._tools_json = json.dumps(sent_tools, ensure_ascii=False)
+        self.tools_hash = tools_hash
+        self.tools_version += 1
+
+        print(f"도구 스키마 캐시 갱신 - 버전: {self.tools_version}, 도구 수: {len(anthropic_tools)}")
+
+    def _convert_tools_format(self):
+        """
+        MCP 도구 형식을 Anthropic 도구 형식으로 변환 (변환 결과 캐시 사용)
+
+        Returns:
+            Anthropic API 형식의 도구 목록
+        """
+        self._refresh_tool_schema()
+        return self._anthropic_tools
+
+    def _encode_payload(self, payload: Dict[str, Any]) -> bytes:
+        """
+        프롬프트 캐시를 적용한 요청 본문을 JSON 바이트로 직렬화
+
+        도구 목록이 캐시된 스키마인 경우 미리 직렬화한 JSON 조각을 이어 붙여
+        매 요청마다 도구 스키마를 다시 직렬화하지 않는다.
+
+        Args:
+            payload: API 요청 페이로드
+
+        Returns:
+            UTF-8 JSON 요청 본문
+        """
+        tools = payload.get("tools")
+        if tools is None or tools is not self._anthropic_tools:
+            return json.dumps(self._with_prompt_cache(payload), ensure_ascii=False).encode("utf-8")
+
+        rest = self._with_prompt_cache({key: value for key, value in payload.items() if key != "tools"})
+        body = json.dumps(rest, ensure_ascii=False)
+        return f'{{"tools":{self._tools_json},{body[1:]}'.encode("utf-8")
+
+    def _with_prompt_cache(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        요청 페이로드에 프롬프트 캐시 브레이크포인트(cache_control) 추가
+
+        캐시 접두부 순서(tools → system → messages)에 맞춰 마지막 도구, 시스템 프롬프트,
+        마지막 메시지에 브레이크포인트를 둔다. 다음 반복에서는 직전 요청까지의 접두부가
+        캐시에서 읽힌다. self.messages 원본은 변경하지 않는다.
+
+        Args:
+            payload: API 요청 페이로드
+
+        Returns:
+            cache_control이 적용된 페이로드 사본
+        """
+        if not self.enable_prompt_cache:
+            return payload
+
+        cache_control = {"type": "ephemeral"}
+        cached = dict(payload)
+
+        tools = payload.get("tools")
+        if tools is self._anthropic_tools:
+            cached["tools"] = self._anthropic_tools_cached
+        elif tools:
+            cached["tools"] = tools[:-1] + [{**tools[-1], "cache_control": cache_control}]
+
+        system = payload.get("system")
+        if isinstance(system, str) and system:
+            cached["system"] = [{"type": "text", "text": system, "cache_control": cache_control}]
+
+        messages = payload.get("messages")
+        if messages:
+            last = messages[-1]
+            content = last.get("content")
+            if isinstance(content, str) and content:
+                content = [{"type": "text", "text": content, "cache_control": cache_control}]
+            elif isinstance(content, list) and content:
+                content = content[:-1] + [{**content[-1], "cache_control": cache_control}]
+            cached["messages"] = messages[:-1] + [{**last, "content": content}]
+
+        return cached
+
+    def _add_cache_usage(self, usage: Dict[str, Any]):
+        """
+        응답 usage의 프롬프트 캐시 토큰 수를 누적
+
+        Args:
+            usage: Anthropic 응답 usage 딕셔너리
+        """
+        self.total_cache_creation_tokens += usage.get("cache_creation_input_tokens", 0) or 0
+        self.total_cache_read_tokens += usage.get("cache_read_input_tokens", 0) or 0
 
     def _is_response_complete(self, message_content: str, tool_uses: List) -> bool:
         """
@@ -380,10 +503,11 @@ class AnthropicMCPClient:
                 payload["system"] = self.system_prompt
 
             # API 요청 전송
-            response = requests.post(
+            response = self.http_session.post(
                 self.api_url,
                 headers=self.api_headers,
-                json=payload
+                data=self._encode_payload(payload),
+                timeout=self.timeout
             )
 
             # 응답 파싱
@@ -402,6 +526,7 @@ class AnthropicMCPClient:
                 output_tokens = usage.get("output_tokens", 0)
                 self.total_input_tokens += input_tokens
                 self.total_output_tokens += output_tokens
+                self._add_cache_usage(usage)
 
                 # 디버그 로그에 최종 분석 응답 기록 (토큰 사용량 포함)
                 self.debug_log.append({
@@ -482,10 +607,11 @@ class AnthropicMCPClient:
                 payload["system"] = self.system_prompt
 
             # API 요청 전송
-            response = requests.post(
+            response = self.http_session.post(
                 self.api_url,
                 headers=self.api_headers,
-                json=payload
+                data=self._encode_payload(payload),
+                timeout=self.timeout
             )
 
             # 응답 파싱
@@ -504,6 +630,7 @@ class AnthropicMCPClient:
                 output_tokens = usage.get("output_tokens", 0)
                 self.total_input_tokens += input_tokens
                 self.total_output_tokens += output_tokens
+                self._add_cache_usage(usage)
 
                 # 디버그 로그에 상태 업데이트 응답 기록 (토큰 사용량 포함)
                 self.debug_log.append({
@@ -544,6 +671,140 @@ class AnthropicMCPClient:
                     }
                 }
 
+    def _call_single_tool(self, tool_use: Dict[str, Any]):
+        """
+        단일 도구 호출 실행 (워커 스레드에서 실행됨)
+
+        디버그 로그는 스레드 간 순서가 섞이지 않도록 직접 추가하지 않고
+        호출 결과와 함께 반환하여 호출 측에서 요청 순서대로 기록한다.
+
+        Args:
+            tool_use: Anthropic tool_use 블록
+
+        Returns:
+            (도구 결과, 디버그 로그 항목 목록) 튜플
+        """
+        debug_entries = []
+
+        # 도구 정보 추출
+        tool_use_id = tool_use.get("id")
+        tool_name = tool_use.get("name")
+        tool_input = tool_use.get("input", {})
+
+        try:
+            print(f"도구 호출: {tool_name}, 입력: {json.dumps(tool_input, ensure_ascii=False)}")
+
+            # 디버그 로그에 도구 사용 요청 기록
+            debug_entries.append({
+                "type": "tool_result",
+                "tool_name": tool_name,
+                "input": tool_input,
+                "timestamp": time.time()
+            })
+
+            # MCP 도구 호출
+            result = self.mcp_client.call_tool(
+                tool_name,
+                tool_input
+            )
+
+            print(f"도구 결과: {json.dumps(result, ensure_ascii=False)[:200]}...")
+
+            # 디버그 로그에 도구 결과 기록
+            debug_entries.append({
+                "type": "tool_result",
+                "tool_name": tool_name,
+                "input": tool_input,
+                "output": result,
+                "timestamp": time.time()
+            })
+
+            return {
+                "tool_id": tool_use_id,
+                "name": tool_name,
+                "result": result
+            }, debug_entries
+        except Exception as e:
+            # 오류 처리
+            print(f"도구 호출 오류: {str(e)}")
+
+            # 디버그 로그에 도구 오류 기록
+            debug_entries.append({
+                "type": "tool_error",
+                "tool_name": tool_name,
+                "input": tool_input,
+                "error": str(e),
+                "timestamp": time.time()
+            })
+
+            return {
+                "tool_id": tool_use_id,
+                "name": tool_name,
+                "error": str(e)
+            }, debug_entries
+
+    def _execute_tool_uses(self, tool_uses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        한 턴의 도구 호출을 스레드 풀로 동시에 실행
+
+        전체 대기 시간은 호출 시간의 합이 아니라 가장 느린 호출 시간이 된다.
+        결과와 디버그 로그는 모델이 요청한 tool_use 순서대로 유지된다.
+
+        Args:
+            tool_uses: Anthropic tool_use 블록 목록
+
+        Returns:
+            tool_uses와 같은 순서의 도구 결과 목록
+        """
+        if len(tool_uses) <= 1 or self.max_tool_workers == 1:
+            outcomes = [self._call_single_tool(tool_use) for tool_use in tool_uses]
+        else:
+            workers = min(self.max_tool_workers, len(tool_uses))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # executor.map은 입력 순서대로 결과를 반환
+                outcomes = list(executor.map(self._call_single_tool, tool_uses))
+
+        tool_results = []
+        for tool_result, debug_entries in outcomes:
+            self.debug_log.extend(debug_entries)
+            tool_results.append(tool_result)
+
+        return tool_results
+
+    def _build_tool_result_message(self, tool_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        도구 결과 목록을 Anthropic tool_result user 메시지로 변환
+
+        Args:
+            tool_results: _execute_tool_uses 결과 목록
+
+        Returns:
+            tool_result 블록 목록을 담은 user 메시지
+        """
+        tool_results_list = []
+        for res in tool_results:
+            # determine content value and ensure it's a string
+            if "error" in res:
+                content_value = str(res.get("error"))
+            else:
+                result = res.get("result")
+                # Convert result to string if it's not already
+                if isinstance(result, dict) or isinstance(result, list):
+                    content_value = json.dumps(result, ensure_ascii=False)
+                else:
+                    content_value = str(result)
+
+            tool_results_list.append({
+                "type": "tool_result",
+                "tool_use_id": res["tool_id"],
+                "content": content_value
+            })
+
+        return {
+            "role": "user",
+            "content": tool_results_list
+        }
+
     def invoke_with_tools(self, prompt: str, system_prompt: str = None, previous_messages: list = None) -> Dict[
         str, Any]:
         """
@@ -577,6 +838,8 @@ class AnthropicMCPClient:
         # 토큰 사용량 초기화
         self.total_input_tokens = 0
         self.total_output_tokens = 0
+        self.total_cache_creation_tokens = 0
+        self.total_cache_read_tokens = 0
 
         # 디버그 로그에 사용자 입력 기록
         self.debug_log.append({
@@ -655,10 +918,11 @@ class AnthropicMCPClient:
             print(f"API 요청 페이로드: {json.dumps(payload, indent=2, ensure_ascii=False)[:500]}...")
 
             # API 요청 전송
-            response = requests.post(
+            response = self.http_session.post(
                 self.api_url,
                 headers=self.api_headers,
-                json=payload
+                data=self._encode_payload(payload),
+                timeout=self.timeout
             )
 
             # 디버깅을 위한 응답 로깅
@@ -696,6 +960,7 @@ class AnthropicMCPClient:
             output_tokens = usage.get("output_tokens", 0)
             self.total_input_tokens += input_tokens
             self.total_output_tokens += output_tokens
+            self._add_cache_usage(usage)
 
             print(f"이번 반복 토큰 사용량: 입력={input_tokens}, 출력={output_tokens}")
             print(f"누적 토큰 사용량: 입력={self.total_input_tokens}, 출력={self.total_output_tokens}")
@@ -748,91 +1013,11 @@ class AnthropicMCPClient:
                     "content": tool_uses
                 })
 
-                # 각 도구에 대해 MCP 도구 호출
-                tool_results = []
-                for tool_use in tool_uses:
-                    try:
-                        # 도구 정보 추출
-                        tool_use_id = tool_use.get("id")
-                        tool_name = tool_use.get("name")
-                        tool_input = tool_use.get("input", {})
-
-                        print(f"도구 호출: {tool_name}, 입력: {json.dumps(tool_input, ensure_ascii=False)}")
-
-                        # 디버그 로그에 도구 사용 요청 기록
-                        self.debug_log.append({
-                            "type": "tool_result",
-                            "tool_name": tool_name,
-                            "input": tool_input,
-                            "timestamp": time.time()
-                        })
-
-                        # MCP 도구 호출
-                        result = self.mcp_client.call_tool(
-                            tool_name,
-                            tool_input
-                        )
-
-                        print(f"도구 결과: {json.dumps(result, ensure_ascii=False)[:200]}...")
-
-                        # 디버그 로그에 도구 결과 기록
-                        self.debug_log.append({
-                            "type": "tool_result",
-                            "tool_name": tool_name,
-                            "input": tool_input,
-                            "output": result,
-                            "timestamp": time.time()
-                        })
-
-                        # 도구 결과를 저장
-                        tool_results.append({
-                            "tool_id": tool_use_id,
-                            "name": tool_name,
-                            "result": result
-                        })
-                    except Exception as e:
-                        # 오류 처리
-                        print(f"도구 호출 오류: {str(e)}")
-
-                        # 디버그 로그에 도구 오류 기록
-                        self.debug_log.append({
-                            "type": "tool_error",
-                            "tool_name": tool_name,
-                            "input": tool_input,
-                            "error": str(e),
-                            "timestamp": time.time()
-                        })
+                # 각 도구에 대해 MCP 도구 호출 (한 턴의 도구 호출은 동시에 실행)
+                tool_results = self._execute_tool_uses(tool_uses)
 
-                        tool_results.append({
-                            "tool_id": tool_use_id,
-                            "name": tool_name,
-                            "error": str(e)
-                        })
-
-                # Append user tool_result message in the required format
-                tool_results_list = []
-                for res in tool_results:
-                    # determine content value and ensure it's a string
-                    if "error" in res:
-                        content_value = str(res.get("error"))
-                    else:
-                        result = res.get("result")
-                        # Convert result to string if it's not already
-                        if isinstance(result, dict) or isinstance(result, list):
-                            content_value = json.dumps(result, ensure_ascii=False)
-                        else:
-                            content_value = str(result)
-
-                    tool_results_list.append({
-                        "type": "tool_result",
-                        "tool_use_id": res["tool_id"],
-                        "content": content_value
-                    })
                 # Save as a single user message with a list of tool_result objects
-                self.messages.append({
-                    "role": "user",
-                    "content": tool_results_list
-                })
+                self.messages.append(self._build_tool_result_message(tool_results))
                 continue  # proceed to next iteration
 
             # 도구 호출이 없으면 마지막 assistant 응답을 즉시 반환
@@ -857,6 +1042,306 @@ class AnthropicMCPClient:
             }
         }
 
+    def _stream_message(self, payload: Dict[str, Any]):
+        """
+        Anthropic Messages API를 stream 모드로 호출하고 SSE 이벤트를 파싱
+
+        텍스트 델타는 도착하는 즉시 {"type": "delta"} 이벤트로 전달하고,
+        스트림이 끝나면 완성된 content 블록과 토큰 사용량을 반환한다.
+
+        Args:
+            payload: API 요청 페이로드 (stream 필드는 여기서 설정)
+
+        Yields:
+            {"type": "delta", "text": ...} 이벤트
+
+        Returns:
+            (content 블록 목록, usage 딕셔너리) 튜플, API 오류 시 None
+        """
+        response = self.http_session.post(
+            self.api_url,
+            headers=self.api_headers,
+            data=self._encode_payload({**payload, "stream": True}),
+            stream=True,
+            timeout=self.timeout
+        )
+
+        if response.status_code != 200:
+            error_message = f"Anthropic API 오류: {response.status_code} - {response.text}"
+
+            # 디버그 로그에 API 오류 기록
+            self.debug_log.append({
+                "type": "api_error",
+                "error": error_message,
+                "timestamp": time.time()
+            })
+            return None
+
+        blocks = {}
+        usage = {"input_tokens": 0, "output_tokens": 0}
+
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                # SSE의 event: 라인은 data의 type 필드와 중복되므로 data 라인만 처리
+                if not line or not line.startswith("data:"):
+                    continue
+
+                event = json.loads(line[len("data:"):].strip())
+                event_type = event.get("type")
+
+                if event_type == "message_start":
+                    usage.update(event.get("message", {}).get("usage", {}))
+                elif event_type == "content_block_start":
+                    block = dict(event.get("content_block", {}))
+                    if block.get("type") == "tool_use":
+                        block["partial_json"] = ""
+                    blocks[event.get("index")] = block
+                elif event_type == "content_block_delta":
+                    block = blocks.get(event.get("index"))
+                    delta = event.get("delta", {})
+                    if block is None:
+                        continue
+                    if delta.get("type") == "text_delta":
+                        block["text"] = block.get("text", "") + delta.get("text", "")
+                        yield {"type": "delta", "text": delta.get("text", "")}
+                    elif delta.get("type") == "input_json_delta":
+                        block["partial_json"] += delta.get("partial_json", "")
+                elif event_type == "message_delta":
+                    usage.update(event.get("usage", {}))
+                elif event_type == "error":
+                    raise Exception(event.get("error", {}).get("message", "스트림 오류"))
+        except Exception as e:
+            error_message = f"Anthropic 스트림 오류: {str(e)}"
+
+            # 디버그 로그에 API 오류 기록
+            self.debug_log.append({
+                "type": "api_error",
+                "error": error_message,
+                "timestamp": time.time()
+            })
+            return None
+        finally:
+            response.close()
+
+        # 블록 인덱스 순서대로 최종 content 구성 (tool_use 입력 JSON 조립)
+        content = []
+        for index in sorted(blocks):
+            block = blocks[index]
+            if block.get("type") == "tool_use":
+                partial_json = block.pop("partial_json", "")
+                block["input"] = json.loads(partial_json) if partial_json else {}
+            content.append(block)
+
+        return content, usage
+
+    def stream_with_tools(self, prompt: str, system_prompt: str = None, previous_messages: list = None):
+        """
+        invoke_with_tools의 스트리밍 버전
+
+        모델 응답 텍스트, 도구 실행 시작/종료를 이벤트로 전달한다.
+        messages, 디버그 로그, 토큰 누적은 invoke_with_tools와 동일하게 갱신된다.
+
+        Args:
+            prompt: 사용자 프롬프트
+            system_prompt: 시스템 프롬프트 (선택 사항)
+            previous_messages: 이전 대화 기록 (messages 배열 형식, 선택 사항)
+
+        Yields:
+            delta / tool_start / tool_finish / error 이벤트 딕셔너리
+
+        Returns:
+            정상 종료 시 True, API 오류로 error 이벤트를 보내고 중단한 경우 False
+        """
+        # 세션 및 도구가 초기화되지 않은 경우
+        if not self.tools:
+            self.initialize()
+
+        # 시스템 프롬프트 저장 (나중에 재사용)
+        if system_prompt:
+            self.system_prompt = system_prompt
+
+        # 메시지 배열 초기화 - 이전 대화 기록 포함
+        if previous_messages:
+            self.messages = previous_messages.copy()
+        else:
+            self.messages = []
+
+        # 토큰 사용량 초기화
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        self.total_cache_creation_tokens = 0
+        self.total_cache_read_tokens = 0
+
+        # 디버그 로그에 사용자 입력 기록
+        self.debug_log.append({
+            "type": "user_input",
+            "content": prompt,
+            "previous_messages_count": len(self.messages) if previous_messages else 0,
+            "timestamp": time.time()
+        })
+
+        # 현재 사용자 입력 추가 (중복 방지)
+        if not (self.messages and self.messages[-1].get("role") == "user" and self.messages[-1].get(
+                "content") == prompt):
+            self.messages.append({
+                "role": "user",
+                "content": prompt
+            })
+
+        # Anthropic 도구 형식으로 변환
+        anthropic_tools = self._convert_tools_format()
+
+        iteration = 0
+        while iteration < self.max_iterations:
+            iteration += 1
+
+            # 디버그 로그에 반복 정보 기록
+            self.debug_log.append({
+                "type": "iteration_start",
+                "iteration": iteration,
+                "timestamp": time.time()
+            })
+
+            payload = {
+                "model": self.model_id,
+                "max_tokens": 8192,
+                "messages": self.messages
+            }
+            # 마지막 반복에서는 도구 호출 중지
+            if iteration == self.max_iterations - 1:
+                payload["tool_choice"] = {"type": "none"}
+            else:
+                payload["tool_choice"] = {"type": "auto"}
+
+            if anthropic_tools:
+                payload["tools"] = anthropic_tools
+
+            if system_prompt:
+                payload["system"] = system_prompt
+
+            streamed = yield from self._stream_message(payload)
+            if streamed is None:
+                yield {"type": "error", "error": self.debug_log[-1].get("error")}
+                return False
+
+            content, usage = streamed
+
+            # 토큰 사용량 추출 및 누적
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self._add_cache_usage(usage)
+
+            message_content = "".join(item.get("text", "") for item in content if item.get("type") == "text")
+            tool_uses = [item for item in content if item.get("type") == "tool_use"]
+
+            # 디버그 로그에 모델 응답 기록 (토큰 사용량 포함)
+            if message_content:
+                self.debug_log.append({
+                    "type": "model_reasoning",
+                    "content": message_content,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "timestamp": time.time()
+                })
+                self.messages.append({
+                    "role": "assistant",
+                    "content": message_content
+                })
+
+            if not tool_uses:
+                return True
+
+            # 디버그 로그에 도구 사용 요청 기록
+            self.debug_log.append({
+                "type": "tool_use_requests",
+                "count": len(tool_uses),
+                "timestamp": time.time()
+            })
+
+            self.messages.append({
+                "role": "assistant",
+                "content": tool_uses
+            })
+
+            for tool_use in tool_uses:
+                yield {
+                    "type": "tool_start",
+                    "tool_id": tool_use.get("id"),
+                    "tool_name": tool_use.get("name"),
+                    "input": tool_use.get("input", {})
+                }
+
+            tool_results = self._execute_tool_uses(tool_uses)
+
+            for res in tool_results:
+                yield {
+                    "type": "tool_finish",
+                    "tool_id": res["tool_id"],
+                    "tool_name": res["name"],
+                    "status": "error" if "error" in res else "success"
+                }
+
+            self.messages.append(self._build_tool_result_message(tool_results))
+
+        return True
+
+    def stream_user_input(self, user_input: str, system_prompt: str = None, previous_messages: list = None):
+        """
+        사용자 입력을 스트리밍으로 처리
+
+        process_user_input / process_user_input_with_history와 같은 디버그 로그를 남기며,
+        마지막에 최종 텍스트를 담은 {"type": "done"} 이벤트를 전달한다.
+        API 오류로 error 이벤트가 전달된 경우에는 done 이벤트 없이 종료한다.
+
+        Args:
+            user_input: 사용자 질문/입력
+            system_prompt: 시스템 프롬프트 (선택 사항)
+            previous_messages: 이전 대화 기록 (messages 배열 형식, 선택 사항)
+
+        Yields:
+            stream_with_tools 이벤트와 마지막 done 이벤트 (오류 시 error 이벤트로 종료)
+        """
+        # 시스템 프롬프트 저장
+        if system_prompt:
+            self.system_prompt = system_prompt
+
+        # 디버그 로그 초기화
+        self.debug_log = []
+
+        # 디버그 로그에 처리 시작 기록
+        self.debug_log.append({
+            "type": "process_start_with_history" if previous_messages else "process_start",
+            "user_input": user_input,
+            "previous_messages_count": len(previous_messages) if previous_messages else 0,
+            "timestamp": time.time()
+        })
+
+        completed = yield from self.stream_with_tools(user_input, system_prompt, previous_messages)
+        if not completed:
+            return
+
+        # 메시지 배열에서 마지막 assistant 텍스트 응답 찾기
+        final_text = ""
+        for message in reversed(self.messages):
+            if message.get("role") == "assistant" and isinstance(message.get("content"), str):
+                final_text = message["content"]
+                break
+
+        # 디버그 로그에 최종 응답 기록 (총 토큰 사용량 포함)
+        self.debug_log.append({
+            "type": "final_response_with_history" if previous_messages else "final_response",
+            "content": final_text,
+            "input_tokens": self.total_input_tokens,
+            "output_tokens": self.total_output_tokens,
+            "cache_creation_input_tokens": self.total_cache_creation_tokens,
+            "cache_read_input_tokens": self.total_cache_read_tokens,
+            "timestamp": time.time()
+        })
+
+        yield {"type": "done", "answer": final_text}
+
     def _extract_text_from_response(self, response):
         """
         응답에서 텍스트 추출
@@ -936,7 +1421,8 @@ class AnthropicMCPClient:
 
         # 최종 텍스트 로깅 추가
         print(f"최종 응답 반환: {final_text[:200]}...")
-        print(f"총 토큰 사용량: 입력={self.total_input_tokens}, 출력={self.total_output_tokens}")
+        print(f"총 토큰 사용량: 입력={self.total_input_tokens}, 출력={self.total_output_tokens}, "
+              f"캐시 생성={self.total_cache_creation_tokens}, 캐시 읽기={self.total_cache_read_tokens}")
 
         # 디버그 로그에 최종 응답 기록 (총 토큰 사용량 포함)
         self.debug_log.append({
@@ -944,6 +1430,8 @@ class AnthropicMCPClient:
             "content": final_text,
             "input_tokens": self.total_input_tokens,
             "output_tokens": self.total_output_tokens,
+            "cache_creation_input_tokens": self.total_cache_creation_tokens,
+            "cache_read_input_tokens": self.total_cache_read_tokens,
             "timestamp": time.time()
         })
 
@@ -1002,7 +1490,8 @@ class AnthropicMCPClient:
 
         # 최종 텍스트 로깅 추가
         print(f"최종 응답 반환 (히스토리 포함): {final_text[:200]}...")
-        print(f"총 토큰 사용량: 입력={self.total_input_tokens}, 출력={self.total_output_tokens}")
+        print(f"총 토큰 사용량: 입력={self.total_input_tokens}, 출력={self.total_output_tokens}, "
+              f"캐시 생성={self.total_cache_creation_tokens}, 캐시 읽기={self.total_cache_read_tokens}")
 
         # 디버그 로그에 최종 응답 기록 (총 토큰 사용량 포함)
         self.debug_log.append({
@@ -1010,6 +1499,8 @@ class AnthropicMCPClient:
             "content": final_text,
             "input_tokens": self.total_input_tokens,
             "output_tokens": self.total_output_tokens,
+            "cache_creation_input_tokens": self.total_cache_creation_tokens,
+            "cache_read_input_tokens": self.total_cache_read_tokens,
             "timestamp": time.time()
         })
 
@@ -3,14 +3,14 @@ import time
 import boto3
 import re
 from typing import Dict, Any, List, Optional
-from mcp_client import MCPClient
+from mcp_client import MCPClient, tools_fingerprint
 
 
 class BedrockMCPClient:
     """Bedrock과 통합된 MCP 클라이언트"""
 
     def __init__(self, mcp_url: str, region: str = None, auth_token: str = None, model_id: str = None,
-                 session_id: str = None, max_retries: int = 5, max_iterations: int = 10):
+                 session_id: str = None, max_retries: int = 5, max_iterations: int = 10, http_session=None):
         """
         Bedrock MCP 클라이언트 초기화
 
@@ -22,8 +22,9 @@ class BedrockMCPClient:
             session_id: 기존 세션 ID (선택 사항)
             max_retries: 작업 상태 확인을 위한 최대 재시도 횟수
             max_iterations: 도구 호출을 위한 최대 반복 횟수
+            http_session: MCP 호출에 공유할 HTTP 세션 (선택 사항)
         """
-        self.mcp_client = MCPClient(mcp_url, auth_token, session_id)
+        self.mcp_client = MCPClient(mcp_url, auth_token, session_id, http_session=http_session)
         self.region = region or boto3.session.Session().region_name
         self.model_id = model_id or 'anthropic.claude-3-haiku-20240307-v1:0'
         self.bedrock_client = boto3.client('bedrock-runtime', region_name=self.region)
@@ -34,6 +35,7 @@ class BedrockMCPClient:
         self.pending_tasks = {}  # 대기 중인 작업 ID 및 상태 추적
         self.debug_log = []  # 디버그 로그 추가 - 사고 과정과 도구 사용 추적
         self.bedrock_tools = []  # Bedrock 도구 형식 저장
+        self.tools_hash = None  # bedrock_tools를 만든 도구 목록의 해시
 
     def initialize(self) -> str:
         """
@@ -55,6 +57,33 @@ class BedrockMCPClient:
 
         return session_id
 
+    def _refresh_bedrock_tools(self):
+        """
+        도구 목록 해시가 바뀐 경우에만 Bedrock toolSpec 목록 재생성
+        """
+        tools_hash = tools_fingerprint(self.tools)
+        if tools_hash == self.tools_hash:
+            return
+
+        self.bedrock_tools = []
+        for tool in self.tools:
+            bedrock_tool = {
+                'toolSpec': {
+                    'name': tool['name'].replace('-', '_'),  # 대시를 언더스코어로 변환 (Bedrock 요구사항)
+                    'description': tool['description'],
+                    'inputSchema': {
+                        'json': {
+                            'type': tool['inputSchema'].get('type', 'object'),
+                            'properties': tool['inputSchema'].get('properties', {}),
+                            'required': tool['inputSchema'].get('required', [])
+                        }
+                    }
+                }
+            }
+            self.bedrock_tools.append(bedrock_tool)
+
+        self.tools_hash = tools_hash
+
     def _check_task_completion(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """
         응답에서 대기 중인 작업을 확인하고 완료될 때까지 대기
@@ -402,23 +431,8 @@ class BedrockMCPClient:
             'content': [{'text': prompt}]
         })
 
-        # Bedrock 도구 형식으로 변환
-        self.bedrock_tools = []
-        for tool in self.tools:
-            bedrock_tool = {
-                'toolSpec': {
-                    'name': tool['name'].replace('-', '_'),  # 대시를 언더스코어로 변환 (Bedrock 요구사항)
-                    'description': tool['description'],
-                    'inputSchema': {
-                        'json': {
-                            'type': tool['inputSchema'].get('type', 'object'),
-                            'properties': tool['inputSchema'].get('properties', {}),
-                            'required': tool['inputSchema'].get('required', [])
-                        }
-                    }
-                }
-            }
-            self.bedrock_tools.append(bedrock_tool)
+        # Bedrock 도구 형식으로 변환 (도구 목록이 바뀐 경우에만)
+        self._refresh_bedrock_tools()
 
         # 디버그 로그에 사용 가능한 도구 기록
         self.debug_log.append({
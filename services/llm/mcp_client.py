@@ -2,13 +2,41 @@ import json
 import boto3
 import requests
 import time
-from typing import Dict, Any, List, Optional
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Callable
+from http_session import create_http_session, default_timeout
+
+
+def tools_fingerprint(tools: List[Dict[str, Any]]) -> str:
+    """
+    도구 목록의 내용 기반 해시 계산 (키 순서와 무관)
+
+    Args:
+        tools: MCP tools/list 결과
+
+    Returns:
+        SHA-256 16진수 문자열
+    """
+    serialized = json.dumps(tools, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+# MCP 서버가 만료되었거나 알 수 없는 세션에 반환하는 JSON-RPC 오류 코드
+SESSION_EXPIRED_ERROR_CODE = -32000
+SESSION_EXPIRED_MESSAGE = "Invalid or expired session"
+
+# 서버에 없는 도구를 호출했을 때의 JSON-RPC 오류 코드 (Method not found)
+TOOL_NOT_FOUND_ERROR_CODE = -32601
 
 
 class MCPClient:
     """MCP(Model Context Protocol) Streamable HTTP 클라이언트 구현"""
 
-    def __init__(self, mcp_url: str, auth_token: str = None, session_id: str = None):
+    def __init__(self, mcp_url: str, auth_token: str = None, session_id: str = None,
+                 http_session: requests.Session = None, timeout=None,
+                 on_session_renewed: Callable[[str], None] = None,
+                 on_unknown_tool: Callable[[str], None] = None):
         """
         MCP 클라이언트 초기화
 
@@ -16,9 +44,18 @@ class MCPClient:
             mcp_url: MCP 서버 URL (Lambda Function URL 또는 Fargate 서비스 URL)
             auth_token: 인증 토큰 (선택 사항)
             session_id: 기존 세션 ID (선택 사항)
+            http_session: 공유 HTTP 세션 (선택 사항, 없으면 새로 생성)
+            timeout: (연결, 읽기) 타임아웃 (선택 사항)
+            on_session_renewed: 만료된 세션을 재초기화한 뒤 새 세션 ID로 호출할 콜백 (선택 사항)
+            on_unknown_tool: 서버가 알 수 없는 도구라고 응답했을 때 도구 이름으로 호출할 콜백 (선택 사항)
         """
         self.mcp_url = mcp_url.rstrip('/')
         self.session_id = session_id
+        self.http_session = http_session or create_http_session()
+        self.timeout = timeout or default_timeout()
+        self.on_session_renewed = on_session_renewed
+        self.on_unknown_tool = on_unknown_tool
+        self._session_lock = threading.Lock()
         self.headers = {
             'Content-Type': 'application/json',
             'MCP-Version': '0.6'
@@ -28,6 +65,75 @@ class MCPClient:
         if auth_token:
             self.headers['Authorization'] = f'Bearer {auth_token}'
 
+        # 기존 세션 ID가 있으면 헤더에 설정
+        if session_id:
+            self.headers['MCP-Session-Id'] = session_id
+
+    def resume(self, session_id: str):
+        """
+        initialize 없이 기존 MCP 세션을 재사용하도록 설정
+
+        Args:
+            session_id: 다른 컨테이너/호출에서 생성된 세션 ID
+        """
+        self.session_id = session_id
+        self.headers['MCP-Session-Id'] = session_id
+
+    def _is_session_expired(self, response: requests.Response) -> bool:
+        """
+        응답이 만료되었거나 알 수 없는 세션 오류(-32000)인지 확인
+
+        Args:
+            response: MCP 서버 응답
+
+        Returns:
+            세션 만료 오류 여부
+        """
+        if response.status_code != 404:
+            return False
+        try:
+            error = response.json().get('error') or {}
+        except ValueError:
+            return False
+        return error.get('code') == SESSION_EXPIRED_ERROR_CODE and error.get('message') == SESSION_EXPIRED_MESSAGE
+
+    def _post_with_session(self, payload: Dict[str, Any]) -> requests.Response:
+        """
+        세션이 필요한 요청 전송, 세션 만료 오류 시 한 번 재초기화 후 재시도
+
+        동시에 여러 도구 호출이 만료를 감지해도 재초기화는 한 번만 수행한다.
+
+        Args:
+            payload: JSON-RPC 요청
+
+        Returns:
+            MCP 서버 응답
+        """
+        sent_session_id = self.session_id
+        response = self.http_session.post(
+            self.mcp_url,
+            headers=dict(self.headers),
+            json=payload,
+            timeout=self.timeout
+        )
+
+        if not self._is_session_expired(response):
+            return response
+
+        with self._session_lock:
+            if self.session_id == sent_session_id:
+                print(f"MCP 세션 만료 감지 ({sent_session_id}), 세션을 재초기화합니다.")
+                self.initialize()
+                if self.on_session_renewed:
+                    self.on_session_renewed(self.session_id)
+
+        return self.http_session.post(
+            self.mcp_url,
+            headers=dict(self.headers),
+            json=payload,
+            timeout=self.timeout
+        )
+
     def initialize(self) -> str:
         """
         MCP 서버와 세션 초기화
@@ -41,10 +147,11 @@ class MCPClient:
             "method": "initialize"
         }
 
-        response = requests.post(
+        response = self.http_session.post(
             self.mcp_url,
             headers=self.headers,
-            json=payload
+            json=payload,
+            timeout=self.timeout
         )
 
         if response.status_code != 200:
@@ -77,11 +184,7 @@ class MCPClient:
             "method": "tools/list"
         }
 
-        response = requests.post(
-            self.mcp_url,
-            headers=self.headers,
-            json=payload
-        )
+        response = self._post_with_session(payload)
 
         if response.status_code != 200:
             raise Exception(f"도구 목록 조회 실패: {response.status_code} - {response.text}")
@@ -117,18 +220,23 @@ class MCPClient:
             }
         }
 
-        response = requests.post(
-            self.mcp_url,
-            headers=self.headers,
-            json=payload
-        )
+        response = self._post_with_session(payload)
+
+        try:
+            result = response.json()
+        except ValueError:
+            result = {}
+        error = result.get('error') or {}
+
+        # 배포로 도구가 바뀌어 캐시된 도구 목록이 오래된 경우 (다음 요청부터 새 목록 사용)
+        if error.get('code') == TOOL_NOT_FOUND_ERROR_CODE and self.on_unknown_tool:
+            self.on_unknown_tool(tool_name)
 
         if response.status_code != 200:
             raise Exception(f"도구 호출 실패: {response.status_code} - {response.text}")
 
-        result = response.json()
-        if 'error' in result:
-            raise Exception(f"도구 호출 오류: {result['error']['message']}")
+        if error:
+            raise Exception(f"도구 호출 오류: {error.get('message')}")
 
         return result.get('result', {})
 
@@ -142,9 +250,10 @@ class MCPClient:
         if not self.session_id:
             return True  # 세션이 없으면 이미 종료된 것으로 간주
 
-        response = requests.delete(
+        response = self.http_session.delete(
             self.mcp_url,
-            headers=self.headers
+            headers=self.headers,
+            timeout=self.timeout
         )
 
         # 세션 ID 초기화
@@ -0,0 +1,129 @@
+import json
+import os
+import time
+import boto3
+from botocore.exceptions import ClientError
+from typing import Dict, Any, List, Optional
+from mcp_client import tools_fingerprint
+
+# MCP 서버 세션 만료(24시간)보다 먼저 재초기화하도록 상태 유효 시간을 짧게 설정
+DEFAULT_STATE_TTL_SECONDS = int(os.environ.get('MCP_STATE_TTL_SECONDS', str(23 * 60 * 60)))
+
+
+class MCPStateStore:
+    """MCP 세션 ID와 도구 목록(manifest)을 Lambda 컨테이너 간에 공유하는 DynamoDB 저장소"""
+
+    def __init__(self, table_name: str, state_key: str, ttl_seconds: int = DEFAULT_STATE_TTL_SECONDS):
+        """
+        상태 저장소 초기화
+
+        Args:
+            table_name: 상태 저장 DynamoDB 테이블 이름 (파티션 키: state_key)
+            state_key: 상태 항목 키 (MCP 서버 URL 기준)
+            ttl_seconds: 저장된 세션을 재사용할 최대 시간 (초)
+        """
+        self.table = boto3.resource('dynamodb').Table(table_name)
+        self.state_key = state_key
+        self.ttl_seconds = ttl_seconds
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        저장된 MCP 상태 조회
+
+        Returns:
+            {session_id, tools, etag, version, verified_at} 또는 없거나 만료된 경우 None
+        """
+        try:
+            response = self.table.get_item(Key={'state_key': self.state_key}, ConsistentRead=True)
+        except Exception as e:
+            print(f"MCP 상태 조회 실패: {str(e)}")
+            return None
+
+        item = response.get('Item')
+        if not item or int(item.get('expires_at', 0)) <= time.time():
+            return None
+
+        return {
+            'session_id': item['session_id'],
+            'tools': json.loads(item.get('tools', '[]')),
+            'etag': item.get('etag'),
+            'version': int(item.get('version', 0)),
+            'verified_at': int(item.get('verified_at', item.get('updated_at', 0)))
+        }
+
+    def save(self, session_id: str, tools: List[Dict[str, Any]], expected_version: int = None) -> Optional[Dict[str, Any]]:
+        """
+        MCP 상태 저장 (version 기반 낙관적 동시성 제어)
+
+        다른 컨테이너가 먼저 상태를 갱신한 경우 저장하지 않고 최신 상태를 반환한다.
+
+        Args:
+            session_id: MCP 세션 ID
+            tools: MCP tools/list 결과
+            expected_version: 읽어 온 상태의 version (새로 만드는 경우 None)
+
+        Returns:
+            저장되었거나 이미 저장되어 있던 최신 상태
+        """
+        version = (expected_version or 0) + 1
+        now = int(time.time())
+        state = {
+            'session_id': session_id,
+            'tools': tools,
+            'etag': tools_fingerprint(tools),
+            'version': version,
+            'verified_at': now
+        }
+
+        if expected_version is None:
+            condition = 'attribute_not_exists(state_key) OR expires_at <= :now'
+            values = {':now': now}
+        else:
+            condition = 'attribute_not_exists(state_key) OR version = :expected OR expires_at <= :now'
+            values = {':expected': expected_version, ':now': now}
+
+        try:
+            self.table.put_item(
+                Item={
+                    'state_key': self.state_key,
+                    'session_id': session_id,
+                    'tools': json.dumps(tools, ensure_ascii=False),
+                    'etag': state['etag'],
+                    'version': version,
+                    'updated_at': now,
+                    'verified_at': now,
+                    'expires_at': now + self.ttl_seconds
+                },
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values
+            )
+            return state
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                print("다른 컨테이너가 MCP 상태를 먼저 갱신했습니다. 최신 상태를 사용합니다.")
+                return self.load()
+            print(f"MCP 상태 저장 실패: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"MCP 상태 저장 실패: {str(e)}")
+            return None
+
+    def mark_verified(self, version: int) -> None:
+        """
+        저장된 도구 목록이 서버의 현재 목록과 같음을 확인한 시각 기록
+
+        Args:
+            version: 확인한 상태의 version (그 사이 다른 컨테이너가 갱신했으면 기록하지 않음)
+        """
+        try:
+            self.table.update_item(
+                Key={'state_key': self.state_key},
+                UpdateExpression='SET verified_at = :now',
+                ConditionExpression='version = :version',
+                ExpressionAttributeValues={':now': int(time.time()), ':version': version}
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                print(f"MCP 상태 확인 시각 기록 실패: {str(e)}")
+        except Exception as e:
+            print(f"MCP 상태 확인 시각 기록 실패: {str(e)}")
@@ -0,0 +1,3 @@
+#!/bin/bash
+# Lambda Web Adapter(/opt/bootstrap)가 실행하는 /llm1 스트리밍 서버 진입점
+PYTHONPATH=$PYTHONPATH:/opt/python:$LAMBDA_RUNTIME_DIR exec python stream_server.py
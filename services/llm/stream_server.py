@@ -0,0 +1,75 @@
+# llm/stream_server.py
+"""
+/llm1 스트리밍 전용 HTTP 서버
+
+Lambda Web Adapter가 이 서버 앞에서 Function URL(InvokeMode: RESPONSE_STREAM) 요청을
+전달하고, 응답 본문을 청크 단위로 그대로 클라이언트에 흘려보낸다.
+SSE 이벤트는 stream_llm1_with_mcp가 생성하는 즉시 청크 하나로 써서 전송한다.
+CORS 헤더와 preflight는 Function URL의 Cors 설정이 처리한다.
+"""
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llm_service import stream_llm1_with_mcp
+
+
+class Llm1StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        # Lambda Web Adapter 준비 상태 확인 (AWS_LWA_READINESS_CHECK_PATH)
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Route GET {self.path} not found."})
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/llm1":
+            self._send_json(404, {"error": f"Route POST {self.path} not found."})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, UnicodeDecodeError):
+            self._send_json(400, {"error": "요청 본문이 올바른 JSON이 아닙니다."})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for event in stream_llm1_with_mcp(body):
+                self._write_chunk(event)
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 요청을 취소한 경우
+            print("스트리밍 클라이언트 연결 종료")
+            return
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", "8080"))
+    server = ThreadingHTTPServer(("127.0.0.1", port), Llm1StreamHandler)
+    print(f"llm1 스트리밍 서버 시작 (port {port})")
+    server.serve_forever()